@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice ANN (IVFIndex) frente a la búsqueda exacta.
+
+Para cada tamaño de enrolamiento construye el índice sobre LBPHMatcher y,
+para varios valores de nprobe, mide:
+
+- latencia por consulta frente a la búsqueda exacta
+- recall@1: la etiqueta más cercana es la misma que en la búsqueda exacta
+- decisión: misma aceptación/rechazo con el umbral de login.py (< 80)
+
+Uso:
+    python benchmarks/bench_ann_index.py --usuarios 200 1000 --nprobe 4 8 16 32
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, print_table, synthetic_users
+
+from face_matcher import IVFIndex, LBPHMatcher
+from face_pipeline import preprocess_face
+
+THRESHOLD = 80
+
+
+def decisions(labels, distances):
+    return np.where(distances[:, 0] < THRESHOLD, labels[:, 0], -1)
+
+
+def measure(n_users, per_user, n_queries, nprobes):
+    faces, labels = synthetic_users(n_users, per_user, seed=n_users)
+    matcher = LBPHMatcher()
+    matcher.train(np.array([preprocess_face(face) for face in faces]), labels)
+    probes, _ = synthetic_users(n_users, 1, seed=n_users)
+    queries = matcher.compute_histograms(np.array([preprocess_face(face) for face in probes[:n_queries]]))
+
+    matcher.set_index(None)
+    with Timer() as t_exact:
+        exact_labels, exact_distances = matcher.search_histograms(queries)
+    exact_decisions = decisions(exact_labels, exact_distances)
+
+    with Timer() as t_build:
+        index = IVFIndex().build(matcher)
+    matcher.set_index(index)
+
+    rows = []
+    for nprobe in nprobes:
+        index.nprobe = nprobe
+        with Timer() as t_ann:
+            ann_labels, ann_distances = matcher.search_histograms(queries)
+        rows.append((n_users * per_user, len(index.centroids), nprobe,
+                     f"{t_exact.elapsed / len(queries) * 1000:.2f}", f"{t_ann.elapsed / len(queries) * 1000:.2f}",
+                     f"{t_exact.elapsed / t_ann.elapsed:.1f}x",
+                     f"{(ann_labels[:, 0] == exact_labels[:, 0]).mean() * 100:.0f}%",
+                     f"{(decisions(ann_labels, ann_distances) == exact_decisions).mean() * 100:.0f}%",
+                     f"{t_build.elapsed:.2f}"))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[200, 600])
+    parser.add_argument("--muestras", type=int, default=15, help="muestras por usuario")
+    parser.add_argument("--consultas", type=int, default=100)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rows = []
+    for n_users in args.usuarios:
+        rows.extend(measure(n_users, args.muestras, args.consultas, args.nprobe))
+        print(f"✅ {n_users} usuarios medidos")
+
+    print()
+    print_table(["muestras", "listas", "nprobe", "exacta ms", "ann ms", "mejora", "recall@1", "decisión",
+                 "construir s"], rows)
+
+
+if __name__ == "__main__":
+    main()
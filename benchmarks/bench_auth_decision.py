@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la decisión de autenticación: regla de 3 predicciones
+seguidas < 80 frente a la evidencia acumulada (EvidenceAccumulator).
+
+Registra usuarios sintéticos con buena luz y graba sesiones de
+autenticación de 3 s a 30 FPS con poca luz (ganancia 0.3-0.6, ruido,
+desenfoque y subexposición ocasional): sesiones de usuarios registrados
+y de impostores (identidades no registradas). Cada frame se predice una
+sola vez y las sesiones se reproducen a 30, 15, 10 y 2 FPS con cada regla
+(2 FPS: kiosco con el procesador saturado, donde cada frame llega tras
+una pausa larga):
+
+- actual:              distancia < 80 en 3 frames seguidos
+- actual calibrada:    igual, con el umbral en el percentil 1 de impostores
+- evidencia:           EvidenceAccumulator con la curva de fit() y α = --fa
+
+La curva y el umbral calibrado salen de sesiones de calibración
+distintas de las de prueba. Se reporta la distribución de frames y
+segundos hasta la decisión de los usuarios legítimos, cuántos deciden en
+la sesión y la tasa de falsas aceptaciones (impostor aceptado o usuario
+aceptado con otra etiqueta).
+
+Uso:
+    python benchmarks/bench_auth_decision.py --usuarios 30 --sesiones 60 --fa 1e-3
+"""
+
+import argparse
+
+import numpy as np
+
+from common import enrollment_stream, print_table, synthetic_identities
+
+from face_matcher import LBPHMatcher
+from face_pipeline import ConsecutiveRule, EvidenceAccumulator, preprocess_face
+
+SESSION_FPS = 30
+
+
+def low_light_session(identity, n_frames, rng, gain_range=(0.3, 0.6), noise=6.0):
+    """Recortes de una sesión con poca luz, ya preprocesados"""
+    gain = rng.uniform(*gain_range)
+    faces = []
+    for face in enrollment_stream(identity, n_frames, rng, blur_rate=0.3, exposure_rate=0.1):
+        face = face.astype(np.float32) * gain + rng.normal(0, noise, face.shape)
+        faces.append(preprocess_face(np.clip(face, 0, 255).astype(np.uint8)))
+    return np.array(faces)
+
+
+def record_sessions(matcher, identities, labels, n_sessions, n_frames, rng, **lighting):
+    """Predicciones (etiqueta, distancia) por frame de n_sessions sesiones"""
+    sessions = []
+    for index in range(n_sessions):
+        user = index % len(identities)
+        top_labels, top_distances = matcher.search(low_light_session(identities[user], n_frames, rng, **lighting))
+        sessions.append((labels[user], top_labels[:, 0], top_distances[:, 0]))
+    return sessions
+
+
+def replay(rule, session, fps):
+    """Reproduce una sesión a 'fps'; devuelve (frames, segundos, etiqueta) de la aceptación o None"""
+    _, labels, distances = session
+    step = SESSION_FPS // fps
+    rule.reset()
+    for frame, index in enumerate(range(0, len(labels), step), start=1):
+        decision, label, _ = rule.observe(int(labels[index]), float(distances[index]), index / SESSION_FPS)
+        if decision == 'accept':
+            return frame, index / SESSION_FPS, label
+    return None
+
+
+def evaluate(name, make_rule, genuine, impostor, fps):
+    frames, seconds, false_accepts = [], [], 0
+    for session in genuine:
+        result = replay(make_rule(), session, fps)
+        if result is None:
+            continue
+        if result[2] != session[0]:
+            false_accepts += 1
+        else:
+            frames.append(result[0])
+            seconds.append(result[1])
+    false_accepts += sum(replay(make_rule(), session, fps) is not None for session in impostor)
+
+    frames = np.array(frames or [np.nan])
+    seconds = np.array(seconds or [np.nan])
+    return (name, fps, f"{len(seconds[~np.isnan(seconds)]) / len(genuine) * 100:.0f}%",
+            f"{np.nanpercentile(frames, 50):.0f}", f"{np.nanpercentile(frames, 90):.0f}",
+            f"{np.nanpercentile(seconds, 50):.2f}", f"{np.nanpercentile(seconds, 90):.2f}",
+            f"{false_accepts / (len(genuine) + len(impostor)) * 100:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=30, help="usuarios registrados")
+    parser.add_argument("--impostores", type=int, default=15, help="identidades no registradas")
+    parser.add_argument("--sesiones", type=int, default=60, help="sesiones de prueba de cada tipo")
+    parser.add_argument("--segundos", type=float, default=3.0, help="duración de cada sesión")
+    parser.add_argument("--fa", type=float, default=1e-3, help="cota de falsas aceptaciones (α)")
+    parser.add_argument("--fps", type=int, nargs="+", default=[30, 15, 10, 2])
+    parser.add_argument("--ganancia", type=float, nargs=2, default=[0.3, 0.6], help="rango de luz de las sesiones")
+    parser.add_argument("--ruido", type=float, default=6.0, help="ruido del sensor (desviación estándar)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    identities = synthetic_identities(args.usuarios + 2 * args.impostores, seed=7, texture_sigma=1,
+                                      texture_strength=80)
+    enrolled = identities[:args.usuarios]
+    labels = np.arange(args.usuarios, dtype=np.int32)
+    faces = np.array([preprocess_face(face) for identity in enrolled for face in enrollment_stream(identity, 15, rng)])
+    matcher = LBPHMatcher()
+    matcher.train(faces, np.repeat(labels, 15))
+
+    # Calibración y prueba con sesiones (e impostores) distintos
+    n_frames = int(args.segundos * SESSION_FPS)
+    calibration_impostors = identities[args.usuarios:args.usuarios + args.impostores]
+    test_impostors = identities[args.usuarios + args.impostores:]
+    unknown = np.full(args.impostores, -1, dtype=np.int32)
+    lighting = {'gain_range': args.ganancia, 'noise': args.ruido}
+    calibration = record_sessions(matcher, enrolled, labels, args.usuarios, n_frames, rng, **lighting)
+    calibration_impostor = record_sessions(matcher, calibration_impostors, unknown, args.impostores, n_frames, rng,
+                                           **lighting)
+    genuine = record_sessions(matcher, enrolled, labels, args.sesiones, n_frames, rng, **lighting)
+    impostor = record_sessions(matcher, test_impostors, unknown, args.sesiones, n_frames, rng, **lighting)
+    print(f"✅ {len(genuine) + len(impostor)} sesiones grabadas")
+
+    genuine_distances = np.concatenate([d[l == user] for user, l, d in calibration])
+    impostor_distances = np.concatenate([d for _, _, d in calibration_impostor])
+    curve = EvidenceAccumulator.fit(genuine_distances, impostor_distances)
+    threshold = float(np.percentile(impostor_distances, 1))
+    print(f"📐 Calibración: legítimos p50 {np.median(genuine_distances):.1f}, "
+          f"impostores p50 {np.median(impostor_distances):.1f}, umbral calibrado {threshold:.1f}")
+
+    rules = [
+        ("actual", lambda: ConsecutiveRule(80.0, 3)),
+        ("actual calibrada", lambda: ConsecutiveRule(threshold, 3)),
+        ("evidencia", lambda: EvidenceAccumulator(curve, false_accept=args.fa)),
+    ]
+    rows = [evaluate(name, make_rule, genuine, impostor, fps) for name, make_rule in rules for fps in args.fps]
+
+    print()
+    print_table(["regla", "FPS", "deciden", "frames p50", "frames p90", "s p50", "s p90", "falsas aceptaciones"],
+                rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la cámara persistente (face_pipeline.CameraService).
+
+Simula una cámara a 30 FPS que tarda --apertura segundos en abrir y una
+serie de sesiones de autenticación/registro (iniciar, cancelar, volver a
+intentar) separadas por --pausa segundos, y compara:
+
+- reabrir:  cada sesión abre y cierra su propia cámara (comportamiento anterior)
+- servicio: las sesiones se conectan a la cámara compartida
+
+Mide el tiempo hasta el primer frame de cada sesión y cuántas veces se
+abrió el dispositivo. Al final deja pasar --inactividad segundos para
+comprobar que el servicio libera la cámara sin sesiones conectadas.
+
+Uso:
+    python benchmarks/bench_camera_service.py --sesiones 8 --apertura 1.0
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from common import SlowCameraSource, load_base_faces, print_table
+
+from face_pipeline import CameraService, CaptureWorker, FrameRingBuffer
+from frame_sources import open_frame_source
+
+
+def run_session(frame_buffer, duration):
+    """Consume frames como lo haría FaceRecognitionThread; devuelve el tiempo al primer frame"""
+    started = time.perf_counter()
+    first_frame = None
+    while time.perf_counter() - started < duration:
+        item = frame_buffer.get_latest(timeout=0.5)
+        if item is not None and first_frame is None:
+            first_frame = time.perf_counter()
+    return first_frame
+
+
+def reopen_sessions(factory, n_sessions, duration, pause):
+    first_frames, opens = [], 0
+    for _ in range(n_sessions):
+        started = time.perf_counter()
+        capture = open_frame_source(factory)
+        opens += 1
+        frame_buffer = FrameRingBuffer(2)
+        worker = CaptureWorker(capture, frame_buffer)
+        worker.start()
+        first_frames.append(run_session(frame_buffer, duration) - started)
+        worker.stop()
+        capture.release()
+        time.sleep(pause)
+    return first_frames, opens
+
+
+def service_sessions(service, n_sessions, duration, pause):
+    first_frames = []
+    for _ in range(n_sessions):
+        started = time.perf_counter()
+        subscription = service.attach()
+        first_frames.append(run_session(subscription, duration) - started)
+        service.detach(subscription)
+        time.sleep(pause)
+    return first_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sesiones", type=int, default=8)
+    parser.add_argument("--apertura", type=float, default=1.0, help="segundos que tarda en abrir la cámara")
+    parser.add_argument("--duracion", type=float, default=0.5, help="segundos de cada sesión")
+    parser.add_argument("--pausa", type=float, default=0.5, help="segundos entre sesiones")
+    parser.add_argument("--inactividad", type=float, default=2.0, help="idle_timeout del servicio")
+    args = parser.parse_args()
+
+    faces, labels = load_base_faces()
+
+    def factory():
+        return SlowCameraSource(args.apertura, n_frames=None, samples=faces, labels=labels)
+
+    rows = []
+    first_frames, opens = reopen_sessions(factory, args.sesiones, args.duracion, args.pausa)
+    rows.append(("reabrir", args.sesiones, opens, f"{np.mean(first_frames) * 1000:.0f}",
+                 f"{np.max(first_frames) * 1000:.0f}", f"{sum(first_frames):.2f}"))
+    print("✅ reabrir medido")
+
+    service = CameraService(factory, idle_timeout=args.inactividad)
+    first_frames = service_sessions(service, args.sesiones, args.duracion, args.pausa)
+    stats = service.get_stats()
+    rows.append(("servicio", args.sesiones, stats['opens'], f"{np.mean(first_frames) * 1000:.0f}",
+                 f"{np.max(first_frames) * 1000:.0f}", f"{sum(first_frames):.2f}"))
+    print("✅ servicio medido")
+
+    time.sleep(args.inactividad + 0.5)
+    released = not service.is_open()
+    service.close()
+
+    print()
+    print_table(["modo", "sesiones", "aperturas", "1er frame ms (media)", "1er frame ms (máx)",
+                 "espera total s"], rows)
+    print(f"📷 Servicio: {service.get_stats()}")
+    print(f"{'✅' if released else '❌'} Cámara liberada tras {args.inactividad:.1f} s sin sesiones")
+
+
+if __name__ == "__main__":
+    main()
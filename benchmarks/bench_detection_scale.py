@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escala de detección: FPS contra precisión de la cascada Haar.
+
+Ejecuta detect_faces sobre frames sintéticos (por defecto 1920×1080, como
+las cámaras USB de los kioscos) a varias escalas de detección y reporta:
+
+- ms por frame y FPS (incluye el redimensionado)
+- recall contra la posición conocida de cada cara (IoU >= 0.4)
+- falsos positivos totales
+
+Uso:
+    python benchmarks/bench_detection_scale.py --escalas 1.0 0.75 0.5 0.35 0.25
+"""
+
+import argparse
+
+from common import Timer, cascade_path, match_detections, print_table, synthetic_frames
+
+import cv2
+
+from face_pipeline import detect_faces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--escalas", type=float, nargs="+", default=[1.0, 0.75, 0.5, 0.35, 0.25])
+    parser.add_argument("--frames", type=int, default=40)
+    parser.add_argument("--ancho", type=int, default=1920)
+    parser.add_argument("--alto", type=int, default=1080)
+    args = parser.parse_args()
+
+    cascade = cv2.CascadeClassifier(cascade_path())
+    frames = synthetic_frames(args.frames, size=(args.ancho, args.alto), seed=1)
+    grays = [(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), truth) for frame, truth in frames]
+    total_faces = sum(len(truth) for _, truth in grays)
+
+    rows = []
+    for scale in args.escalas:
+        true_positives = false_positives = 0
+        with Timer() as timer:
+            for gray, truth in grays:
+                boxes = detect_faces(cascade, gray, detection_scale=scale)
+                tp, fp = match_detections(boxes, truth)
+                true_positives += tp
+                false_positives += fp
+        ms = timer.elapsed * 1000 / len(grays)
+        rows.append((f"{scale:.2f}", f"{ms:.1f}", f"{1000 / ms:.1f}",
+                     f"{true_positives / total_faces:.1%}", false_positives))
+
+    print_table(["escala", "ms/frame", "FPS", "recall", "falsos pos."], rows)
+
+
+if __name__ == "__main__":
+    main()
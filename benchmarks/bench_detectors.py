@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los detectores de caras de face_detectors.py.
+
+Reproduce un conjunto de frames sintéticos con caras pegadas en
+posiciones conocidas (--frames de --ancho×--alto) por detect_faces con
+cada detector y los parámetros de la interfaz (scale_factor 1.1,
+min_neighbors 4, min_size 80) y reporta:
+
+- ms por frame (p50 y p95) y FPS
+- recall contra la posición conocida de cada cara (IoU >= 0.4)
+- falsos positivos totales
+
+El detector dnn recibe el frame BGR (needs_color) y se mide con cada
+cantidad de --hilos. Los detectores
+cuyos archivos no están junto a face_detectors.py se listan como no
+disponibles, con los archivos que faltan (la misma comprobación con la
+que load_detector decide usar Haar).
+
+Uso:
+    python benchmarks/bench_detectors.py --detectores haar lbp lbp+haar dnn --hilos 1 2 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from common import match_detections, print_table, synthetic_frames
+
+import cv2
+
+from face_detectors import DETECTOR_NAMES, create_detector, detector_availability, detector_image
+from face_pipeline import detect_faces
+
+
+def measure(detector, frames, total_faces, detection_scale):
+    times, true_positives, false_positives = [], 0, 0
+    for frame, gray, truth in frames:
+        started = time.perf_counter()
+        boxes = detect_faces(detector, detector_image(detector, frame, gray), detection_scale=detection_scale,
+                             scale_factor=1.1, min_neighbors=4, min_size=(80, 80))
+        times.append((time.perf_counter() - started) * 1000)
+        tp, fp = match_detections(boxes, truth)
+        true_positives += tp
+        false_positives += fp
+    times = np.array(times)
+    return (f"{np.percentile(times, 50):.1f}", f"{np.percentile(times, 95):.1f}", f"{1000 / times.mean():.1f}",
+            f"{true_positives / total_faces:.1%}", false_positives)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detectores", nargs="+", choices=DETECTOR_NAMES, default=list(DETECTOR_NAMES))
+    parser.add_argument("--hilos", type=int, nargs="+", default=[1, 2, 4], help="hilos de OpenCV para dnn")
+    parser.add_argument("--frames", type=int, default=40)
+    parser.add_argument("--ancho", type=int, default=1280)
+    parser.add_argument("--alto", type=int, default=720)
+    parser.add_argument("--escala", type=float, default=1.0, help="escala de detección (detection_scale)")
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.frames, size=(args.ancho, args.alto), face_sizes=(100, args.alto // 2), seed=1)
+    frames = [(frame, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), truth) for frame, truth in frames]
+    total_faces = sum(len(truth) for _, _, truth in frames)
+    threads_before = cv2.getNumThreads()
+
+    availability = detector_availability()
+    rows = []
+    for name in args.detectores:
+        missing = availability[name]
+        if missing:
+            rows.append((name, "-", "no disponible") + ("",) * 4)
+            print(f"⚠️ {name} no disponible, faltan: {', '.join(missing)}")
+            continue
+        for threads in (args.hilos if name == 'dnn' else [None]):
+            detector = create_detector(name, threads=threads or 1).load()
+            # Calentamiento (asignaciones de la red)
+            detector.detectMultiScale(detector_image(detector, frames[0][0], frames[0][1]))
+            rows.append((name, threads or "-") + measure(detector, frames, total_faces, args.escala))
+            cv2.setNumThreads(threads_before)
+            print(f"✅ {name} medido")
+
+    print()
+    print(f"🖼️ {len(frames)} frames de {args.ancho}×{args.alto}, {total_faces} caras")
+    print_table(["detector", "hilos", "ms p50", "ms p95", "FPS", "recall", "falsos pos."], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark de enrolamiento: re-entrenamiento completo vs actualización incremental.
+
+Para cada tamaño de enrolamiento entrena un modelo LBPH con N usuarios
+sintéticos y mide cuánto cuesta incorporar un usuario nuevo:
+
+- completo:    train() con las muestras de los N+1 usuarios (comportamiento anterior)
+- incremental: update() solo con las muestras del usuario nuevo
+
+Con --persistir también se incluye guardar (y, en el incremental, leer)
+face_model.xml, que sigue siendo proporcional al total de muestras.
+
+Uso:
+    python benchmarks/bench_enrollment.py --usuarios 10 100 1000
+"""
+
+import argparse
+import os
+import tempfile
+
+from common import Timer, print_table, synthetic_users
+
+import cv2
+
+
+def measure(n_users, per_user, persist, workdir):
+    faces, labels = synthetic_users(n_users + 1, per_user, seed=n_users)
+    split = n_users * per_user
+    old_faces, old_labels = list(faces[:split]), labels[:split]
+    new_faces, new_labels = list(faces[split:]), labels[split:]
+    model_file = os.path.join(workdir, f"model_{n_users}.xml")
+
+    full = cv2.face.LBPHFaceRecognizer_create()
+    with Timer() as t_full:
+        full.train(old_faces + new_faces, labels)
+        if persist:
+            full.save(model_file)
+
+    base = cv2.face.LBPHFaceRecognizer_create()
+    base.train(old_faces, old_labels)
+    if persist:
+        base.save(model_file)
+        base = cv2.face.LBPHFaceRecognizer_create()
+
+    with Timer() as t_incr:
+        if persist:
+            base.read(model_file)
+        base.update(new_faces, new_labels)
+        if persist:
+            base.save(model_file)
+
+    if persist:
+        os.remove(model_file)
+
+    # Ambos modelos deben predecir igual
+    probe = new_faces[0]
+    assert full.predict(probe)[0] == base.predict(probe)[0]
+    return t_full.elapsed, t_incr.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--muestras", type=int, default=30, help="muestras por usuario")
+    parser.add_argument("--persistir", action="store_true", help="incluir lectura/escritura de face_model.xml")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_users in args.usuarios:
+            full, incr = measure(n_users, args.muestras, args.persistir, workdir)
+            rows.append((n_users, n_users * args.muestras, f"{full * 1000:.1f}", f"{incr * 1000:.1f}",
+                         f"{full / incr:.1f}x"))
+            print(f"✅ {n_users} usuarios medidos")
+
+    print()
+    print_table(["usuarios", "muestras", "completo ms", "incremental ms", "mejora"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la compuerta de calidad y diversidad del registro.
+
+Simula, para cada usuario sintético, la secuencia que ve la cámara durante
+el registro: la cara se mueve poco a poco (~30 FPS), con algunos frames
+movidos (desenfoque) y algunos con mala exposición. Compara dos formas de
+elegir las muestras:
+
+- primeras:  las primeras --muestras caras de la secuencia (comportamiento anterior)
+- compuerta: las caras que acepta EnrollmentGate hasta --objetivo muestras
+
+y mide tamaño del conjunto, tiempo de entrenamiento LBPH, tiempo de
+predicción y tasa de reconocimiento sobre caras de otra sesión del mismo
+usuario (más variación de pose e iluminación).
+
+Uso:
+    python benchmarks/bench_enrollment_gate.py --usuarios 20 --frames 150
+"""
+
+import argparse
+
+import numpy as np
+
+from common import SAMPLE_SHAPE, Timer, enrollment_stream, load_base_faces, print_table, synthetic_identities
+
+import cv2
+
+from face_pipeline import EnrollmentGate, preprocess_face
+from frame_sources import jitter_face
+
+
+def select_first(stream, count):
+    return [preprocess_face(roi) for roi, _ in zip(stream, range(count))]
+
+
+def select_gated(stream, count, gate):
+    gate.reset()
+    kept = []
+    for roi in stream:
+        face = preprocess_face(roi)
+        accepted, _ = gate.consider(roi, face)
+        if accepted:
+            kept.append(face)
+            if len(kept) >= count:
+                break
+    return kept
+
+
+def evaluate(faces, labels, probes, probe_labels):
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    with Timer() as t_train:
+        recognizer.train(faces, np.asarray(labels, dtype=np.int32))
+    identified = accepted = 0
+    with Timer() as t_predict:
+        for probe, label in zip(probes, probe_labels):
+            predicted, confidence = recognizer.predict(probe)
+            identified += predicted == label
+            accepted += predicted == label and confidence < 80
+    return t_train.elapsed, t_predict.elapsed / len(probes), identified / len(probes), accepted / len(probes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--frames", type=int, default=150, help="frames disponibles por registro")
+    parser.add_argument("--muestras", type=int, default=30, help="muestras del registro anterior")
+    parser.add_argument("--objetivo", type=int, default=15, help="muestras que guarda la compuerta")
+    parser.add_argument("--distancia", type=float, default=EnrollmentGate().min_distance,
+                        help="distancia mínima de diversidad")
+    parser.add_argument("--pruebas", type=int, default=50, help="caras de prueba por usuario")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    base_faces, _ = load_base_faces()
+    identities = synthetic_identities(args.usuarios, seed=args.semilla, base_faces=base_faces)
+    rng = np.random.default_rng(args.semilla + 1)
+    gate = EnrollmentGate(min_distance=args.distancia)
+
+    sets = {'primeras': ([], []), 'compuerta': ([], [])}
+    probes, probe_labels = [], []
+    rejected = dict.fromkeys(EnrollmentGate.REASONS, 0)
+    for label, identity in enumerate(identities):
+        seed = int(rng.integers(1 << 31))
+        first = select_first(enrollment_stream(identity, args.frames, np.random.default_rng(seed)), args.muestras)
+        gated = select_gated(enrollment_stream(identity, args.frames, np.random.default_rng(seed)), args.objetivo,
+                             gate)
+        for reason, count in gate.rejected.items():
+            rejected[reason] += count
+        for name, faces in (('primeras', first), ('compuerta', gated)):
+            sets[name][0].extend(faces)
+            sets[name][1].extend([label] * len(faces))
+
+        # Otra sesión: más variación de pose e iluminación que durante el registro
+        for _ in range(args.pruebas):
+            probes.append(preprocess_face(jitter_face(identity, rng, strength=0.6)))
+            probe_labels.append(label)
+
+    rows = []
+    results = {}
+    for name, (faces, labels) in sets.items():
+        train_s, predict_s, identified, accepted = evaluate(faces, labels, probes, probe_labels)
+        results[name] = (len(faces), train_s, predict_s)
+        size_kb = len(faces) * SAMPLE_SHAPE[0] * SAMPLE_SHAPE[1] / 1024
+        rows.append((name, len(faces), f"{size_kb:.0f}", f"{train_s * 1000:.1f}", f"{predict_s * 1000:.2f}",
+                     f"{identified * 100:.1f}%", f"{accepted * 100:.1f}%"))
+
+    # identificadas: la etiqueta más cercana es la correcta
+    # aceptadas: además la confianza pasa el umbral de login.py (< 80)
+    print_table(["selección", "muestras", "KiB", "entrenar ms", "predecir ms", "identificadas", "aceptadas"], rows)
+    first, gated = results['primeras'], results['compuerta']
+    print()
+    print(f"📉 Conjunto {100 * (1 - gated[0] / first[0]):.0f}% más pequeño, "
+          f"entrenamiento {first[1] / gated[1]:.1f}x y predicción {first[2] / gated[2]:.1f}x más rápidos")
+    print(f"🚫 Rechazadas por la compuerta: {rejected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark del bus de frames (face_pipeline.FrameBus) con dos consumidores:
+la vista previa y el reconocimiento.
+
+Una cámara sintética a 30 FPS publica durante --segundos y se comparan:
+
+- un consumidor:  un solo hilo toma el frame más reciente, detecta caras y
+                  escala el frame para la vista previa (FaceRecognitionThread
+                  sin PreviewThread): la vista previa va al ritmo del análisis
+- colas:          cada consumidor tiene su FrameRingBuffer y la captura le
+                  publica una copia del frame a cada uno
+- bus:            vista previa y reconocimiento son suscriptores de un
+                  FrameBus y leen la ranura más reciente sin copiarla
+
+Se reporta FPS de la vista previa y del reconocimiento, frames saltados por
+cada uno, copias del frame por frame capturado y cuánto tarda put() en el
+hilo de captura (si la captura esperara a un consumidor lento, se notaría
+aquí y en los FPS capturados).
+
+Uso:
+    python benchmarks/bench_frame_bus.py --segundos 10 --resolucion 1280 720
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from common import SlowCameraSource, cascade_path, print_table, synthetic_users
+
+import cv2
+
+from face_pipeline import CaptureWorker, FrameBus, FrameRingBuffer, detect_faces
+
+DISPLAY_SIZE = (440, 330)  # Tamaño del QLabel de la vista previa
+
+
+class TimedPublisher:
+    """Envuelve el destino de CaptureWorker y mide put(); con varios destinos copia el frame a cada uno"""
+
+    def __init__(self, *targets):
+        self.targets = targets
+        self.put_times = []
+        self.copies = 0
+
+    def put(self, frame, block=False, flip=False):
+        started = time.perf_counter()
+        if len(self.targets) == 1:
+            self.targets[0].put(frame, block=block, flip=flip)
+            self.copies += 1  # Volteo a un frame nuevo o directo a la ranura del bus
+        else:
+            if flip:
+                frame = cv2.flip(frame, 1)
+            for target in self.targets:
+                target.put(frame.copy(), block=block)
+            self.copies += 1 + len(self.targets)
+        self.put_times.append(time.perf_counter() - started)
+
+    def close(self):
+        for target in self.targets:
+            target.close()
+
+
+class Consumer(threading.Thread):
+    """Lee siempre el frame más reciente y aplica 'work' hasta que se detiene"""
+
+    def __init__(self, source, work):
+        super().__init__(daemon=True)
+        self.source = source
+        self.work = work
+        self.frames = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            item = self.source.get_latest(timeout=0.5)
+            if item is None:
+                if self.source.closed:
+                    break
+                continue
+            self.work(item[2])
+            self.frames += 1
+
+
+def measure(name, duration, resolution, faces, labels, cascade):
+    def recognize(frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        detect_faces(cascade, gray, scale_factor=1.1, min_neighbors=4, min_size=(80, 80))
+
+    def preview(frame):
+        cv2.resize(frame, DISPLAY_SIZE, interpolation=cv2.INTER_AREA)
+
+    if name == "un consumidor":
+        frame_buffer = FrameRingBuffer(2)
+        publisher = TimedPublisher(frame_buffer)
+        consumers = [Consumer(frame_buffer, lambda frame: (recognize(frame), preview(frame)))]
+        consumers *= 2  # Vista previa y reconocimiento son el mismo hilo
+    elif name == "colas":
+        buffers = [FrameRingBuffer(2), FrameRingBuffer(2)]
+        publisher = TimedPublisher(*buffers)
+        consumers = [Consumer(buffers[0], preview), Consumer(buffers[1], recognize)]
+    else:
+        bus = FrameBus(2)
+        publisher = TimedPublisher(bus)
+        consumers = [Consumer(bus.subscribe(), preview), Consumer(bus.subscribe(), recognize)]
+
+    source = SlowCameraSource(0.0, fps=30, n_frames=None, size=resolution, samples=faces, labels=labels,
+                              scene_length=300)
+    capture = CaptureWorker(source, publisher)
+    for consumer in set(consumers):
+        consumer.start()
+    capture.start()
+    time.sleep(duration)
+    for consumer in consumers:
+        consumer.running = False
+    capture.stop()
+    for consumer in set(consumers):
+        consumer.join()
+
+    captured = capture.frames_captured
+    put_ms = np.array(publisher.put_times) * 1000
+    preview_frames, recognition_frames = consumers[0].frames, consumers[1].frames
+    return (name, f"{captured / duration:.1f}", f"{preview_frames / duration:.1f}",
+            f"{recognition_frames / duration:.1f}", captured - preview_frames, captured - recognition_frames,
+            f"{publisher.copies / max(captured, 1):.0f}", f"{np.percentile(put_ms, 50):.2f}",
+            f"{np.percentile(put_ms, 99):.2f}", f"{put_ms.max():.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segundos", type=float, default=10.0, help="duración de cada medición")
+    parser.add_argument("--resolucion", type=int, nargs=2, default=[640, 480], metavar=("ANCHO", "ALTO"))
+    args = parser.parse_args()
+
+    faces, labels = synthetic_users(20, 5, seed=5)
+    cascade = cv2.CascadeClassifier(cascade_path())
+    rows = []
+    for name in ("un consumidor", "colas", "bus"):
+        rows.append(measure(name, args.segundos, tuple(args.resolucion), faces, labels, cascade))
+        print(f"✅ {name} medido")
+
+    print()
+    print_table(["modo", "capturados/s", "vista previa/s", "reconocimiento/s", "saltados vista previa",
+                 "saltados reconocimiento", "copias/frame", "put p50 ms", "put p99 ms", "put máx ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la caché de modelos del proceso (model_cache.py).
+
+Prepara una carpeta de datos con usuarios sintéticos, face_model.xml y
+face_model.bin, y mide cuánto tarda en quedar listo un
+FaceRecognitionThread de autenticación con su modelo cargado (lo que
+ocurre cada vez que se pulsa "Iniciar" tras cancelar):
+
+- fría:     primera vez en el proceso (parsea la cascada y lee el modelo)
+- caliente: reinicios siguientes, con los objetos ya cargados
+- tras re-entrenar: el modelo cambió en disco y se recarga solo él
+
+Uso:
+    python benchmarks/bench_model_cache.py --usuarios 10 100 --reinicios 20
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from common import Timer, cascade_path, print_table, synthetic_users
+
+import cv2
+from PyQt5.QtCore import QCoreApplication
+
+from face_matcher import LBPHMatcher
+from face_pipeline import preprocess_face
+from face_storage import FaceStore
+from model_cache import MODEL_CACHE
+
+
+def prepare(workdir, n_users, per_user):
+    faces, labels = synthetic_users(n_users + 1, per_user, seed=n_users)
+    faces = np.array([preprocess_face(face) for face in faces])
+    store = FaceStore(os.path.join(workdir, "faces_samples.dat"), os.path.join(workdir, "faces_index.json"),
+                      os.path.join(workdir, "faces_data.pkl"))
+    for label in range(n_users):
+        store.append_user(f"usuario{label}", faces[labels == label])
+    retrain(workdir, store)
+    return store, faces[labels == n_users]
+
+
+def retrain(workdir, store):
+    faces, labels = store.training_set()
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.setThreshold(100.0)
+    recognizer.train(list(faces), labels)
+    recognizer.save(os.path.join(workdir, "face_model.xml"))
+    LBPHMatcher.from_recognizer(recognizer, dtype='uint8').save(os.path.join(workdir, "face_model.bin"))
+
+
+def start_ms(login, engine):
+    with Timer() as t:
+        thread = login.FaceRecognitionThread("authenticate", engine=engine)
+        thread.load_model()
+    assert thread.model_loaded
+    return t.elapsed * 1000
+
+
+def measure(login, n_users, per_user, engine, restarts):
+    workdir = os.path.join(os.getcwd(), f"{engine}_{n_users}")
+    os.makedirs(workdir)
+    os.chdir(workdir)
+    store, new_user = prepare(workdir, n_users, per_user)
+    MODEL_CACHE.invalidate()
+    cold = start_ms(login, engine)
+    warm = np.median([start_ms(login, engine) for _ in range(restarts)])
+    # Se registra un usuario más: cambian los archivos y se recargan solo ellos
+    store.append_user("nuevo", new_user)
+    retrain(workdir, store)
+    reloaded = start_ms(login, engine)
+    os.chdir("..")
+    return (engine, n_users * per_user, f"{cold:.1f}", f"{warm:.2f}", f"{cold / warm:.0f}x", f"{reloaded:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--muestras", type=int, default=15, help="muestras por usuario")
+    parser.add_argument("--reinicios", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import login
+        login.CASCADE_FILE = cascade_path()
+        # Los mensajes de carga de cada hilo no interesan aquí
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            for n_users in args.usuarios:
+                for engine in ("opencv", "numpy"):
+                    rows.append(measure(login, n_users, args.muestras, engine, args.reinicios))
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+            os.chdir(os.path.dirname(os.path.abspath(__file__)))
+        for n_users in args.usuarios:
+            print(f"✅ {n_users} usuarios medidos")
+
+    print()
+    print_table(["motor", "muestras", "fría ms", "caliente ms", "mejora", "tras re-entrenar ms"], rows)
+    print(f"📦 Caché: {MODEL_CACHE.get_stats()}")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque: carga de face_model.xml frente a face_model.bin.
+
+Para cada tamaño de enrolamiento guarda un modelo LBPH en XML (formato de
+OpenCV), lo convierte al formato binario y mide:
+
+- tamaño de cada archivo
+- xml:   LBPHFaceRecognizer.read() + primera predicción
+- bin:   LBPHMatcher.load() (memmap) + primera predicción
+- que la conversión binario → XML reproduce el archivo original
+
+Uso:
+    python benchmarks/bench_model_load.py --usuarios 10 100 400
+"""
+
+import argparse
+import filecmp
+import os
+import tempfile
+
+import numpy as np
+
+from common import Timer, print_table, synthetic_users
+
+import cv2
+
+from face_matcher import LBPHMatcher, binary_to_xml, xml_to_binary
+from face_pipeline import preprocess_face
+
+
+def measure(n_users, per_user, workdir):
+    faces, labels = synthetic_users(n_users, per_user, seed=n_users)
+    faces = [preprocess_face(face) for face in faces]
+    xml_file = os.path.join(workdir, "face_model.xml")
+    bin_file = os.path.join(workdir, "face_model.bin")
+    roundtrip_file = os.path.join(workdir, "roundtrip.xml")
+
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.setThreshold(100.0)
+    recognizer.train(faces, labels)
+    recognizer.save(xml_file)
+    del recognizer
+    xml_to_binary(xml_file, bin_file)
+    probe = faces[0]
+
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    with Timer() as t_xml:
+        recognizer.read(xml_file)
+    with Timer() as t_xml_predict:
+        expected = recognizer.predict(probe)
+
+    with Timer() as t_bin:
+        matcher = LBPHMatcher.load(bin_file)
+    with Timer() as t_bin_predict:
+        result = matcher.predict(probe)
+
+    binary_to_xml(bin_file, roundtrip_file)
+    identical = filecmp.cmp(xml_file, roundtrip_file, shallow=False)
+    assert expected[0] == result[0] and np.isclose(expected[1], result[1], atol=1e-4)
+
+    return (n_users * per_user, os.path.getsize(xml_file), os.path.getsize(bin_file), t_xml.elapsed,
+            t_xml_predict.elapsed, t_bin.elapsed, t_bin_predict.elapsed, identical)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[10, 100, 400])
+    parser.add_argument("--muestras", type=int, default=15, help="muestras por usuario")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_users in args.usuarios:
+            samples, xml_size, bin_size, xml_load, xml_predict, bin_load, bin_predict, identical = measure(
+                n_users, args.muestras, workdir)
+            rows.append((samples, f"{xml_size / 2 ** 20:.1f}", f"{bin_size / 2 ** 20:.1f}",
+                         f"{xml_load * 1000:.0f}", f"{xml_predict * 1000:.1f}",
+                         f"{bin_load * 1000:.2f}", f"{bin_predict * 1000:.1f}",
+                         f"{(xml_load + xml_predict) / (bin_load + bin_predict):.0f}x",
+                         "sí" if identical else "no"))
+            print(f"✅ {n_users} usuarios medidos")
+
+    print()
+    print_table(["muestras", "XML MiB", "bin MiB", "leer xml ms", "1a pred. ms", "abrir bin ms", "1a pred. ms",
+                 "mejora", "ida y vuelta"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la autenticación con varias caras por frame.
+
+Genera frames sintéticos de 640×480 con 1, 2, 4 y 8 personas registradas
+frente al kiosco (escenas de 1 s a 30 FPS) y mide, por frame:
+
+- detección:   detect_faces sobre el frame completo (igual para ambos modos)
+- cara a cara: preprocess_face + LBPHMatcher.predict por cada cara
+- lote:        preprocess de todas las caras + una sola LBPHMatcher.search
+
+Con el lote, cada cara acumula su propia evidencia (FaceTracks con
+EvidenceAccumulator); se reporta cuántas de las personas de cada escena
+quedan aceptadas con su etiqueta y cuántas aceptaciones son de otra.
+
+Uso:
+    python benchmarks/bench_multi_face.py --caras 1 2 4 8 --escenas 6
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from common import cascade_path, print_table, synthetic_users
+
+import cv2
+
+from face_matcher import LBPHMatcher
+from face_pipeline import EvidenceAccumulator, FaceTracks, detect_faces, preprocess_face
+from frame_sources import SyntheticSource
+
+SCENE_LENGTH = 30
+FPS = 30.0
+
+
+def truth_label(box, truth_boxes, truth_labels):
+    """Etiqueta de la cara pegada que contiene el centro de 'box' (-1 si ninguna)"""
+    x, y, w, h = box
+    cx, cy = x + w / 2, y + h / 2
+    for (tx, ty, tw, th), label in zip(truth_boxes, truth_labels):
+        if tx <= cx < tx + tw and ty <= cy < ty + th:
+            return int(label)
+    return -1
+
+
+def measure(cascade, matcher, faces, labels, n_faces, n_scenes, seed):
+    source = SyntheticSource(n_scenes * SCENE_LENGTH, size=(640, 480), faces_per_frame=n_faces,
+                             face_sizes=(90, 120), samples=faces, labels=labels, scene_length=SCENE_LENGTH,
+                             seed=seed)
+    face_tracks = FaceTracks(EvidenceAccumulator())
+    detect_ms, single_ms, batch_ms, detected = [], [], [], []
+    accepted, wrong, present = set(), 0, 0  # accepted: (escena, etiqueta)
+    decided = set()  # Pistas de la escena que ya fueron aceptadas
+
+    for index in range(n_scenes * SCENE_LENGTH):
+        ret, frame = source.read()
+        if not ret:
+            break
+        if index % SCENE_LENGTH == 0:
+            face_tracks.reset()
+            present += len(set(source.last_labels.tolist()))
+            decided.clear()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        started = time.perf_counter()
+        boxes = detect_faces(cascade, gray, scale_factor=1.1, min_neighbors=4, min_size=(80, 80))
+        detect_ms.append((time.perf_counter() - started) * 1000)
+        detected.append(len(boxes))
+        if len(boxes) == 0:
+            continue
+
+        started = time.perf_counter()
+        for (x, y, w, h) in boxes:
+            matcher.predict(preprocess_face(gray[y:y+h, x:x+w]))
+        single_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        batch = np.array([preprocess_face(gray[y:y+h, x:x+w]) for (x, y, w, h) in boxes])
+        top_labels, top_distances = matcher.search(batch, k=1)
+        batch_ms.append((time.perf_counter() - started) * 1000)
+
+        frame_time = index / FPS
+        rules = face_tracks.assign(boxes, frame_time)
+        for box, label, distance, rule in zip(boxes, top_labels[:, 0], top_distances[:, 0], rules):
+            if id(rule) in decided:
+                continue
+            decision, label, _ = rule.observe(int(label), float(distance), frame_time)
+            if decision != 'accept':
+                continue
+            decided.add(id(rule))
+            # Una persona cuenta una vez por escena aunque su pista se haya partido
+            if label == truth_label(box, source.last_boxes, source.last_labels):
+                accepted.add((index // SCENE_LENGTH, label))
+            else:
+                wrong += 1
+
+    return (np.mean(detected), np.median(detect_ms), np.median(single_ms), np.median(batch_ms),
+            len(accepted) / max(present, 1), wrong)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--caras", type=int, nargs="+", default=[1, 2, 4, 8], help="personas por frame")
+    parser.add_argument("--usuarios", type=int, default=30, help="usuarios registrados")
+    parser.add_argument("--escenas", type=int, default=6, help="escenas de 1 s por cantidad de caras")
+    args = parser.parse_args()
+
+    faces, labels = synthetic_users(args.usuarios, 15, seed=3, texture_sigma=1, texture_strength=80)
+    matcher = LBPHMatcher(dtype='uint8')
+    matcher.train(np.array([preprocess_face(face) for face in faces]), labels)
+    cascade = cv2.CascadeClassifier(cascade_path())
+
+    rows, base = [], None
+    for n_faces in args.caras:
+        detected, detect_ms, single_ms, batch_ms, people, wrong = measure(
+            cascade, matcher, faces, labels, n_faces, args.escenas, seed=n_faces)
+        frame_ms = detect_ms + batch_ms
+        base = base or frame_ms
+        rows.append((n_faces, f"{detected:.1f}", f"{detect_ms:.1f}", f"{single_ms:.2f}", f"{batch_ms:.2f}",
+                     f"{batch_ms / max(detected, 1):.2f}", f"{frame_ms:.1f}", f"{frame_ms / base:.2f}x",
+                     f"{people * 100:.0f}%", wrong))
+        print(f"✅ {n_faces} caras por frame medidas")
+
+    print()
+    print_table(["caras", "detectadas", "detección ms", "cara a cara ms", "lote ms", "lote ms/cara",
+                 "frame ms", "costo vs 1 cara", "personas aceptadas", "aceptaciones erróneas"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la detección en paralelo (face_detectors.ParallelDetector)
+para cámaras de alta resolución.
+
+Detecta caras con la cascada Haar sobre frames sintéticos de --ancho×--alto
+(por defecto 4K, como la cámara de la estación de inspección) con los
+parámetros de la interfaz (scale_factor 1.1, min_neighbors 4, min_size 80):
+
+- serie:      una llamada a detectMultiScale con cv2.setNumThreads(núcleos)
+              (el paralelismo interno de OpenCV, por filas de cada nivel)
+- bandas N:   la pirámide repartida en N bandas de costo parecido, una por
+              hilo, con OpenCV a núcleos // N hilos
+
+Para cada cantidad de --hilos (por defecto 1..núcleos) y de --solape
+reporta ms por frame, aceleración respecto a serie, recall contra la
+posición conocida de cada cara (IoU >= 0.4) y falsos positivos. La
+aceleración ideal es el costo de la pirámide completa dividido por el de
+la banda más cara (área de imagen reducida sumada por nivel): el límite
+con un núcleo libre por hilo. Sin núcleos libres las bandas no pueden
+acelerar y la tabla muestra el costo extra del reparto y del solape.
+
+Uso:
+    python benchmarks/bench_parallel_detection.py --hilos 1 2 4 8 --frames 5
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from common import match_detections, print_table, synthetic_frames
+
+import cv2
+
+from face_detectors import CascadeDetector, ParallelDetector, available_cores
+from face_pipeline import detect_faces
+
+DETECT_ARGS = {'scale_factor': 1.1, 'min_neighbors': 4, 'min_size': (80, 80)}
+
+
+def pyramid_cost(detector, shape, min_size, max_size):
+    """Área de imagen reducida sumada sobre los niveles con ventana entre min_size y max_size"""
+    height, width = shape[:2]
+    cost, factor = 0.0, 1.0
+    while True:
+        side = int(round(detector.window[0] * factor))
+        if side > min(max_size[0], width, height):
+            return cost
+        if side >= min_size[0]:
+            cost += (width / factor) * (height / factor)
+        factor *= DETECT_ARGS['scale_factor']
+
+
+def measure(detector, grays, total_faces):
+    detect_faces(detector, grays[0][0], **DETECT_ARGS)  # Calentamiento (hilos y cascadas por hilo)
+    times, true_positives, false_positives = [], 0, 0
+    for gray, truth in grays:
+        started = time.perf_counter()
+        boxes = detect_faces(detector, gray, **DETECT_ARGS)
+        times.append((time.perf_counter() - started) * 1000)
+        tp, fp = match_detections(boxes, truth)
+        true_positives += tp
+        false_positives += fp
+    return np.array(times), true_positives / total_faces, false_positives
+
+
+def main():
+    cores = available_cores()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, nargs="+", default=sorted({1, 2, 4, cores} - {0}))
+    parser.add_argument("--solape", type=int, nargs="+", default=[1, 0], help="niveles de solape entre bandas")
+    parser.add_argument("--frames", type=int, default=5)
+    parser.add_argument("--ancho", type=int, default=3840)
+    parser.add_argument("--alto", type=int, default=2160)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.frames, size=(args.ancho, args.alto), faces_per_frame=2,
+                              face_sizes=(100, args.alto // 3), seed=2)
+    grays = [(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), truth) for frame, truth in frames]
+    total_faces = sum(len(truth) for _, truth in grays)
+
+    cv2.setNumThreads(cores)
+    times, recall, false_positives = measure(CascadeDetector().load(), grays, total_faces)
+    base = np.median(times)
+    rows = [("serie", "-", 1, cv2.getNumThreads(), f"{base:.0f}", f"{np.percentile(times, 95):.0f}", "1.00x",
+             "1.00x", f"{recall:.1%}", false_positives)]
+    print("✅ serie medida")
+
+    for overlap in args.solape:
+        for workers in args.hilos:
+            detector = ParallelDetector(CascadeDetector(), workers, overlap_levels=overlap).load()
+            shape = grays[0][0].shape
+            full = (shape[1], shape[0])
+            bands = [(DETECT_ARGS['min_size'], full)]
+            if workers > 1:
+                bands = detector.pyramid_bands(shape, DETECT_ARGS['scale_factor'], DETECT_ARGS['min_size'])
+            ideal = pyramid_cost(detector, shape, DETECT_ARGS['min_size'], full) / max(
+                pyramid_cost(detector, shape, band_min, band_max) for band_min, band_max in bands)
+            times, recall, false_positives = measure(detector, grays, total_faces)
+            rows.append((f"bandas {workers}", overlap, len(bands), cv2.getNumThreads(), f"{np.median(times):.0f}",
+                         f"{np.percentile(times, 95):.0f}", f"{base / np.median(times):.2f}x", f"{ideal:.2f}x",
+                         f"{recall:.1%}", false_positives))
+            print(f"✅ {workers} hilos, solape {overlap} medidos")
+
+    print()
+    print(f"🖥️ Núcleos disponibles: {cores}; {len(grays)} frames de {args.ancho}×{args.alto}, {total_faces} caras")
+    print_table(["modo", "solape", "bandas", "hilos OpenCV", "ms p50", "ms p95", "aceleración",
+                 "aceleración ideal", "recall", "falsos pos."], rows)
+
+
+if __name__ == "__main__":
+    main()
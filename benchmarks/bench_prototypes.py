@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la compactación por prototipos (k-medoides por usuario).
+
+Entrena cv2.face.LBPHFaceRecognizer con todas las muestras de cada usuario
+y con solo k prototipos (face_matcher.select_prototypes), y compara:
+
+- tamaño de face_model.xml
+- latencia de predict()
+- reconocimiento sobre caras nuevas: etiqueta correcta (identificadas) y
+  además bajo el umbral de login.py (aceptadas)
+- coincidencia de la decisión con el modelo sin compactar
+
+Uso:
+    python benchmarks/bench_prototypes.py --usuarios 50 --muestras 30 --k 1 3 5 10
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from common import Timer, enrollment_stream, print_table, synthetic_identities
+
+import cv2
+
+from face_matcher import select_prototypes
+from face_pipeline import preprocess_face
+from frame_sources import jitter_face
+
+THRESHOLD = 80
+
+
+def evaluate(faces, labels, probes, probe_labels, workdir):
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.train(list(faces), labels)
+    model_file = os.path.join(workdir, "model.xml")
+    recognizer.save(model_file)
+    size = os.path.getsize(model_file)
+
+    with Timer() as t_predict:
+        predictions = [recognizer.predict(probe) for probe in probes]
+    predicted = np.array([label for label, _ in predictions])
+    confidences = np.array([confidence for _, confidence in predictions])
+    decisions = np.where(confidences < THRESHOLD, predicted, -1)
+    return {
+        'size': size,
+        'predict_ms': t_predict.elapsed / len(probes) * 1000,
+        'identified': (predicted == probe_labels).mean(),
+        'accepted': (decisions == probe_labels).mean(),
+        'decisions': decisions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, default=50)
+    parser.add_argument("--muestras", type=int, default=30, help="muestras por usuario")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="prototipos por usuario")
+    parser.add_argument("--pruebas", type=int, default=10, help="caras de prueba por usuario")
+    args = parser.parse_args()
+
+    # Registro: muestras consecutivas de la cámara; pruebas: caras de otra sesión
+    rng = np.random.default_rng(1)
+    identities = synthetic_identities(args.usuarios, seed=1)
+    faces = np.array([preprocess_face(roi) for identity in identities
+                      for roi in enrollment_stream(identity, args.muestras, rng)])
+    labels = np.repeat(np.arange(args.usuarios, dtype=np.int32), args.muestras)
+    probes = np.array([preprocess_face(jitter_face(identity, rng, strength=0.6))
+                       for identity in identities for _ in range(args.pruebas)])
+    probe_labels = np.repeat(np.arange(args.usuarios, dtype=np.int32), args.pruebas)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        full = evaluate(faces, labels, probes, probe_labels, workdir)
+        rows.append(("todas", len(faces), f"{full['size'] / 1024:.0f}", f"{full['predict_ms']:.2f}", "1.0x",
+                     f"{full['identified'] * 100:.1f}%", f"{full['accepted'] * 100:.1f}%", "100%", "-"))
+
+        for k in args.k:
+            with Timer() as t_select:
+                indices = np.concatenate([
+                    start + select_prototypes(faces[start:start + args.muestras], k)
+                    for start in range(0, len(faces), args.muestras)
+                ])
+            result = evaluate(faces[indices], labels[indices], probes, probe_labels, workdir)
+            rows.append((f"k={k}", len(indices), f"{result['size'] / 1024:.0f}", f"{result['predict_ms']:.2f}",
+                         f"{full['predict_ms'] / result['predict_ms']:.1f}x",
+                         f"{result['identified'] * 100:.1f}%", f"{result['accepted'] * 100:.1f}%",
+                         f"{(result['decisions'] == full['decisions']).mean() * 100:.0f}%",
+                         f"{t_select.elapsed:.2f}"))
+            print(f"✅ k={k} medido")
+
+    print()
+    print_table(["modelo", "muestras", "XML KiB", "predict ms", "mejora", "identificadas", "aceptadas",
+                 "misma decisión", "selección s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark del almacenamiento compacto de descriptores (LBPHMatcher dtype).
+
+Para cada tamaño de enrolamiento guarda los mismos histogramas en float32,
+float16 y uint8 y, buscando directamente sobre la forma compacta, mide:
+
+- bytes por muestra y memoria total de los descriptores
+- latencia de búsqueda por cara
+- error de la distancia chi-cuadrado frente a float32 (máximo, medio y
+  relativo máximo, sobre todas las parejas consulta × muestra con
+  distancia > 1)
+- misma etiqueta top-1 y misma decisión con el umbral de login.py (< 80)
+
+Uso:
+    python benchmarks/bench_quantization.py --usuarios 50 200 --consultas 32
+"""
+
+import argparse
+
+import numpy as np
+
+from common import Timer, print_table, synthetic_users
+
+from face_matcher import DESCRIPTOR_DTYPES, LBPHMatcher
+from face_pipeline import preprocess_face
+
+THRESHOLD = 80
+
+
+def measure(n_users, per_user, n_queries):
+    faces, labels = synthetic_users(n_users, per_user, seed=n_users)
+    reference = LBPHMatcher()
+    reference.train(np.array([preprocess_face(face) for face in faces]), labels)
+    probes, _ = synthetic_users(n_users, 1, seed=n_users)
+    queries = reference.compute_histograms(np.array([preprocess_face(face) for face in probes[:n_queries]]))
+    expected = reference.distances(queries)
+
+    rows = []
+    for dtype in DESCRIPTOR_DTYPES:
+        matcher = LBPHMatcher(dtype=dtype)
+        matcher.set_histograms(reference.histograms, labels)
+        with Timer() as t_search:
+            top_labels, top_distances = matcher.search_histograms(queries)
+        if dtype == 'float32':
+            baseline_labels, baseline_distances, baseline_ms = top_labels, top_distances, t_search.elapsed
+        distances = matcher.distances(queries)
+        error = np.abs(distances - expected)
+        relative = error[expected > 1.0] / expected[expected > 1.0]  # Sin las muestras casi idénticas
+        decisions = np.where(top_distances[:, 0] < THRESHOLD, top_labels[:, 0], -1)
+        baseline_decisions = np.where(baseline_distances[:, 0] < THRESHOLD, baseline_labels[:, 0], -1)
+        rows.append((len(matcher), dtype, matcher.nbytes // len(matcher), f"{matcher.nbytes / 2 ** 20:.1f}",
+                     f"{t_search.elapsed / len(queries) * 1000:.2f}", f"{baseline_ms / t_search.elapsed:.1f}x",
+                     f"{error.max():.1e}", f"{error.mean():.1e}", f"{relative.max():.1e}",
+                     f"{(top_labels[:, 0] == baseline_labels[:, 0]).mean() * 100:.0f}%",
+                     f"{(decisions == baseline_decisions).mean() * 100:.0f}%"))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--muestras", type=int, default=15, help="muestras por usuario")
+    parser.add_argument("--consultas", type=int, default=32)
+    args = parser.parse_args()
+
+    rows = []
+    for n_users in args.usuarios:
+        rows.extend(measure(n_users, args.muestras, args.consultas))
+        print(f"✅ {n_users} usuarios medidos")
+
+    print()
+    print_table(["muestras", "tipo", "bytes/muestra", "MiB", "ms/cara", "mejora", "Δ máx", "Δ media",
+                 "Δ rel. máx", "misma etiqueta", "decisión"], rows)
+
+
+if __name__ == "__main__":
+    main()
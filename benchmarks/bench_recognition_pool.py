@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark del reconocimiento en procesos (recognition_pool.py) frente al
+reconocimiento en un hilo del proceso de la interfaz.
+
+Una cámara sintética a 30 FPS (640×480, una persona registrada) alimenta
+durante --segundos un FrameRingBuffer, como en el kiosco. Se compara:
+
+- hilo:        un hilo toma el frame más reciente y corre detección,
+               preprocesado y LBPHMatcher.search (lo que hace hoy
+               FaceRecognitionThread)
+- procesos N:  el hilo solo copia el frame a la memoria compartida de un
+               RecognitionPool de N procesos (descartándolo si todos están
+               ocupados) y recoge cajas y etiquetas
+
+Mientras tanto otro hilo simula la interfaz y el worker Modbus: cada 5 ms
+ejecuta ~0.5 ms de Python puro. Se reporta frames analizados por segundo,
+latencia captura → resultado y el retraso de los ticks de la "interfaz"
+(lo que nota el usuario como tirones).
+
+Uso:
+    python benchmarks/bench_recognition_pool.py --procesos 1 2 --segundos 10
+"""
+
+import argparse
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from common import SlowCameraSource, cascade_path, print_table, synthetic_users
+
+import cv2
+
+from face_matcher import LBPHMatcher
+from face_pipeline import CaptureWorker, FrameRingBuffer, detect_faces, preprocess_face
+from recognition_pool import RecognitionPool
+
+DETECT_ARGS = {'scale_factor': 1.1, 'min_neighbors': 4, 'min_size': (80, 80)}
+
+
+class InterfaceLoad(threading.Thread):
+    """Ticks periódicos de Python puro; mide cuánto se atrasan respecto al plan"""
+
+    def __init__(self, period=0.005, work=0.0005):
+        super().__init__(daemon=True)
+        self.period = period
+        self.work = work
+        self.delays = []
+        self.running = True
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while self.running:
+            now = time.perf_counter()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                now = time.perf_counter()
+            self.delays.append(now - next_tick)
+            deadline = now + self.work
+            while time.perf_counter() < deadline:
+                pass
+            next_tick = max(next_tick + self.period, now)
+
+
+def analyze_in_thread(frame_buffer, cascade, matcher, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        item = frame_buffer.get_latest(timeout=0.5)
+        if item is None:
+            continue
+        _, captured_at, frame = item
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        boxes = detect_faces(cascade, gray, **DETECT_ARGS)
+        if len(boxes):
+            matcher.search(np.array([preprocess_face(gray[y:y+h, x:x+w]) for (x, y, w, h) in boxes]))
+        latencies.append(time.monotonic() - captured_at)
+    return latencies
+
+
+def analyze_in_pool(frame_buffer, pool, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        item = frame_buffer.get_latest(timeout=0.5)
+        if item is not None:
+            # Sin ranuras libres el frame se descarta, como en FaceRecognitionThread
+            _, captured_at, frame = item
+            pool.submit(frame, captured_at)
+        while True:
+            result = pool.get_result(timeout=0)
+            if result is None:
+                break
+            latencies.append(time.monotonic() - result.timestamp)
+    while pool.pending:
+        result = pool.get_result(timeout=2.0)
+        if result is None:
+            break
+        latencies.append(time.monotonic() - result.timestamp)
+    return latencies
+
+
+def measure(name, analyze, faces, labels, duration):
+    source = SlowCameraSource(0.0, fps=30, n_frames=None, samples=faces, labels=labels, scene_length=300)
+    frame_buffer = FrameRingBuffer(2)
+    capture = CaptureWorker(source, frame_buffer)
+    load = InterfaceLoad()
+    capture.start()
+    load.start()
+    latencies = analyze(frame_buffer, duration)
+    load.running = False
+    capture.stop()
+    load.join()
+
+    latencies = np.array(latencies) * 1000
+    delays = np.array(load.delays) * 1000
+    return (name, f"{len(latencies) / duration:.1f}", f"{np.percentile(latencies, 50):.0f}",
+            f"{np.percentile(latencies, 95):.0f}", f"{np.percentile(delays, 50):.2f}",
+            f"{np.percentile(delays, 99):.1f}", f"{len(delays) / duration:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--procesos", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--usuarios", type=int, default=100, help="usuarios registrados")
+    parser.add_argument("--segundos", type=float, default=10.0, help="duración de cada medición")
+    args = parser.parse_args()
+
+    faces, labels = synthetic_users(args.usuarios, 15, seed=5, texture_sigma=1, texture_strength=80)
+    matcher = LBPHMatcher(dtype='uint8')
+    matcher.train(np.array([preprocess_face(face) for face in faces]), labels)
+    cascade = cv2.CascadeClassifier(cascade_path())
+    print(f"📦 Mensaje por frame en la cola: {len(pickle.dumps((0, 0, (480, 640, 3))))} bytes "
+          f"(el frame ocupa {480 * 640 * 3} bytes en memoria compartida)")
+
+    rows = [measure("hilo", lambda buffer, duration: analyze_in_thread(buffer, cascade, matcher, duration),
+                    faces, labels, args.segundos)]
+    print("✅ hilo medido")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        model_file = os.path.join(workdir, "face_model.bin")
+        matcher.save(model_file)
+        for processes in args.procesos:
+            pool = RecognitionPool(processes, max_frame_shape=(480, 640, 3), cascade_file=cascade_path(),
+                                   model_binary_file=model_file, ann_nprobe=0)
+            pool.start()
+            # Se espera a que los procesos terminen de importar y cargar el modelo
+            pool.submit(np.zeros((480, 640, 3), dtype=np.uint8))
+            pool.get_result(timeout=60.0)
+            rows.append(measure(f"procesos {processes}",
+                                lambda buffer, duration: analyze_in_pool(buffer, pool, duration),
+                                faces, labels, args.segundos))
+            print(f"✅ procesos {processes} medido: {pool.get_stats()}")
+            pool.close()
+
+    print()
+    print(f"🖥️ Núcleos disponibles: {len(os.sched_getaffinity(0))}")
+    print_table(["modo", "frames/s", "latencia p50 ms", "latencia p95 ms", "retraso interfaz p50 ms",
+                 "retraso interfaz p99 ms", "ticks interfaz/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
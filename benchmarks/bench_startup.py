@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark del arranque de la autenticación: carga del modelo y apertura
+de la cámara en secuencia frente a en paralelo.
+
+Simula una cámara a 30 FPS que tarda --apertura segundos en abrir
+(VideoCapture(0) tarda ~1 s en el kiosco) y mide, desde el clic en "Iniciar":
+
+- interfaz bloqueada: tiempo dentro del hilo de la interfaz
+- primer frame y primera predicción
+- listo: cámara abierta y modelo cargado (señal ready)
+
+"antes" carga el modelo en el hilo de la interfaz y luego abre la cámara;
+"después" lo carga en segundo plano mientras se abre la cámara. La caché
+de modelos se vacía en cada medición para medir la carga en frío.
+
+Uso:
+    python benchmarks/bench_startup.py --usuarios 10 100 --apertura 1.0
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from common import SlowCameraSource, Timer, cascade_path, print_table, synthetic_users
+
+import cv2
+from PyQt5.QtCore import QCoreApplication
+
+from face_matcher import LBPHMatcher
+from face_pipeline import preprocess_face
+from face_storage import FaceStore
+from model_cache import MODEL_CACHE
+
+
+def prepare(workdir, n_users, per_user):
+    faces, labels = synthetic_users(n_users, per_user, seed=n_users)
+    store = FaceStore(os.path.join(workdir, "faces_samples.dat"), os.path.join(workdir, "faces_index.json"),
+                      os.path.join(workdir, "faces_data.pkl"))
+    processed = np.array([preprocess_face(face) for face in faces])
+    for label in range(n_users):
+        store.append_user(f"usuario{label}", processed[labels == label])
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.setThreshold(100.0)
+    recognizer.train(list(processed), labels)
+    recognizer.save(os.path.join(workdir, "face_model.xml"))
+    LBPHMatcher.from_recognizer(recognizer, dtype='uint8').save(os.path.join(workdir, "face_model.bin"))
+    return np.array(faces), labels
+
+
+def slow_camera(faces, labels, delay):
+    return lambda: SlowCameraSource(delay, n_frames=600, samples=faces, labels=labels, scene_length=600)
+
+
+def session(login, engine, source, overlapped):
+    MODEL_CACHE.invalidate()
+    with Timer() as t_gui:
+        thread = login.FaceRecognitionThread("authenticate", source=source, engine=engine)
+        thread.face_detector = login.load_detector('haar', login.CASCADE_FILE)
+        thread.motion_gate.threshold = 0.0
+        if not overlapped:
+            thread.load_model()
+    thread.run()  # Sin start(): el hilo de trabajo es el actual
+    events = thread.metrics.events
+    return t_gui.elapsed, events.get('first_frame'), events.get('first_prediction'), events.get('ready')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--usuarios", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--muestras", type=int, default=15, help="muestras por usuario")
+    parser.add_argument("--apertura", type=float, default=1.0, help="segundos que tarda en abrir la cámara")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    rows = []
+    root = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import login
+        login.CASCADE_FILE = cascade_path()
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            for n_users in args.usuarios:
+                data_dir = os.path.join(workdir, str(n_users))
+                os.makedirs(data_dir)
+                os.chdir(data_dir)
+                faces, labels = prepare(data_dir, n_users, args.muestras)
+                for engine in ("opencv", "numpy"):
+                    results = {}
+                    for name, overlapped in (("antes", False), ("después", True)):
+                        source = slow_camera(faces, labels, args.apertura)
+                        results[name] = session(login, engine, source, overlapped)
+                    for name, (gui, first_frame, first_prediction, ready) in results.items():
+                        rows.append((engine, n_users * args.muestras, name, f"{gui * 1000:.0f}",
+                                     f"{first_frame:.2f}", f"{first_prediction:.2f}", f"{ready:.2f}"))
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+            os.chdir(root)
+
+    print()
+    print_table(["motor", "muestras", "arranque", "interfaz bloqueada ms", "primer frame s",
+                 "primera predicción s", "listo s"], rows)
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Utilidades compartidas por los benchmarks del sistema de reconocimiento.
+
+Los benchmarks se ejecutan desde la raíz del proyecto, por ejemplo:
+
+    python benchmarks/bench_enrollment.py
+
+y generan usuarios sintéticos a partir de las muestras guardadas en el
+almacén (faces_samples.dat / faces_data.pkl) para no depender de una cámara.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import cv2
+
+from face_storage import FaceStore, SAMPLE_SHAPE
+from frame_sources import SyntheticSource, jitter_face, warp_face
+
+
+def load_base_faces(data_dir=ROOT_DIR):
+    """Carga las muestras reales del almacén como base para datos sintéticos"""
+    store = FaceStore(
+        os.path.join(data_dir, "faces_samples.dat"),
+        os.path.join(data_dir, "faces_index.json"),
+        os.path.join(data_dir, "faces_data.pkl"),
+    )
+    if not store.load_index() or store.count == 0:
+        raise SystemExit("❌ No hay muestras guardadas para generar datos sintéticos")
+    return np.array(store.samples()), store.labels_array()
+
+
+def synthetic_identities(n_users, seed=0, base_faces=None, texture_sigma=6, texture_strength=40):
+    """Genera n_users caras de identidades sintéticas distintas.
+
+    Cada identidad parte de una muestra base distinta mezclada con una
+    textura propia, de modo que las identidades se distinguen entre sí.
+    Con texture_sigma pequeño la textura tiene detalle fino, que LBPH
+    separa mucho mejor (útil para medir falsas aceptaciones).
+    """
+    rng = np.random.default_rng(seed)
+    if base_faces is None:
+        base_faces, _ = load_base_faces()
+
+    identities = np.empty((n_users,) + SAMPLE_SHAPE, dtype=np.uint8)
+    for user in range(n_users):
+        base = base_faces[rng.integers(len(base_faces))].astype(np.float32)
+        texture = cv2.GaussianBlur(rng.normal(0, texture_strength, SAMPLE_SHAPE).astype(np.float32), (0, 0),
+                                   texture_sigma)
+        identities[user] = np.clip(base + texture, 0, 255).astype(np.uint8)
+    return identities
+
+
+def synthetic_users(n_users, per_user, seed=0, base_faces=None, **texture):
+    """Genera n_users identidades sintéticas con per_user muestras cada una.
+
+    texture se pasa a synthetic_identities (texture_sigma, texture_strength).
+    Devuelve (faces N×100×100 uint8, labels N int32).
+    """
+    identities = synthetic_identities(n_users, seed, base_faces, **texture)
+    rng = np.random.default_rng(seed + 1)
+
+    faces = np.empty((n_users * per_user,) + SAMPLE_SHAPE, dtype=np.uint8)
+    labels = np.repeat(np.arange(n_users, dtype=np.int32), per_user)
+    for user, identity in enumerate(identities):
+        for i in range(per_user):
+            faces[user * per_user + i] = jitter_face(identity, rng)
+    return faces, labels
+
+
+def enrollment_stream(identity, n_frames, rng, blur_rate=0.15, exposure_rate=0.05):
+    """Frames consecutivos de una persona frente a la cámara (recortes en bruto)"""
+    angle, scale, tx, ty = 0.0, 1.0, 0.0, 0.0
+    for _ in range(n_frames):
+        # Pose con variación lenta (paseo aleatorio acotado)
+        angle = np.clip(angle + rng.normal(0, 0.4), -10, 10)
+        scale = np.clip(scale + rng.normal(0, 0.004), 0.92, 1.08)
+        tx = np.clip(tx + rng.normal(0, 0.3), -5, 5)
+        ty = np.clip(ty + rng.normal(0, 0.3), -5, 5)
+        frame = warp_face(identity, angle, scale, tx, ty).astype(np.float32)
+        frame += rng.normal(0, 3, frame.shape)
+
+        if rng.random() < blur_rate:
+            frame = cv2.GaussianBlur(frame, (0, 0), rng.uniform(1.5, 3.0))
+        if rng.random() < exposure_rate:
+            frame = frame * rng.uniform(0.2, 0.35)
+        yield np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def synthetic_frames(n_frames, size=(1920, 1080), faces_per_frame=1, face_sizes=(160, 420),
+                     seed=0, base_faces=None):
+    """Genera frames BGR con caras pegadas en posiciones conocidas.
+
+    Devuelve una lista de (frame, boxes) donde boxes es la verdad de
+    referencia N×4 (x, y, w, h) para medir recall de la detección.
+    """
+    if base_faces is None:
+        base_faces, _ = load_base_faces()
+    source = SyntheticSource(n_frames, size=size, faces_per_frame=faces_per_frame, face_sizes=face_sizes,
+                             samples=base_faces, scene_length=1, seed=seed)
+    frames = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            return frames
+        frames.append((frame, source.last_boxes))
+
+
+class SlowCameraSource(SyntheticSource):
+    """Fuente sintética en vivo a 'fps' que tarda 'open_delay' segundos en abrir, como una cámara real"""
+
+    live = True
+
+    def __init__(self, open_delay=1.0, fps=30, **kwargs):
+        time.sleep(open_delay)
+        super().__init__(**kwargs)
+        self.period = 1.0 / fps
+
+    def read(self):
+        time.sleep(self.period)
+        return super().read()
+
+
+def box_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def match_detections(detected, truth, min_iou=0.4):
+    """Cuenta verdaderos positivos y falsos positivos contra la verdad de referencia"""
+    matched = set()
+    true_positives = 0
+    for box in detected:
+        best = max(range(len(truth)), key=lambda i: box_iou(box, truth[i]), default=None)
+        if best is not None and best not in matched and box_iou(box, truth[best]) >= min_iou:
+            matched.add(best)
+            true_positives += 1
+    return true_positives, len(detected) - true_positives
+
+
+def cascade_path():
+    """Cascada Haar incluida en el repositorio"""
+    return os.path.join(ROOT_DIR, "haarcascade_frontalface_default.xml")
+
+
+class Timer:
+    """Cronómetro simple basado en perf_counter"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(v).rjust(w) for v, w in zip(row, widths)))
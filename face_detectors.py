@@ -0,0 +1,438 @@
+"""
+Detectores de caras intercambiables
+Factory I/O Controller System
+
+Todos los detectores tienen la misma interfaz que cv2.CascadeClassifier
+(detectMultiScale y empty), así que detect_faces, FaceTracker y
+RecognitionPool los usan sin cambios. needs_color indica si el detector
+espera el frame BGR en vez de la escala de grises (detector_image elige):
+
+- haar:      cascada Haar incluida en el repositorio
+- lbp:       cascada LBP de OpenCV (más rápida, menos precisa)
+- lbp+haar:  la cascada LBP propone candidatos y la Haar los confirma
+             buscando solo alrededor de cada uno
+- dnn:       detector SSD ResNet-10 de OpenCV DNN (res10_300x300)
+
+Con cámaras de alta resolución ParallelDetector reparte los niveles de la
+pirámide de una cascada entre varios hilos (workers en load_detector).
+
+Los archivos se buscan junto a este módulo. Los que no vienen con el
+repositorio (cascada LBP y modelo DNN) hay que copiarlos ahí; mientras
+falten, detector_availability() lo informa y load_detector() avisa y usa
+Haar (o falla con strict=True). Cascadas y red se cargan con
+model_cache.MODEL_CACHE.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from model_cache import MODEL_CACHE
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HAAR_CASCADE_FILE = os.path.join(MODULE_DIR, 'haarcascade_frontalface_default.xml')
+if not os.path.exists(HAAR_CASCADE_FILE) and hasattr(cv2, 'data'):
+    HAAR_CASCADE_FILE = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+
+# opencv/data/lbpcascades/lbpcascade_frontalface_improved.xml
+LBP_CASCADE_FILE = os.path.join(MODULE_DIR, 'lbpcascade_frontalface_improved.xml')
+
+# opencv/samples/dnn/face_detector (deploy.prototxt y pesos Caffe)
+DNN_MODEL_FILE = os.path.join(MODULE_DIR, 'res10_300x300_ssd_iter_140000.caffemodel')
+DNN_CONFIG_FILE = os.path.join(MODULE_DIR, 'deploy.prototxt')
+
+DETECTOR_NAMES = ('haar', 'lbp', 'lbp+haar', 'dnn')
+
+
+class CascadeDetector:
+    """Cascada de OpenCV (Haar o LBP) cargada desde un archivo XML"""
+
+    name = 'haar'
+    needs_color = False
+
+    def __init__(self, cascade_file=HAAR_CASCADE_FILE):
+        self.cascade_file = cascade_file
+        self.cascade = None
+
+    @property
+    def files(self):
+        return [self.cascade_file]
+
+    def missing_files(self):
+        return [path for path in self.files if not os.path.exists(path)]
+
+    def available(self):
+        return not self.missing_files()
+
+    def load(self):
+        self.cascade = MODEL_CACHE.get('cascade', self.cascade_file, cv2.CascadeClassifier)
+        return self
+
+    def empty(self):
+        return self.cascade is None or self.cascade.empty()
+
+    def detectMultiScale(self, image, scaleFactor=1.1, minNeighbors=3, minSize=(0, 0), maxSize=(0, 0)):
+        return self.cascade.detectMultiScale(image, scaleFactor=scaleFactor, minNeighbors=minNeighbors,
+                                             minSize=minSize, maxSize=maxSize)
+
+
+class LBPDetector(CascadeDetector):
+    """Cascada LBP: características enteras, varias veces más rápida que Haar"""
+
+    name = 'lbp'
+
+    def __init__(self, cascade_file=LBP_CASCADE_FILE):
+        super().__init__(cascade_file)
+
+
+class ConfirmedDetector:
+    """Dos etapas: 'first' busca en toda la imagen y 'second' confirma cada candidato.
+
+    La segunda cascada corre solo sobre el candidato ampliado en 'margin'
+    y con tamaños cercanos al suyo, así que cuesta poco; se devuelve la
+    caja de la segunda etapa, que suele ser la más precisa. Candidatos
+    sin confirmación se descartan (menos falsos positivos que 'first').
+    """
+
+    name = 'lbp+haar'
+    needs_color = False
+
+    def __init__(self, first=None, second=None, margin=0.25, size_tolerance=0.3, min_neighbors=3):
+        self.first = first or LBPDetector()
+        self.second = second or CascadeDetector()
+        self.margin = margin
+        self.size_tolerance = size_tolerance
+        self.min_neighbors = min_neighbors
+
+    @property
+    def files(self):
+        return self.first.files + self.second.files
+
+    def missing_files(self):
+        return self.first.missing_files() + self.second.missing_files()
+
+    def available(self):
+        return not self.missing_files()
+
+    def load(self):
+        self.first.load()
+        self.second.load()
+        return self
+
+    def empty(self):
+        return self.first.empty() or self.second.empty()
+
+    def detectMultiScale(self, image, scaleFactor=1.1, minNeighbors=3, minSize=(0, 0), maxSize=(0, 0)):
+        candidates = self.first.detectMultiScale(image, scaleFactor=scaleFactor, minNeighbors=minNeighbors,
+                                                 minSize=minSize, maxSize=maxSize)
+        height, width = image.shape[:2]
+        confirmed = []
+        for (x, y, w, h) in candidates:
+            margin_x, margin_y = int(w * self.margin), int(h * self.margin)
+            x0, y0 = max(0, x - margin_x), max(0, y - margin_y)
+            x1, y1 = min(width, x + w + margin_x), min(height, y + h + margin_y)
+            min_side = max(minSize[0], int(min(w, h) * (1 - self.size_tolerance)))
+            max_side = int(max(w, h) * (1 + self.size_tolerance))
+            boxes = self.second.detectMultiScale(image[y0:y1, x0:x1], scaleFactor=scaleFactor,
+                                                 minNeighbors=self.min_neighbors, minSize=(min_side, min_side),
+                                                 maxSize=(max_side, max_side))
+            if len(boxes):
+                bx, by, bw, bh = max(boxes, key=lambda box: box[2] * box[3])
+                confirmed.append((bx + x0, by + y0, bw, bh))
+        return np.array(confirmed, dtype=np.int32).reshape(-1, 4)
+
+
+def read_dnn(model_file, config_file):
+    """Red de OpenCV DNN y el candado con que se serializa forward() (no es reentrante)"""
+    net = cv2.dnn.readNet(model_file, config_file)
+    net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+    net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+    return net, threading.Lock()
+
+
+class DNNDetector:
+    """Detector SSD de OpenCV DNN (por defecto res10_300x300 en Caffe).
+
+    La imagen se reduce a input_size y la red devuelve cajas con su
+    confianza; scaleFactor y minNeighbors no aplican, y minSize/maxSize
+    filtran las cajas. threads fija cv2.setNumThreads al cargar, que vale
+    para todo el proceso (también para las cascadas).
+    """
+
+    name = 'dnn'
+    needs_color = True  # La red se entrenó con imágenes BGR
+
+    def __init__(self, model_file=DNN_MODEL_FILE, config_file=DNN_CONFIG_FILE, threads=1, confidence=0.6,
+                 input_size=(300, 300), mean=(104.0, 177.0, 123.0)):
+        self.model_file = model_file
+        self.config_file = config_file
+        self.threads = threads
+        self.confidence = confidence
+        self.input_size = input_size
+        self.mean = mean
+        self.net = None
+        self._lock = None
+
+    @property
+    def files(self):
+        return [self.model_file, self.config_file]
+
+    def missing_files(self):
+        return [path for path in self.files if not os.path.exists(path)]
+
+    def available(self):
+        return not self.missing_files()
+
+    def load(self):
+        if self.threads > 0:
+            cv2.setNumThreads(self.threads)
+        self.net, self._lock = MODEL_CACHE.get('dnn', self.model_file,
+                                               lambda path: read_dnn(path, self.config_file))
+        return self
+
+    def empty(self):
+        return self.net is None or self.net.empty()
+
+    def detectMultiScale(self, image, scaleFactor=1.1, minNeighbors=3, minSize=(0, 0), maxSize=(0, 0)):
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        height, width = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(image, 1.0, self.input_size, self.mean)
+        with self._lock:
+            self.net.setInput(blob)
+            detections = self.net.forward().reshape(-1, 7)
+
+        # Cada fila: (imagen, clase, confianza, x0, y0, x1, y1) con coordenadas relativas
+        detections = detections[detections[:, 2] >= self.confidence]
+        corners = np.clip(detections[:, 3:7], 0.0, 1.0) * np.array([width, height, width, height])
+        boxes = np.round(np.column_stack([corners[:, :2], corners[:, 2:] - corners[:, :2]])).astype(np.int32)
+        sides = np.minimum(boxes[:, 2], boxes[:, 3])
+        keep = sides >= max(1, minSize[0])
+        if maxSize and maxSize[0] > 0:
+            keep &= np.maximum(boxes[:, 2], boxes[:, 3]) <= maxSize[0]
+        return boxes[keep]
+
+
+def merge_boxes(boxes, overlap=0.5):
+    """Une las cajas que se solapan (IoU o intersección/caja menor >= overlap) en su promedio"""
+    boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+    if len(boxes) <= 1:
+        return boxes
+    boxes = boxes[np.argsort(-(boxes[:, 2] * boxes[:, 3]), kind='stable')]
+    x0, y0 = boxes[:, 0], boxes[:, 1]
+    x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+    areas = boxes[:, 2] * boxes[:, 3]
+    pending = np.ones(len(boxes), dtype=bool)
+    merged = []
+    for i in range(len(boxes)):
+        if not pending[i]:
+            continue
+        width = np.clip(np.minimum(x1, x1[i]) - np.maximum(x0, x0[i]), 0, None)
+        height = np.clip(np.minimum(y1, y1[i]) - np.maximum(y0, y0[i]), 0, None)
+        intersection = width * height
+        iou = intersection / (areas + areas[i] - intersection)
+        contained = intersection / np.minimum(areas, areas[i])
+        group = pending & ((iou >= overlap) | (contained >= overlap))
+        pending &= ~group
+        merged.append(np.round(boxes[group].mean(axis=0)))
+    return np.array(merged, dtype=np.int32)
+
+
+# Un CascadeClassifier no admite llamadas simultáneas: cada hilo del pool
+# carga el suyo (una vez por archivo)
+_thread_cascades = threading.local()
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def thread_cascade(cascade_file):
+    cascades = getattr(_thread_cascades, 'cascades', None)
+    if cascades is None:
+        cascades = _thread_cascades.cascades = {}
+    if cascade_file not in cascades:
+        cascades[cascade_file] = cv2.CascadeClassifier(cascade_file)
+    return cascades[cascade_file]
+
+
+def shared_executor(workers):
+    """ThreadPoolExecutor de 'workers' hilos compartido por todos los ParallelDetector"""
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(workers, thread_name_prefix="detect")
+        return _executors[workers]
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class ParallelDetector:
+    """Cascada con los niveles de la pirámide repartidos entre varios hilos.
+
+    detectMultiScale prueba la ventana de la cascada (24×24 en Haar)
+    escalada por scaleFactor^k y cada nivel cuesta según el área de la
+    imagen reducida: los niveles de caras pequeñas son los caros. Los
+    niveles se agrupan en 'workers' bandas contiguas de costo parecido,
+    cada banda es una llamada con su minSize/maxSize en un hilo (OpenCV
+    libera el GIL) y las cajas se unen con merge_boxes. Cada banda se
+    extiende overlap_levels niveles hacia arriba para que una cara en el
+    borde reúna sus minNeighbors: con 0 el trabajo total es el de una sola
+    llamada pero se pierde alguna cara en los bordes, cada nivel de
+    solape suma ~30% de trabajo con 4 hilos (ver bench_parallel_detection.py).
+
+    El nivel más caro se lleva ~1 - 1/scaleFactor² del total (17% con 1.1),
+    así que más de ~5 hilos no aceleran. Al cargar, cv2.setNumThreads se
+    reparte entre los hilos (núcleos // workers) para no sobresuscribir la
+    CPU; el ajuste vale para todo el proceso.
+    """
+
+    def __init__(self, detector=None, workers=0, overlap_levels=1, merge_overlap=0.5, min_pixels=640 * 480):
+        self.detector = detector or CascadeDetector()
+        self.workers = workers or available_cores()
+        self.overlap_levels = overlap_levels
+        # Imágenes más chicas (ventanas de FaceTracker, detection_scale bajo) no se dividen
+        self.min_pixels = min_pixels
+        self.merge_overlap = merge_overlap
+        self.window = (24, 24)
+        self.executor = None
+
+    @property
+    def name(self):
+        return self.detector.name
+
+    @property
+    def needs_color(self):
+        return self.detector.needs_color
+
+    @property
+    def files(self):
+        return self.detector.files
+
+    def missing_files(self):
+        return self.detector.missing_files()
+
+    def available(self):
+        return self.detector.available()
+
+    def load(self):
+        self.detector.load()
+        if not self.detector.empty():
+            self.window = tuple(self.detector.cascade.getOriginalWindowSize())
+        if self.workers > 1:
+            cv2.setNumThreads(max(1, available_cores() // self.workers))
+            self.executor = shared_executor(self.workers)
+        return self
+
+    def empty(self):
+        return self.detector.empty()
+
+    def pyramid_bands(self, image_shape, scale_factor, min_size=(0, 0), max_size=(0, 0)):
+        """[(minSize, maxSize)] de cada banda, con los mismos niveles que recorre OpenCV"""
+        height, width = image_shape[:2]
+        max_w, max_h = (max_size[0], max_size[1]) if max_size and max_size[0] > 0 else (width, height)
+        sizes, costs = [], []
+        factor = 1.0
+        while True:
+            size = (int(round(self.window[0] * factor)), int(round(self.window[1] * factor)))
+            if size[0] > min(max_w, width) or size[1] > min(max_h, height):
+                break
+            if size[0] >= min_size[0] and size[1] >= min_size[1]:
+                sizes.append(size)
+                costs.append((width / factor) * (height / factor))
+            factor *= scale_factor
+        if len(sizes) < 2:
+            return [(min_size, max_size)]
+
+        # Cortes donde el costo acumulado cruza 1/workers, 2/workers, ...
+        bands = min(self.workers, len(sizes))
+        cumulative = np.cumsum(costs) / np.sum(costs)
+        cuts = np.searchsorted(cumulative, np.arange(1, bands) / bands) + 1
+        edges = [0, *sorted(set(np.clip(cuts, 1, len(sizes) - 1).tolist())), len(sizes)]
+        result = []
+        for first, last in zip(edges[:-1], edges[1:]):
+            last = min(len(sizes), last + self.overlap_levels) - 1
+            result.append((sizes[first], sizes[last]))
+        return result
+
+    def _detect_band(self, image, scale_factor, min_neighbors, min_size, max_size):
+        cascade = thread_cascade(self.detector.cascade_file)
+        return cascade.detectMultiScale(image, scaleFactor=scale_factor, minNeighbors=min_neighbors,
+                                        minSize=min_size, maxSize=max_size)
+
+    def detectMultiScale(self, image, scaleFactor=1.1, minNeighbors=3, minSize=(0, 0), maxSize=(0, 0)):
+        bands = []
+        if self.executor is not None and image.shape[0] * image.shape[1] >= self.min_pixels:
+            bands = self.pyramid_bands(image.shape, scaleFactor, minSize, maxSize)
+        if len(bands) < 2:
+            return self.detector.detectMultiScale(image, scaleFactor=scaleFactor, minNeighbors=minNeighbors,
+                                                  minSize=minSize, maxSize=maxSize)
+        futures = [self.executor.submit(self._detect_band, image, scaleFactor, minNeighbors, band_min, band_max)
+                   for band_min, band_max in bands]
+        boxes = [np.asarray(future.result(), dtype=np.int32).reshape(-1, 4) for future in futures]
+        return merge_boxes(np.concatenate(boxes), self.merge_overlap)
+
+
+def detector_image(detector, frame, gray):
+    """Imagen que espera el detector: el frame BGR si needs_color, si no la escala de grises"""
+    return frame if getattr(detector, 'needs_color', False) else gray
+
+
+def create_detector(name='haar', haar_file=HAAR_CASCADE_FILE, threads=1):
+    """Detector 'name' (ver DETECTOR_NAMES) con los archivos por defecto, sin cargar"""
+    if name == 'haar':
+        return CascadeDetector(haar_file)
+    if name == 'lbp':
+        return LBPDetector()
+    if name == 'lbp+haar':
+        return ConfirmedDetector(LBPDetector(), CascadeDetector(haar_file))
+    if name == 'dnn':
+        return DNNDetector(threads=threads)
+    raise ValueError(f"Detector desconocido: {name} (disponibles: {', '.join(DETECTOR_NAMES)})")
+
+
+def detector_availability(haar_file=HAAR_CASCADE_FILE):
+    """Archivos que le faltan a cada detector de DETECTOR_NAMES (lista vacía = disponible)"""
+    return {name: create_detector(name, haar_file).missing_files() for name in DETECTOR_NAMES}
+
+
+def resolve_detector(name='haar', haar_file=HAAR_CASCADE_FILE, strict=False):
+    """(detector que usará load_detector, archivos que le faltan a 'name').
+
+    Si a 'name' le faltan archivos avisa y devuelve 'haar'; con strict=True
+    lanza FileNotFoundError.
+    """
+    missing = create_detector(name, haar_file).missing_files()
+    if not missing:
+        return name, missing
+    message = f"Detector '{name}' no disponible, faltan: {', '.join(missing)}"
+    if strict:
+        raise FileNotFoundError(message)
+    print(f"⚠️ {message}; se usa Haar")
+    return 'haar', missing
+
+
+def load_detector(name='haar', haar_file=HAAR_CASCADE_FILE, threads=1, workers=1, strict=False):
+    """Crea y carga el detector; si le faltan archivos avisa y usa la cascada Haar.
+
+    Con workers > 1 las cascadas reparten su pirámide entre hilos
+    (ParallelDetector; en lbp+haar solo la primera etapa, que recorre la
+    imagen completa). dnn no se divide: usa threads. Con strict=True un
+    detector sin sus archivos lanza FileNotFoundError en vez de usar Haar.
+    """
+    name, _ = resolve_detector(name, haar_file, strict)
+    detector = create_detector(name, haar_file, threads)
+    if workers > 1 and isinstance(detector, CascadeDetector):
+        detector = ParallelDetector(detector, workers)
+    elif workers > 1 and isinstance(detector, ConfirmedDetector):
+        detector.first = ParallelDetector(detector.first, workers)
+    detector.load()
+    if detector.empty():
+        print(f"❌ No se pudo cargar el detector '{detector.name}': {', '.join(detector.files)}")
+    return detector
@@ -0,0 +1,572 @@
+"""
+Motor de reconocimiento LBPH vectorizado con NumPy
+Factory I/O Controller System
+
+Reproduce los histogramas LBP y la distancia chi-cuadrado de
+cv2.face.LBPHFaceRecognizer (radio 1, 8 vecinos, rejilla 8×8), de modo que
+las distancias coinciden con la "confianza" de OpenCV y el umbral de 80
+de login.py conserva su significado. A diferencia de predict(), que
+recorre las muestras una a una y devuelve una sola etiqueta, aquí todos los
+histogramas guardados forman una matriz float32 y un lote de caras se
+compara contra todos ellos con unas pocas operaciones de NumPy,
+devolviendo las k etiquetas más cercanas.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+FLT_EPSILON = np.finfo(np.float32).eps
+
+# Formato binario del modelo (face_model.bin): cabecera fija, etiquetas,
+# sumas y escalas por muestra y la matriz bins × muestras (float32,
+# float16 o uint8) alineada a 64 bytes, que se abre con np.memmap sin
+# copiar ni interpretar texto. La versión 1 no tenía tipo ni escalas
+# (siempre float32) y se sigue pudiendo leer.
+MODEL_MAGIC = b"LBPHBIN1"
+MODEL_VERSION = 2
+_HEADER_FIELDS = [
+    ('magic', 'S8'), ('version', '<u4'), ('radius', '<u4'), ('neighbors', '<u4'),
+    ('grid_x', '<u4'), ('grid_y', '<u4'), ('count', '<u8'), ('bins', '<u8'),
+    ('threshold', '<f8'), ('data_offset', '<u8'),
+]
+MODEL_HEADERS = {
+    1: np.dtype(_HEADER_FIELDS),
+    2: np.dtype(_HEADER_FIELDS + [('dtype', 'S8')]),
+}
+
+# Tipos admitidos para guardar los histogramas: uint8 guarda los conteos
+# de cada celda (exacto mientras una celda tenga como mucho 255 píxeles;
+# si no, se escala cada vector a 0..255), float16 redondea a 11 bits
+DESCRIPTOR_DTYPES = ('float32', 'float16', 'uint8')
+
+def lbp_codes(faces, radius=1, neighbors=8):
+    """Imagen de códigos LBP circulares (elbp de OpenCV) para un lote B×H×W.
+
+    Devuelve B×(H-2r)×(W-2r); los vecinos se interpolan bilinealmente y
+    cada bit vale 1 si el vecino es mayor o casi igual al píxel central.
+    """
+    faces = np.asarray(faces)
+    if faces.ndim == 2:
+        faces = faces[None]
+    src = faces.astype(np.float32)
+    _, rows, cols = src.shape
+    center = src[:, radius:rows - radius, radius:cols - radius]
+    codes = np.zeros(center.shape, dtype=np.uint8 if neighbors <= 8 else np.int32)
+
+    def window(dy, dx):
+        return src[:, radius + dy:rows - radius + dy, radius + dx:cols - radius + dx]
+
+    for n in range(neighbors):
+        # Mismas operaciones en float32 que OpenCV para obtener los mismos bits
+        x = np.float32(radius * np.cos(2.0 * np.pi * n / float(neighbors)))
+        y = np.float32(-radius * np.sin(2.0 * np.pi * n / float(neighbors)))
+        fx, fy = int(np.floor(x)), int(np.floor(y))
+        cx, cy = int(np.ceil(x)), int(np.ceil(y))
+        ty, tx = y - np.float32(fy), x - np.float32(fx)
+        one = np.float32(1)
+        w1, w2 = (one - tx) * (one - ty), tx * (one - ty)
+        w3, w4 = (one - tx) * ty, tx * ty
+
+        t = w1 * window(fy, fx) + w2 * window(fy, cx) + w3 * window(cy, fx) + w4 * window(cy, cx)
+        bit = (t > center) | (np.abs(t - center) < FLT_EPSILON)
+        codes |= (bit.astype(codes.dtype) << n)
+    return codes
+
+
+def spatial_histograms(codes, num_patterns=256, grid_x=8, grid_y=8):
+    """Histogramas normalizados por celda concatenados (B×grid_x·grid_y·num_patterns)"""
+    batch, rows, cols = codes.shape
+    height, width = rows // grid_y, cols // grid_x
+    cells = codes[:, :grid_y * height, :grid_x * width].reshape(batch, grid_y, height, grid_x, width)
+    cells = cells.transpose(0, 1, 3, 2, 4).reshape(batch, grid_y * grid_x, height * width)
+
+    # Un solo bincount para todo el lote: cada (cara, celda) tiene su rango de bins
+    n_cells = grid_y * grid_x
+    offsets = (np.arange(batch * n_cells, dtype=np.int64) * num_patterns).reshape(batch, n_cells, 1)
+    counts = np.bincount((cells + offsets).ravel(), minlength=batch * n_cells * num_patterns)
+    hist = counts.reshape(batch, n_cells * num_patterns).astype(np.float32)
+    # Igual que OpenCV: se multiplica por 1/píxeles en float32, no se divide
+    return hist * np.float32(1.0 / (height * width))
+
+
+class LBPHMatcher:
+    """Búsqueda por lotes de las k identidades más cercanas.
+
+    Para dos histogramas normalizados a y b, chi-cuadrado (HISTCMP_CHISQR_ALT)
+    vale 2·Σ(a-b)²/(a+b) = 2·(Σa + Σb - 4·Σ ab/(a+b)), y ab/(a+b) solo es
+    distinto de cero donde ambos lo son. Cada consulta mira únicamente las
+    filas de sus bins no nulos (~10% del total) en la matriz guardada por
+    bin (bins × muestras), que se leen como bloques contiguos.
+    """
+
+    def __init__(self, radius=1, neighbors=8, grid_x=8, grid_y=8, chunk_size=1 << 22, dtype='float32'):
+        if dtype not in DESCRIPTOR_DTYPES:
+            raise ValueError(f"Tipo de descriptor no soportado: {dtype}")
+        self.radius = radius
+        self.neighbors = neighbors
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.chunk_size = chunk_size  # Elementos por bloque en la comparación
+        self.dtype = dtype
+        self.num_patterns = 2 ** neighbors
+        self.by_bin = np.empty((grid_x * grid_y * self.num_patterns, 0), dtype=dtype)
+        self.scales = np.empty(0, dtype=np.float32)  # histograma = by_bin · escala
+        self.labels = np.empty(0, dtype=np.int32)
+        self.threshold = 100.0  # Solo se conserva para la conversión a XML
+        self.index = None
+        self._prepare()
+
+    @classmethod
+    def from_store(cls, store, **kwargs):
+        """Construye el motor con las muestras del almacén (migra faces_data.pkl si hace falta)"""
+        matcher = cls(**kwargs)
+        if store.load_index() and store.count > 0:
+            matcher.train(*store.training_set())
+        return matcher
+
+    @classmethod
+    def from_recognizer(cls, recognizer, **kwargs):
+        """Copia los histogramas de un cv2.face.LBPHFaceRecognizer ya entrenado o leído"""
+        matcher = cls(recognizer.getRadius(), recognizer.getNeighbors(), recognizer.getGridX(),
+                      recognizer.getGridY(), **kwargs)
+        histograms = recognizer.getHistograms()
+        if histograms:
+            matcher.set_histograms(np.vstack([h.reshape(1, -1) for h in histograms]), recognizer.getLabels())
+        return matcher
+
+    @classmethod
+    def load(cls, path, mmap=None, **kwargs):
+        """Abre un modelo binario; la matriz de histogramas queda como memmap de solo lectura.
+
+        En Windows un archivo mapeado no se puede reemplazar con os.replace,
+        así que allí (o con mmap=False) la matriz se lee a memoria y el
+        archivo queda libre para el próximo save().
+        """
+        if mmap is None:
+            mmap = os.name != 'nt'
+        magic = np.fromfile(path, dtype=MODEL_HEADERS[1], count=1)
+        if len(magic) == 0 or magic['magic'][0] != MODEL_MAGIC or int(magic['version'][0]) not in MODEL_HEADERS:
+            raise ValueError(f"{path} no es un modelo binario LBPH válido")
+        version = int(magic['version'][0])
+        header_dtype = MODEL_HEADERS[version]
+        header = np.fromfile(path, dtype=header_dtype, count=1)[0]
+        dtype = header['dtype'].decode('ascii') if version >= 2 else 'float32'
+        count, bins = int(header['count']), int(header['bins'])
+        matcher = cls(int(header['radius']), int(header['neighbors']), int(header['grid_x']),
+                      int(header['grid_y']), dtype=dtype, **kwargs)
+        if bins != matcher.by_bin.shape[0]:
+            raise ValueError(f"{path}: {bins} bins no coincide con los parámetros LBP")
+        matcher.threshold = float(header['threshold'])
+
+        offset = header_dtype.itemsize
+        labels = np.fromfile(path, dtype='<i4', count=count, offset=offset)
+        offset += 4 * count
+        sample_sums = np.fromfile(path, dtype='<f8', count=count, offset=offset)
+        offset += 8 * count
+        if version >= 2:
+            matcher.scales = np.fromfile(path, dtype='<f4', count=count, offset=offset)
+        else:
+            matcher.scales = np.ones(count, dtype=np.float32)
+        stored = np.dtype(dtype).newbyteorder('<')
+        if count and mmap:
+            matcher.by_bin = np.memmap(path, dtype=stored, mode='r', offset=int(header['data_offset']),
+                                       shape=(bins, count))
+        elif count:
+            matcher.by_bin = np.fromfile(path, dtype=stored, count=bins * count,
+                                         offset=int(header['data_offset'])).reshape(bins, count)
+        matcher.labels = labels.astype(np.int32)
+        matcher._prepare(sample_sums)
+        return matcher
+
+    def save(self, path):
+        """Guarda el modelo en formato binario (escritura atómica)"""
+        header_dtype = MODEL_HEADERS[MODEL_VERSION]
+        count, bins = len(self.labels), self.by_bin.shape[0]
+        offset = header_dtype.itemsize + 16 * count
+        data_offset = (offset + 63) // 64 * 64
+        header = np.zeros(1, dtype=header_dtype)
+        header[0] = (MODEL_MAGIC, MODEL_VERSION, self.radius, self.neighbors, self.grid_x, self.grid_y,
+                     count, bins, self.threshold, data_offset, self.dtype.encode('ascii'))
+
+        stored = np.dtype(self.dtype).newbyteorder('<')
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(header.tobytes())
+            f.write(self.labels.astype('<i4').tobytes())
+            f.write(self.sample_sums.astype('<f8').tobytes())
+            f.write(self.scales.astype('<f4').tobytes())
+            f.write(b"\0" * (data_offset - offset))
+            for start in range(0, bins, 1024):
+                f.write(np.ascontiguousarray(self.by_bin[start:start + 1024], dtype=stored).tobytes())
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @property
+    def nbytes(self):
+        """Memoria de los descriptores guardados"""
+        return self.by_bin.nbytes + self.scales.nbytes + self.sample_sums.nbytes + self.labels.nbytes
+
+    def block(self, start, stop):
+        """Histogramas de las muestras start:stop como float32 (bins × muestras)"""
+        return self.by_bin[:, start:stop] * self.scales[start:stop]
+
+    @property
+    def histograms(self):
+        """Histogramas guardados como float32, una fila por muestra"""
+        return self.block(0, len(self.labels)).T
+
+    def compute_histograms(self, faces, batch_size=256):
+        faces = np.asarray(faces)
+        if faces.ndim == 2:
+            faces = faces[None]
+        out = np.empty((len(faces), self.by_bin.shape[0]), dtype=np.float32)
+        for start in range(0, len(faces), batch_size):
+            codes = lbp_codes(faces[start:start + batch_size], self.radius, self.neighbors)
+            out[start:start + batch_size] = spatial_histograms(codes, self.num_patterns, self.grid_x, self.grid_y)
+        return out
+
+    def train(self, faces, labels):
+        self.index = None
+        self.set_histograms(self.compute_histograms(faces), labels)
+
+    def update(self, faces, labels):
+        histograms = self.compute_histograms(faces)
+        self.set_histograms(np.concatenate([self.histograms, histograms]),
+                            np.concatenate([self.labels, np.asarray(labels, dtype=np.int32)]))
+
+    def set_histograms(self, histograms, labels):
+        self.by_bin, self.scales = self.quantize(np.asarray(histograms, dtype=np.float32))
+        self.labels = np.asarray(labels, dtype=np.int32).reshape(-1)
+        self._prepare()
+
+    def quantize(self, histograms):
+        """Convierte histogramas N×D float32 al tipo de almacenamiento (bins × muestras, escalas)"""
+        count = len(histograms)
+        if self.dtype != 'uint8':
+            values = np.ascontiguousarray(histograms.T, dtype=self.dtype)
+            return values, np.ones(count, dtype=np.float32)
+
+        # Los histogramas LBPH son conteos·(1/píxeles) por celda: se busca ese
+        # número de píxeles por muestra y, si no existe o supera 255, se escala al máximo
+        positive = np.where(histograms > 0, histograms, np.inf).min(axis=1)
+        positive[~np.isfinite(positive)] = 1.0
+        divisors = np.zeros(count, dtype=np.float32)
+        for multiple in range(1, 5):
+            candidates = np.round(multiple / positive).astype(np.float32)
+            pending = (divisors == 0) & (candidates <= 255)
+            if not pending.any():
+                continue
+            scaled = histograms[pending] * candidates[pending, None]
+            exact = (np.abs(scaled - np.round(scaled)) < 1e-3).all(axis=1)
+            divisors[np.flatnonzero(pending)[exact]] = candidates[pending][exact]
+        lossy = divisors == 0
+        divisors[lossy] = 255.0 / np.maximum(histograms[lossy].max(axis=1), 1e-12)
+        values = np.round(histograms.T * divisors).clip(0, 255).astype(np.uint8)
+        scales = (1.0 / divisors.astype(np.float64)).astype(np.float32)
+        return np.ascontiguousarray(values), scales
+
+    def _prepare(self, sample_sums=None):
+        """Precalcula sumas por muestra y el orden por etiqueta para el mínimo por usuario"""
+        if sample_sums is None:
+            sample_sums = self.by_bin.sum(axis=0, dtype=np.float64) * self.scales
+        self.sample_sums = sample_sums
+        self.uniform_scale = float(self.scales[0]) if len(self.scales) and \
+            np.all(self.scales == self.scales[0]) else None
+        self.order = np.argsort(self.labels, kind='stable')
+        self.unique_labels, self.label_starts = np.unique(self.labels[self.order], return_index=True)
+
+    def query_distances(self, query, samples=None):
+        """Distancias chi-cuadrado de un histograma a todas las muestras (o a las indicadas)"""
+        bins = np.flatnonzero(query)
+        b = query[bins, None]
+        b_squared = b * b
+        b_sum = float(b.sum(dtype=np.float64))
+        # Con una escala s común se opera directamente sobre los valores
+        # guardados: Σ b²/(q·s + b) = Σ b²/(q + b/s) / s
+        scale = self.uniform_scale
+        b_scaled = b / np.float32(scale) if scale is not None else None
+        count = len(self.labels) if samples is None else len(samples)
+        result = np.empty(count, dtype=np.float64)
+        samples_per_chunk = max(1, self.chunk_size // max(1, len(bins)))
+        for start in range(0, count, samples_per_chunk):
+            stop = start + samples_per_chunk
+            if samples is None:
+                chunk = slice(start, stop)
+                stored = self.by_bin[bins, start:stop]
+            else:
+                chunk = samples[start:stop]
+                stored = self.by_bin[np.ix_(bins, chunk)]
+            # Σ ab/(a+b) = Σ b - Σ b²/(a+b) sobre los bins no nulos de la consulta
+            if scale is not None:
+                total = np.add(stored, b_scaled, dtype=np.float32)
+                np.divide(b_squared, total, out=total)
+                quotient = total.sum(axis=0, dtype=np.float64) / scale
+            else:
+                total = np.multiply(stored, self.scales[chunk], dtype=np.float32)
+                total += b
+                np.divide(b_squared, total, out=total)
+                quotient = total.sum(axis=0, dtype=np.float64)
+            shared = b_sum - quotient
+            result[start:stop] = 2.0 * (self.sample_sums[chunk] + b_sum - 4.0 * shared)
+        return np.maximum(result, 0.0, out=result)
+
+    def distances(self, queries):
+        """Matriz Q×N de distancias chi-cuadrado entre histogramas de consulta y guardados"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        result = np.empty((len(queries), len(self.labels)), dtype=np.float64)
+        for q, query in enumerate(queries):
+            result[q] = self.query_distances(query)
+        return result
+
+    def search_histograms(self, queries, k=1):
+        """Top-k etiquetas por consulta según la distancia mínima de cada usuario.
+
+        Con un índice ANN (set_index) solo se calculan distancias exactas a
+        la lista corta de candidatas; si una consulta tiene menos de k
+        usuarios candidatos, el resto se rellena con etiqueta -1 y
+        distancia infinita.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = max(1, min(k, len(self.unique_labels)))
+        top_labels = np.full((len(queries), k), -1, dtype=np.int32)
+        top_distances = np.full((len(queries), k), np.inf)
+        if len(self.labels) == 0:
+            return top_labels[:, :0], top_distances[:, :0]
+
+        for q, query in enumerate(queries):
+            if self.index is None:
+                distances = self.query_distances(query)
+                per_label = np.minimum.reduceat(distances[self.order], self.label_starts)
+                labels = self.unique_labels
+            else:
+                samples = self.index.candidates(query, len(self.labels))
+                distances = self.query_distances(query, samples)
+                candidate_labels = self.labels[samples]
+                order = np.argsort(candidate_labels, kind='stable')
+                labels, starts = np.unique(candidate_labels[order], return_index=True)
+                per_label = np.minimum.reduceat(distances[order], starts)
+
+            n = min(k, len(per_label))
+            best = np.argpartition(per_label, n - 1)[:n]
+            best = best[np.argsort(per_label[best], kind='stable')]
+            top_labels[q, :n] = labels[best]
+            top_distances[q, :n] = per_label[best]
+        return top_labels, top_distances
+
+    def set_index(self, index):
+        """Usa un índice ANN (IVFIndex) para preseleccionar candidatas; None = búsqueda exacta"""
+        self.index = index
+
+    def search(self, faces, k=1):
+        """Caras preprocesadas (B×100×100) → (etiquetas B×k, distancias B×k)"""
+        return self.search_histograms(self.compute_histograms(faces), k)
+
+    def predict(self, face):
+        """Misma interfaz que LBPHFaceRecognizer.predict: (etiqueta, confianza)"""
+        labels, distances = self.search(face, k=1)
+        if labels.shape[1] == 0 or labels[0, 0] < 0:
+            return -1, float('inf')
+        return int(labels[0, 0]), float(distances[0, 0])
+
+
+def read_recognizer(path):
+    """Lee un face_model.xml en un LBPHFaceRecognizer nuevo"""
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(path)
+    return recognizer
+
+
+def temporary_path(path):
+    """Ruta temporal junto a path con su misma extensión (OpenCV elige el formato por la extensión)"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.tmp{ext}"
+
+
+def save_recognizer(recognizer, path):
+    """Guarda un LBPHFaceRecognizer en un archivo temporal y lo reemplaza con os.replace.
+
+    Así model_cache.MODEL_CACHE nunca lee un face_model.xml a medio escribir.
+    """
+    tmp = temporary_path(path)
+    recognizer.save(tmp)
+    os.replace(tmp, path)
+
+
+def xml_to_binary(xml_path, binary_path, dtype='float32'):
+    """Convierte un face_model.xml de OpenCV al formato binario"""
+    recognizer = read_recognizer(xml_path)
+    matcher = LBPHMatcher.from_recognizer(recognizer, dtype=dtype)
+    matcher.threshold = recognizer.getThreshold()
+    matcher.save(binary_path)
+    return matcher
+
+
+def binary_to_xml(binary_path, xml_path):
+    """Escribe un modelo binario como face_model.xml legible por LBPHFaceRecognizer.read"""
+    matcher = LBPHMatcher.load(binary_path)
+    tmp = temporary_path(xml_path)
+    fs = cv2.FileStorage(tmp, cv2.FILE_STORAGE_WRITE)
+    try:
+        fs.startWriteStruct("opencv_lbphfaces", cv2.FileNode_MAP)
+        fs.write("threshold", matcher.threshold)
+        fs.write("radius", matcher.radius)
+        fs.write("neighbors", matcher.neighbors)
+        fs.write("grid_x", matcher.grid_x)
+        fs.write("grid_y", matcher.grid_y)
+        fs.startWriteStruct("histograms", cv2.FileNode_SEQ)
+        for start in range(0, len(matcher), 1024):
+            for histogram in matcher.block(start, start + 1024).T:
+                fs.write("", histogram.reshape(1, -1))
+        fs.endWriteStruct()
+        fs.write("labels", matcher.labels.reshape(-1, 1))
+        fs.startWriteStruct("labelsInfo", cv2.FileNode_SEQ)
+        fs.endWriteStruct()
+        fs.endWriteStruct()
+    finally:
+        fs.release()
+    os.replace(tmp, xml_path)
+    return matcher
+
+
+def k_medoids(distances, k, max_iter=20):
+    """Agrupa N elementos en k grupos dada su matriz de distancias N×N.
+
+    Inicialización determinista tipo k-means++ (el elemento más central y
+    luego, uno a uno, el más lejano a los medoides elegidos) seguida de
+    iteraciones de Voronoi: asignar al medoide más cercano y elegir como
+    nuevo medoide el elemento de cada grupo con menor suma de distancias.
+    Devuelve los índices de los medoides.
+    """
+    count = len(distances)
+    if k >= count:
+        return np.arange(count)
+
+    medoids = [int(np.argmin(distances.sum(axis=1)))]
+    while len(medoids) < k:
+        nearest = distances[:, medoids].min(axis=1)
+        medoids.append(int(np.argmax(nearest)))
+    medoids = np.array(medoids)
+
+    for _ in range(max_iter):
+        assignment = np.argmin(distances[:, medoids], axis=1)
+        updated = medoids.copy()
+        for cluster in range(k):
+            members = np.flatnonzero(assignment == cluster)
+            if len(members):
+                costs = distances[np.ix_(members, members)].sum(axis=1)
+                updated[cluster] = members[np.argmin(costs)]
+        if np.array_equal(np.sort(updated), np.sort(medoids)):
+            break
+        medoids = updated
+    return np.sort(medoids)
+
+
+def select_prototypes(faces, k):
+    """Posiciones de los k prototipos (medoides chi-cuadrado de LBP) de un usuario.
+
+    Los prototipos son muestras reales, así que tanto LBPHMatcher como
+    cv2.face.LBPHFaceRecognizer pueden entrenarse solo con ellos.
+    """
+    faces = np.asarray(faces)
+    if k <= 0 or k >= len(faces):
+        return np.arange(len(faces))
+    matcher = LBPHMatcher()
+    histograms = matcher.compute_histograms(faces)
+    matcher.set_histograms(histograms, np.zeros(len(faces), dtype=np.int32))
+    return k_medoids(matcher.distances(histograms), k)
+
+
+class IVFIndex:
+    """Índice ANN por listas invertidas (IVF) sobre los histogramas LBP.
+
+    Cada histograma se lleva a sqrt(h) (la distancia euclídea entre raíces
+    se comporta como chi-cuadrado) y se proyecta a dims dimensiones con una
+    matriz aleatoria gaussiana. Las proyecciones se agrupan con k-means en
+    n_lists listas. Una consulta solo visita las nprobe listas de centroides
+    más cercanos; LBPHMatcher calcula después la distancia exacta a esas
+    candidatas, así que el umbral de confianza conserva su significado.
+    Más nprobe = más recall y más latencia.
+
+    Las muestras agregadas después de construir el índice (registros
+    nuevos, posiciones >= size) se comparan siempre de forma exacta.
+    """
+
+    def __init__(self, n_lists=None, nprobe=8, dims=64, seed=0):
+        self.n_lists = n_lists  # None = 4·√N
+        self.nprobe = nprobe
+        self.dims = dims
+        self.seed = seed
+        self.projection = None
+        self.centroids = None
+        self.members = None   # Índices de muestra ordenados por lista
+        self.offsets = None   # Inicio de cada lista en members (n_lists + 1)
+        self.labels = None    # Etiquetas indexadas, para validar contra el almacén
+
+    @property
+    def size(self):
+        return 0 if self.labels is None else len(self.labels)
+
+    def project(self, histograms):
+        """Proyección aleatoria de sqrt(h) para histogramas N×D"""
+        return np.sqrt(histograms) @ self.projection
+
+    def build(self, matcher, batch_size=1024):
+        count = len(matcher)
+        rng = np.random.default_rng(self.seed)
+        self.projection = (rng.standard_normal((matcher.by_bin.shape[0], self.dims))
+                           / np.sqrt(self.dims)).astype(np.float32)
+        points = np.empty((count, self.dims), dtype=np.float32)
+        for start in range(0, count, batch_size):
+            points[start:start + batch_size] = self.project(matcher.block(start, start + batch_size).T)
+
+        n_lists = self.n_lists or int(4 * np.sqrt(count))
+        n_lists = max(1, min(n_lists, count))
+        cv2.setRNGSeed(self.seed)
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1e-4)
+        _, assignment, centroids = cv2.kmeans(points, n_lists, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
+        assignment = assignment.ravel()
+
+        self.centroids = centroids.astype(np.float32)
+        self.members = np.argsort(assignment, kind='stable').astype(np.int32)
+        self.offsets = np.searchsorted(assignment[self.members], np.arange(n_lists + 1)).astype(np.int64)
+        self.labels = matcher.labels.copy()
+        return self
+
+    def candidates(self, query, total):
+        """Muestras a comparar de forma exacta para una consulta (histograma 1D)"""
+        bins = np.flatnonzero(query)
+        point = np.sqrt(query[bins]) @ self.projection[bins]
+        distances = ((self.centroids - point) ** 2).sum(axis=1)
+        nprobe = min(self.nprobe, len(self.centroids))
+        lists = np.argpartition(distances, nprobe - 1)[:nprobe]
+        parts = [self.members[self.offsets[i]:self.offsets[i + 1]] for i in lists]
+        parts.append(np.arange(self.size, total, dtype=np.int32))
+        return np.sort(np.concatenate(parts))
+
+    def matches(self, matcher):
+        """El índice corresponde a las primeras muestras del motor"""
+        return self.size <= len(matcher) and np.array_equal(self.labels, matcher.labels[:self.size])
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, projection=self.projection, centroids=self.centroids, members=self.members,
+                     offsets=self.offsets, labels=self.labels,
+                     params=np.array([self.dims, self.seed, self.nprobe], dtype=np.int64))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            dims, seed, nprobe = (int(v) for v in data['params'])
+            index = cls(n_lists=len(data['centroids']), nprobe=nprobe, dims=dims, seed=seed)
+            index.projection = data['projection']
+            index.centroids = data['centroids']
+            index.members = data['members']
+            index.offsets = data['offsets']
+            index.labels = data['labels']
+        return index
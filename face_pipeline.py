@@ -0,0 +1,954 @@
+"""
+Etapas del pipeline de reconocimiento facial
+Factory I/O Controller System
+
+Componentes sin dependencias de Qt que usa FaceRecognitionThread para
+separar la captura de la cámara del análisis de cada frame.
+"""
+
+import collections
+import copy
+import json
+import socket
+import threading
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from frame_sources import open_frame_source
+
+
+class FrameRingBuffer:
+    """Buffer circular pequeño que conserva solo los frames más recientes.
+
+    Cuando está lleno, put() descarta el frame más antiguo en lugar de
+    bloquear al productor, y get_latest() entrega el frame más nuevo y
+    descarta los anteriores. Así el consumidor nunca trabaja sobre
+    frames atrasados de la cámara.
+
+    Para fuentes grabadas (reproducción sin pérdidas) se usa
+    put(block=True) junto con get_next(), que entrega los frames en orden.
+    """
+
+    def __init__(self, capacity=2):
+        self.capacity = capacity
+        self._frames = collections.deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self._closed = False
+        self.sequence = 0
+        self.dropped = 0
+
+    def put(self, frame, block=False, flip=False):
+        if flip:
+            frame = cv2.flip(frame, 1)
+        with self._condition:
+            if block:
+                self._condition.wait_for(lambda: len(self._frames) < self.capacity or self._closed)
+                if self._closed:
+                    return
+            elif len(self._frames) == self.capacity:
+                self.dropped += 1
+            self.sequence += 1
+            self._frames.append((self.sequence, time.monotonic(), frame))
+            self._condition.notify_all()
+
+    def get_latest(self, timeout=None):
+        """Devuelve (secuencia, timestamp, frame) del frame más nuevo o None"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._frames or self._closed, timeout):
+                return None
+            if not self._frames:
+                return None
+            item = self._frames.pop()
+            self.dropped += len(self._frames)
+            self._frames.clear()
+            self._condition.notify_all()
+            return item
+
+    def get_next(self, timeout=None):
+        """Devuelve el frame más antiguo pendiente (sin descartar ninguno) o None"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._frames or self._closed, timeout):
+                return None
+            if not self._frames:
+                return None
+            item = self._frames.popleft()
+            self._condition.notify_all()
+            return item
+
+    @property
+    def closed(self):
+        """True cuando el productor terminó y ya no quedan frames"""
+        return self._closed and not self._frames
+
+    @property
+    def depth(self):
+        return len(self._frames)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class FrameBus:
+    """Frames de la cámara compartidos sin copias entre varios consumidores.
+
+    Anillo de ranuras preasignadas, cada una con su número de secuencia.
+    El productor (CaptureWorker) escribe cada frame en una ranura libre (el
+    volteo espejo escribe directamente en ella) y cada consumidor, suscrito
+    con subscribe(), lee el frame más reciente a su propio ritmo: recibe
+    una vista de solo lectura de la ranura, que queda reservada hasta su
+    siguiente lectura. El productor nunca escribe sobre una ranura
+    reservada y, como hay dos ranuras más que suscriptores posibles, nunca
+    tiene que esperar: un consumidor lento simplemente se salta frames.
+
+    Con fuentes grabadas put(block=True) espera a que todos los suscriptores
+    hayan leído el último frame, para no perder ninguno.
+    """
+
+    def __init__(self, max_subscribers=4):
+        self.max_subscribers = max_subscribers
+        self.slots = max_subscribers + 2
+        self._condition = threading.Condition()
+        self._buffers = []  # Se asignan con el primer frame (y si cambia la resolución)
+        self._sequences = [0] * self.slots
+        self._timestamps = [0.0] * self.slots
+        self._pins = [0] * self.slots
+        self._subscribers = []
+        self._closed = False
+        self.latest = -1
+        self.sequence = 0
+
+    def subscribe(self):
+        with self._condition:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise RuntimeError(f"FrameBus admite como máximo {self.max_subscribers} suscriptores")
+            subscription = FrameSubscription(self, self.sequence)
+            self._subscribers.append(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._condition:
+            self._release(subscription)
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            self._condition.notify_all()
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def put(self, frame, block=False, flip=False):
+        with self._condition:
+            if block:
+                self._condition.wait_for(lambda: self._closed or all(
+                    subscription.last_seq >= self.sequence for subscription in self._subscribers))
+            if self._closed:
+                return
+            if not self._buffers or self._buffers[0].shape != frame.shape or self._buffers[0].dtype != frame.dtype:
+                self._buffers = [np.empty_like(frame) for _ in range(self.slots)]
+                self._pins = [0] * self.slots
+                for subscription in self._subscribers:
+                    subscription.slot = None
+            slot = next(i for i in range(self.slots) if i != self.latest and self._pins[i] == 0)
+        # Los lectores solo reservan la ranura más reciente: esta se escribe sin el candado
+        target = self._buffers[slot]
+        if flip:
+            cv2.flip(frame, 1, dst=target)
+        else:
+            np.copyto(target, frame)
+        with self._condition:
+            self.sequence += 1
+            self._sequences[slot] = self.sequence
+            self._timestamps[slot] = time.monotonic()
+            self.latest = slot
+            self._condition.notify_all()
+
+    def read(self, subscription, timeout=None):
+        """(secuencia, timestamp, vista de solo lectura) del frame más nuevo no leído, o None"""
+        with self._condition:
+            if not self._condition.wait_for(
+                    lambda: self.sequence > subscription.last_seq or self._closed, timeout):
+                return None
+            if self.sequence <= subscription.last_seq:
+                return None  # Cerrado sin frames nuevos
+            self._release(subscription)
+            slot = self.latest
+            self._pins[slot] += 1
+            subscription.slot = slot
+            sequence = self._sequences[slot]
+            subscription.dropped += sequence - subscription.last_seq - 1
+            subscription.last_seq = sequence
+            subscription.received += 1
+            self._condition.notify_all()  # Un productor con block=True puede seguir
+            view = self._buffers[slot].view()
+            view.flags.writeable = False
+            return sequence, self._timestamps[slot], view
+
+    def _release(self, subscription):
+        if subscription.slot is not None:
+            self._pins[subscription.slot] -= 1
+            subscription.slot = None
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class FrameSubscription:
+    """Lector de un FrameBus; para el consumidor se comporta como un FrameRingBuffer"""
+
+    def __init__(self, bus, last_seq=0):
+        self.bus = bus
+        self.last_seq = last_seq
+        self.slot = None  # Ranura reservada por la última lectura
+        self.received = 0
+        self.dropped = 0
+
+    def get_latest(self, timeout=None):
+        return self.bus.read(self, timeout)
+
+    # Con fuentes grabadas el productor espera a los suscriptores: el más
+    # reciente es también el siguiente
+    get_next = get_latest
+
+    @property
+    def closed(self):
+        return self.bus.closed and self.bus.sequence <= self.last_seq
+
+    @property
+    def depth(self):
+        return 1 if self.bus.sequence > self.last_seq else 0
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class CaptureWorker(threading.Thread):
+    """Productor que lee la cámara continuamente y publica en un FrameRingBuffer o FrameBus.
+
+    Con fuentes en vivo (cámara) los frames viejos se descartan; con fuentes
+    grabadas (atributo live = False) se espera al consumidor y el hilo
+    termina al agotarse la fuente.
+    """
+
+    def __init__(self, capture, frame_buffer, flip=True, metrics=None):
+        super().__init__(daemon=True)
+        self.capture = capture
+        self.frame_buffer = frame_buffer
+        self.flip = flip and getattr(capture, 'mirror', True)
+        self.live = getattr(capture, 'live', True)
+        self.metrics = metrics
+        self.running = False
+        self.frames_captured = 0
+        self.read_failures = 0
+
+    def run(self):
+        self.running = True
+        while self.running:
+            started = time.perf_counter()
+            ret, frame = self.capture.read()
+            if not ret:
+                if not self.live:
+                    break  # Fin del video o de las imágenes
+                self.read_failures += 1
+                time.sleep(0.01)
+                continue
+
+            self.frames_captured += 1
+            if self.metrics is not None:
+                self.metrics.record('capture', started)
+            # Volteo horizontal para efecto espejo, al publicar
+            self.frame_buffer.put(frame, block=not self.live, flip=self.flip)
+
+        self.frame_buffer.close()
+
+    def stop(self):
+        self.running = False
+        self.frame_buffer.close()
+        if self.is_alive():
+            self.join(timeout=2.0)
+
+
+class CameraService:
+    """Cámara abierta una sola vez y compartida por las sesiones de la interfaz.
+
+    Autenticación, registro y la vista previa se conectan con attach(), que
+    devuelve una suscripción propia al FrameBus de la cámara, y se
+    desconectan con detach() sin cerrar el dispositivo: abrir la cámara, negociar el
+    formato y esperar a que se estabilice la exposición cuesta 1-2 s. La
+    captura sigue corriendo entre sesiones (la exposición se mantiene
+    ajustada) y la cámara se libera tras idle_timeout segundos sin nadie
+    conectado, o con close().
+
+    width/height/fourcc/buffer_size se aplican al abrir (0 o "" = valor
+    del controlador). FOURCC se fija antes que la resolución porque en
+    muchas cámaras USB las resoluciones altas solo existen en MJPG, y
+    buffer_size=1 evita que el controlador acumule frames atrasados.
+    """
+
+    def __init__(self, source=0, idle_timeout=30.0, width=0, height=0, fourcc="", buffer_size=1,
+                 max_subscribers=4):
+        self.source = source
+        self.idle_timeout = idle_timeout
+        self.width = width
+        self.height = height
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.capture = None
+        self.frame_bus = None
+        self.worker = None
+        self.consumers = 0
+        self._lock = threading.Lock()
+        self._idle_timer = None
+        self.opens = 0
+        self.reuses = 0
+        self.idle_releases = 0
+
+    def configure(self, capture):
+        """Aplica formato, resolución y tamaño de buffer a una cámara recién abierta"""
+        if not hasattr(capture, 'set'):
+            return
+        if self.fourcc:
+            capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc[:4].ljust(4)))
+        if self.width and self.height:
+            capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.buffer_size:
+            capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+
+    def is_open(self):
+        return self.worker is not None and self.worker.is_alive()
+
+    def attach(self, metrics=None):
+        """Conecta un consumidor; devuelve su FrameSubscription o None si la cámara no abre"""
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+
+            if self.is_open():
+                self.reuses += 1
+            else:
+                self._close_locked()
+                capture = open_frame_source(self.source)
+                if not capture.isOpened():
+                    capture.release()
+                    return None
+                self.configure(capture)
+                self.capture = capture
+                self.frame_bus = FrameBus(self.max_subscribers)
+                self.worker = CaptureWorker(capture, self.frame_bus)
+                self.worker.start()
+                self.opens += 1
+
+            if metrics is not None:
+                self.worker.metrics = metrics
+            self.consumers += 1
+            return self.frame_bus.subscribe()
+
+    def detach(self, subscription=None):
+        """Desconecta un consumidor; sin consumidores, la cámara se libera tras idle_timeout"""
+        with self._lock:
+            if subscription is not None:
+                subscription.close()
+            self.consumers = max(0, self.consumers - 1)
+            if self.consumers > 0 or self.worker is None:
+                return
+            self.worker.metrics = None
+            if self.idle_timeout <= 0:
+                self._close_locked()
+                return
+            self._idle_timer = threading.Timer(self.idle_timeout, self._release_idle)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _release_idle(self):
+        with self._lock:
+            if self.consumers == 0 and self.worker is not None:
+                self.idle_releases += 1
+                self._close_locked()
+
+    def _close_locked(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    def close(self):
+        """Libera la cámara aunque haya sesiones conectadas (al cerrar la ventana)"""
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            self.consumers = 0
+            self._close_locked()
+
+    def get_stats(self):
+        return {
+            'open': self.is_open(),
+            'consumers': self.consumers,
+            'opens': self.opens,
+            'reuses': self.reuses,
+            'idle_releases': self.idle_releases,
+        }
+
+
+def preprocess_face(face, size=(100, 100)):
+    """Normaliza un recorte de cara para LBPH: tamaño fijo, ecualización y suavizado"""
+    # Redimensionar a tamaño estándar
+    face = cv2.resize(face, size)
+
+    # Aplicar ecualización de histograma para mejorar el contraste
+    face = cv2.equalizeHist(face)
+
+    # Aplicar filtro gaussiano para reducir ruido
+    return cv2.GaussianBlur(face, (5, 5), 0)
+
+
+def detect_faces(cascade, gray, detection_scale=1.0, scale_factor=1.1, min_neighbors=4, min_size=(80, 80),
+                 max_size=None):
+    """Detecta caras sobre una versión reducida de la imagen.
+
+    La cascada corre sobre gray escalado por detection_scale y las cajas se
+    devuelven en coordenadas de la imagen completa (arreglo N×4 de enteros),
+    de modo que el recorte para preprocess_face conserva toda la resolución.
+    """
+    if detection_scale >= 1.0:
+        faces = cascade.detectMultiScale(gray, scaleFactor=scale_factor, minNeighbors=min_neighbors,
+                                         minSize=min_size, maxSize=max_size or (0, 0))
+        return np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+
+    small = cv2.resize(gray, None, fx=detection_scale, fy=detection_scale,
+                       interpolation=cv2.INTER_AREA)
+    small_min_size = (max(1, int(round(min_size[0] * detection_scale))),
+                      max(1, int(round(min_size[1] * detection_scale))))
+    small_max_size = (0, 0)
+    if max_size:
+        small_max_size = (int(round(max_size[0] * detection_scale)),
+                          int(round(max_size[1] * detection_scale)))
+    faces = cascade.detectMultiScale(small, scaleFactor=scale_factor, minNeighbors=min_neighbors,
+                                     minSize=small_min_size, maxSize=small_max_size)
+    if len(faces) == 0:
+        return np.empty((0, 4), dtype=np.int32)
+
+    # Volver a coordenadas de resolución completa
+    boxes = np.round(np.asarray(faces, dtype=np.float32) / detection_scale).astype(np.int32)
+    height, width = gray.shape[:2]
+    boxes[:, 0] = np.clip(boxes[:, 0], 0, width - 1)
+    boxes[:, 1] = np.clip(boxes[:, 1], 0, height - 1)
+    boxes[:, 2] = np.minimum(boxes[:, 2], width - boxes[:, 0])
+    boxes[:, 3] = np.minimum(boxes[:, 3], height - boxes[:, 1])
+    return boxes
+
+
+class FaceTracker:
+    """Seguimiento de una cara entre detecciones completas.
+
+    Tras encontrar una sola cara, los siguientes frames solo se buscan en
+    una ventana ampliada alrededor de la última caja y con tamaños cercanos
+    al anterior. Cada redetect_interval frames, o cuando se pierde la cara,
+    se vuelve a escanear la imagen completa. redetect_interval = 0
+    desactiva el seguimiento.
+    """
+
+    def __init__(self, redetect_interval=10, search_margin=0.5, size_tolerance=0.3):
+        self.redetect_interval = redetect_interval
+        self.search_margin = search_margin
+        self.size_tolerance = size_tolerance
+        self.last_box = None
+        self.frames_since_scan = 0
+        self.hits = 0
+        self.misses = 0
+        self.full_scans = 0
+
+    def reset(self):
+        self.last_box = None
+        self.frames_since_scan = 0
+
+    def detect(self, cascade, gray, detection_scale=1.0, **detect_args):
+        """Igual que detect_faces, pero usando la ventana de seguimiento si es posible"""
+        if self.last_box is not None and self.frames_since_scan < self.redetect_interval:
+            faces = self._detect_in_window(cascade, gray, detection_scale, detect_args)
+            if len(faces) == 1:
+                self.hits += 1
+                self.frames_since_scan += 1
+                self.last_box = faces[0]
+                return faces
+            self.misses += 1
+
+        faces = detect_faces(cascade, gray, detection_scale=detection_scale, **detect_args)
+        self.full_scans += 1
+        self.frames_since_scan = 0
+        self.last_box = faces[0] if len(faces) == 1 and self.redetect_interval > 0 else None
+        return faces
+
+    def _detect_in_window(self, cascade, gray, detection_scale, detect_args):
+        x, y, w, h = (int(v) for v in self.last_box)
+        height, width = gray.shape[:2]
+        margin_x = int(w * self.search_margin)
+        margin_y = int(h * self.search_margin)
+        x0, y0 = max(0, x - margin_x), max(0, y - margin_y)
+        x1, y1 = min(width, x + w + margin_x), min(height, y + h + margin_y)
+
+        # Solo tamaños parecidos a la caja anterior: menos niveles de la pirámide
+        min_side = max(detect_args.get('min_size', (0, 0))[0], int(min(w, h) * (1 - self.size_tolerance)))
+        max_side = int(max(w, h) * (1 + self.size_tolerance))
+        window_args = dict(detect_args, min_size=(min_side, min_side), max_size=(max_side, max_side))
+
+        faces = detect_faces(cascade, gray[y0:y1, x0:x1], detection_scale=detection_scale, **window_args)
+        if len(faces):
+            faces[:, 0] += x0
+            faces[:, 1] += y0
+        return faces
+
+    def get_stats(self):
+        tracked = self.hits + self.misses
+        return {
+            'track_hits': self.hits,
+            'track_misses': self.misses,
+            'full_scans': self.full_scans,
+            'track_hit_rate': round(self.hits / tracked, 3) if tracked else 0.0,
+        }
+
+
+class MotionGate:
+    """Compuerta de movimiento para no analizar escenas estáticas.
+
+    Compara una miniatura en escala de grises del frame con la del último
+    frame analizado. Si la diferencia media no supera threshold, la
+    detección y la predicción se omiten hasta que haya movimiento o pase
+    recheck_interval segundos. Mientras se vean caras (mark_activity) se
+    sigue analizando durante active_hold segundos aunque la persona esté
+    quieta. threshold = 0 desactiva la compuerta.
+    """
+
+    def __init__(self, threshold=3.0, recheck_interval=1.0, active_hold=2.0, size=(32, 24)):
+        self.threshold = threshold
+        self.recheck_interval = recheck_interval
+        self.active_hold = active_hold
+        self.size = size
+        self.reference = None
+        self.last_analysis = 0.0
+        self.last_activity = float('-inf')
+        self.last_difference = 0.0
+        self.frames_seen = 0
+        self.frames_skipped = 0
+
+    def should_analyze(self, frame, now=None):
+        now = time.monotonic() if now is None else now
+        self.frames_seen += 1
+        if self.threshold <= 0:
+            return True
+
+        # Submuestreo con stride antes de promediar: evita recorrer el frame completo
+        step = max(1, frame.shape[1] // (self.size[0] * 4))
+        thumbnail = cv2.resize(frame[::step, ::step], self.size, interpolation=cv2.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+
+        if self.reference is not None:
+            self.last_difference = float(cv2.absdiff(thumbnail, self.reference).mean())
+            idle = (self.last_difference < self.threshold
+                    and now - self.last_analysis < self.recheck_interval
+                    and now - self.last_activity >= self.active_hold)
+            if idle:
+                self.frames_skipped += 1
+                return False
+
+        self.reference = thumbnail
+        self.last_analysis = now
+        return True
+
+    def mark_activity(self, now=None):
+        """Se llama cuando el análisis encontró caras"""
+        self.last_activity = time.monotonic() if now is None else now
+
+    def get_stats(self):
+        return {
+            'motion_threshold': self.threshold,
+            'motion_difference': round(self.last_difference, 2),
+            'frames_skipped': self.frames_skipped,
+            'skipped_fraction': round(self.frames_skipped / self.frames_seen, 3) if self.frames_seen else 0.0,
+        }
+
+
+class EnrollmentGate:
+    """Compuerta de calidad y diversidad para las muestras de registro.
+
+    Cada cara candidata se evalúa en orden:
+
+    - nitidez: varianza del Laplaciano del recorte original escalado a
+      100×100; se rechaza si está por debajo de min_sharpness o de
+      sharpness_ratio veces la mediana de las últimas candidatas (la
+      nitidez absoluta depende de la cámara)
+    - exposición: brillo medio dentro de exposure_range y contraste
+      (desviación estándar) de al menos min_contrast
+    - diversidad: histogramas por celdas de la cara preprocesada; se
+      rechaza si la distancia chi-cuadrado a alguna muestra ya guardada es
+      menor que min_distance (min_distance = 0 desactiva este criterio)
+    """
+
+    REASONS = ('blur', 'exposure', 'similar')
+
+    def __init__(self, min_sharpness=15.0, sharpness_ratio=0.6, exposure_range=(50, 205), min_contrast=20.0,
+                 min_distance=0.6, grid=(4, 4), bins=32, window=30):
+        self.min_sharpness = min_sharpness
+        self.sharpness_ratio = sharpness_ratio
+        self.exposure_range = exposure_range
+        self.min_contrast = min_contrast
+        self.min_distance = min_distance
+        self.grid = grid
+        self.bins = bins
+        self.recent_sharpness = collections.deque(maxlen=window)
+        self.reset()
+
+    def reset(self):
+        self.descriptors = []
+        self.recent_sharpness.clear()
+        self.candidates = 0
+        self.rejected = dict.fromkeys(self.REASONS, 0)
+
+    def sharpness(self, roi):
+        sample = cv2.resize(roi, (100, 100), interpolation=cv2.INTER_AREA)
+        return float(cv2.Laplacian(sample, cv2.CV_32F).var())
+
+    def descriptor(self, face):
+        """Histogramas normalizados por celda, concatenados"""
+        rows, cols = self.grid
+        cell_h, cell_w = face.shape[0] // rows, face.shape[1] // cols
+        cells = face[:rows * cell_h, :cols * cell_w].reshape(rows, cell_h, cols, cell_w).swapaxes(1, 2)
+        cells = cells.reshape(rows * cols, -1) // (256 // self.bins)
+        offsets = np.arange(rows * cols)[:, None] * self.bins
+        hist = np.bincount((cells + offsets).ravel(), minlength=rows * cols * self.bins)
+        return hist.astype(np.float32) / (cell_h * cell_w)
+
+    def distance(self, descriptor):
+        """Distancia chi-cuadrado (simétrica) a la muestra guardada más parecida"""
+        if not self.descriptors:
+            return float('inf')
+        kept = np.stack(self.descriptors)
+        total = kept + descriptor
+        diff = (kept - descriptor) ** 2
+        chi = np.divide(diff, total, out=np.zeros_like(diff), where=total > 0).sum(axis=1)
+        return float(chi.min())
+
+    def consider(self, roi, face):
+        """Evalúa una candidata; devuelve (aceptada, motivo de rechazo o None).
+
+        roi es el recorte en escala de grises sin procesar y face la misma
+        cara ya preprocesada, que es la que se guardaría.
+        """
+        self.candidates += 1
+        sharpness = self.sharpness(roi)
+        self.recent_sharpness.append(sharpness)
+        reference = float(np.median(self.recent_sharpness))
+        if sharpness < self.min_sharpness or sharpness < self.sharpness_ratio * reference:
+            self.rejected['blur'] += 1
+            return False, 'blur'
+
+        brightness, contrast = cv2.meanStdDev(roi)
+        if not (self.exposure_range[0] <= brightness[0, 0] <= self.exposure_range[1]) \
+                or contrast[0, 0] < self.min_contrast:
+            self.rejected['exposure'] += 1
+            return False, 'exposure'
+
+        descriptor = self.descriptor(face)
+        if self.min_distance > 0 and self.distance(descriptor) < self.min_distance:
+            self.rejected['similar'] += 1
+            return False, 'similar'
+
+        self.descriptors.append(descriptor)
+        return True, None
+
+    @property
+    def accepted(self):
+        return len(self.descriptors)
+
+    def get_stats(self):
+        return {
+            'enrollment_candidates': self.candidates,
+            'enrollment_accepted': self.accepted,
+            **{f'enrollment_rejected_{reason}': count for reason, count in self.rejected.items()},
+        }
+
+
+class ConsecutiveRule:
+    """Regla de decisión original: 'required' predicciones seguidas bajo el umbral.
+
+    Un solo frame sobre el umbral (o con otra etiqueta) reinicia la cuenta.
+    Misma interfaz que EvidenceAccumulator.
+    """
+
+    def __init__(self, threshold=80.0, required=3):
+        self.threshold = threshold
+        self.required = required
+        self.reset()
+
+    def reset(self):
+        self.label = None
+        self.count = 0
+
+    def observe(self, label, distance, timestamp=None):
+        """Devuelve (decisión, etiqueta, progreso) con decisión 'accept', 'reject' o None"""
+        if distance >= self.threshold:
+            self.reset()
+            return 'reject', label, 0.0
+        self.count = self.count + 1 if label == self.label else 1
+        self.label = label
+        if self.count >= self.required:
+            return 'accept', label, 1.0
+        return None, label, self.count / self.required
+
+
+class EvidenceAccumulator:
+    """Decisión de autenticación por evidencia acumulada (test secuencial de Wald).
+
+    Cada predicción (etiqueta, distancia) aporta a su etiqueta el logaritmo
+    del cociente de verosimilitudes usuario legítimo / impostor, interpolado
+    en curve = (distancias, evidencias) y limitado a ±max_llr; la misma predicción resta su evidencia positiva a
+    las demás etiquetas. Se acepta la etiqueta cuya suma llega a
+    log((1-β)/α) y se rechaza cuando la mejor cae a log(β/(1-α)), con
+    α = false_accept y β = false_reject: un frame malo resta evidencia en
+    vez de reiniciar la cuenta. La curva por defecto es lineal alrededor
+    del umbral 80 del LBPH; fit() la ajusta a distancias medidas en el kiosco.
+
+    Para no depender de la tasa de frames, cada observación pesa el tiempo
+    transcurrido desde la anterior en unidades de reference_interval
+    (frames consecutivos están muy correlacionados: a 30 FPS cada uno vale
+    un tercio que a 10 FPS), como mucho 1: con pocos FPS o tras una pausa
+    un frame no vale más que uno solo, y hacen falta min_observations
+    predicciones de la etiqueta para aceptarla. La evidencia se olvida con
+    vida media half_life segundos. Los tiempos son los de captura de cada
+    frame.
+    """
+
+    def __init__(self, curve=((60.0, 80.0, 100.0), (3.0, 0.0, -3.0)), false_accept=1e-3, false_reject=1e-2,
+                 max_llr=3.0, reference_interval=0.1, min_observations=3, half_life=2.0):
+        self.curve = curve
+        self.max_llr = max_llr
+        self.reference_interval = reference_interval
+        self.min_observations = min_observations
+        self.half_life = half_life
+        self.set_error_bounds(false_accept, false_reject)
+        self.reset()
+
+    def set_error_bounds(self, false_accept, false_reject):
+        self.false_accept = false_accept
+        self.false_reject = false_reject
+        self.upper = float(np.log((1 - false_reject) / false_accept))
+        self.lower = float(np.log(false_reject / (1 - false_accept)))
+
+    @staticmethod
+    def fit(genuine, impostor, bins=20):
+        """Curva (distancias, evidencias) a partir de distancias medidas de usuarios
+        legítimos y de impostores.
+
+        Cociente de histogramas con suavizado de Laplace entre los
+        percentiles 1 y 99 de ambas muestras; la curva se hace no creciente
+        (una distancia menor nunca aporta menos evidencia).
+        """
+        genuine = np.asarray(genuine, dtype=np.float64)
+        impostor = np.asarray(impostor, dtype=np.float64)
+        low, high = np.percentile(np.concatenate([genuine, impostor]), [1, 99])
+        edges = np.linspace(low, high, bins + 1)
+        genuine_counts = np.histogram(np.clip(genuine, low, high), edges)[0] + 1.0
+        impostor_counts = np.histogram(np.clip(impostor, low, high), edges)[0] + 1.0
+        values = np.log(genuine_counts / genuine_counts.sum()) - np.log(impostor_counts / impostor_counts.sum())
+        values = np.minimum.accumulate(values)
+        return tuple((edges[:-1] + edges[1:]) / 2), tuple(values)
+
+    def llr(self, distance):
+        distances, values = self.curve
+        return float(np.clip(np.interp(distance, distances, values), -self.max_llr, self.max_llr))
+
+    def reset(self):
+        self.scores = {}
+        self.observations = {}
+        self.last_time = None
+
+    def observe(self, label, distance, timestamp=None):
+        """Devuelve (decisión, etiqueta, progreso) con decisión 'accept', 'reject' o None.
+
+        progreso es la evidencia de la etiqueta relativa al umbral de
+        aceptación (1.0 = aceptar).
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self.last_time is None:
+            weight = 1.0
+        else:
+            elapsed = max(0.0, timestamp - self.last_time)
+            weight = min(elapsed, self.reference_interval) / self.reference_interval
+            decay = 0.5 ** (elapsed / self.half_life)
+            for key in self.scores:
+                self.scores[key] *= decay
+        self.last_time = timestamp
+
+        evidence = self.llr(distance) * weight
+        for key in self.scores:
+            if key != label:
+                self.scores[key] = max(self.lower, self.scores[key] - max(evidence, 0.0))
+        score = min(self.upper, max(self.lower, self.scores.get(label, 0.0) + evidence))
+        self.scores[label] = score
+        self.observations[label] = self.observations.get(label, 0) + 1
+
+        if score >= self.upper and self.observations[label] >= self.min_observations:
+            return 'accept', label, 1.0
+        if max(self.scores.values()) <= self.lower:
+            return 'reject', label, 0.0
+        return None, label, max(0.0, score / self.upper)
+
+
+class FaceTracks:
+    """Decisión de autenticación independiente para cada cara del frame.
+
+    Asocia las cajas de cada frame con las del anterior (centro más cercano,
+    a menos de max_shift anchos de caja) para que cada persona acumule su
+    propia evidencia. Cada pista usa una copia de 'template'
+    (EvidenceAccumulator o ConsecutiveRule); las que no se ven durante
+    max_age segundos se descartan.
+    """
+
+    def __init__(self, template, max_shift=0.5, max_age=1.0):
+        self.template = template
+        self.max_shift = max_shift
+        self.max_age = max_age
+        self.reset()
+
+    def reset(self):
+        self.tracks = {}  # id -> [caja, último tiempo, decisión]
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def assign(self, boxes, timestamp):
+        """Decisión de cada caja (en el mismo orden), creando pistas para las caras nuevas"""
+        for track_id in [t for t, (_, seen, _) in self.tracks.items() if timestamp - seen > self.max_age]:
+            del self.tracks[track_id]
+
+        # Emparejamiento voraz por distancia entre centros relativa al tamaño
+        pairs = []
+        for index, (x, y, w, h) in enumerate(boxes):
+            for track_id, ((tx, ty, tw, th), _, _) in self.tracks.items():
+                shift = np.hypot((x + w / 2) - (tx + tw / 2), (y + h / 2) - (ty + th / 2)) / max(w, tw)
+                if shift <= self.max_shift:
+                    pairs.append((shift, index, track_id))
+        assigned, used = {}, set()
+        for _, index, track_id in sorted(pairs):
+            if index not in assigned and track_id not in used:
+                assigned[index] = track_id
+                used.add(track_id)
+
+        decisions = []
+        for index, box in enumerate(boxes):
+            track_id = assigned.get(index)
+            if track_id is None:
+                track_id = self.next_id
+                self.next_id += 1
+                decision = copy.deepcopy(self.template)
+                decision.reset()
+                self.tracks[track_id] = [None, None, decision]
+            track = self.tracks[track_id]
+            track[0], track[1] = tuple(int(v) for v in box), timestamp
+            decisions.append(track[2])
+        return decisions
+
+
+class PipelineMetrics:
+    """Latencias por etapa del pipeline con ventana móvil.
+
+    Cada etapa guarda sus últimas 'window' duraciones medidas con
+    time.perf_counter; los percentiles p50/p95/p99 se calculan solo al
+    pedir el resumen, así que medir en el ciclo cuesta un append.
+    También registra FPS y el tiempo hasta eventos puntuales
+    (primer frame, primera predicción, decisión).
+    """
+
+    STAGES = ('capture', 'grayscale', 'detect', 'preprocess', 'predict', 'remote', 'overlay', 'emit')
+
+    def __init__(self, window=300):
+        self.window = window
+        self.samples = {stage: collections.deque(maxlen=window) for stage in self.STAGES}
+        self.frame_times = collections.deque(maxlen=window)
+        self.started_at = time.perf_counter()
+        self.events = {}
+
+    def record(self, stage, started):
+        """Registra la duración desde 'started' y devuelve el instante actual"""
+        now = time.perf_counter()
+        self.samples[stage].append(now - started)
+        return now
+
+    def add(self, stage, duration):
+        """Registra una duración medida fuera del ciclo (p. ej. en otro proceso)"""
+        self.samples[stage].append(duration)
+
+    def frame_done(self):
+        self.frame_times.append(time.perf_counter())
+
+    def mark_event(self, name):
+        """Guarda la primera vez que ocurre un evento, relativo al inicio"""
+        if name not in self.events:
+            self.events[name] = time.perf_counter() - self.started_at
+
+    def fps(self):
+        if len(self.frame_times) < 2:
+            return 0.0
+        elapsed = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        stages = {}
+        for stage, values in self.samples.items():
+            if not values:
+                continue
+            data = np.fromiter(values, dtype=np.float64) * 1000
+            p50, p95, p99 = np.percentile(data, (50, 95, 99))
+            stages[stage] = {
+                'count': len(data),
+                'mean_ms': round(float(data.mean()), 3),
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3),
+            }
+        return {
+            'fps': round(self.fps(), 2),
+            'stages': stages,
+            'events_s': {name: round(value, 3) for name, value in self.events.items()},
+        }
+
+    def format_report(self):
+        """Resumen legible para la ventana de debug"""
+        summary = self.summary()
+        lines = [f"FPS: {summary['fps']:.1f}"]
+        for stage, data in summary['stages'].items():
+            lines.append(f"{stage}: p50 {data['p50_ms']:.1f} / p95 {data['p95_ms']:.1f} / "
+                         f"p99 {data['p99_ms']:.1f} ms ({data['count']})")
+        for name, value in summary['events_s'].items():
+            lines.append(f"{name}: {value * 1000:.0f} ms")
+        return "\n".join(lines)
+
+    def dump_json(self, path, **extra):
+        """Escribe el resumen en JSON para comparar kioscos entre sí"""
+        data = {
+            'host': socket.gethostname(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            **extra,
+            **self.summary(),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return data
@@ -0,0 +1,272 @@
+"""
+Almacenamiento de datos faciales
+Factory I/O Controller System
+
+Las muestras de todos los usuarios se guardan en un único arreglo
+contiguo N×100×100 uint8 (faces_samples.dat) que se abre con np.memmap,
+y las etiquetas y nombres de usuario en un índice pequeño
+(faces_index.json). Así el entrenamiento y la gestión de usuarios leen
+rebanadas del arreglo sin copiarlo y sin deserializar todo el archivo.
+
+Opcionalmente el índice guarda, por usuario, qué muestras son sus
+prototipos (ver face_matcher.select_prototypes): el modelo se entrena solo
+con ellos mientras las muestras originales se conservan para auditoría.
+
+El formato anterior (faces_data.pkl, una lista de arreglos dentro de un
+pickle) se migra automáticamente la primera vez que se abre el almacén.
+"""
+
+import json
+import os
+import pickle
+
+import numpy as np
+
+SAMPLE_SHAPE = (100, 100)
+SAMPLE_SIZE = SAMPLE_SHAPE[0] * SAMPLE_SHAPE[1]
+INDEX_VERSION = 1
+
+
+class FaceStore:
+    """Almacén contiguo de muestras faciales con índice separado"""
+
+    def __init__(self, samples_file="faces_samples.dat", index_file="faces_index.json",
+                 legacy_file="faces_data.pkl"):
+        self.samples_file = samples_file
+        self.index_file = index_file
+        self.legacy_file = legacy_file
+        self.labels = []
+        self.usernames = {}
+        self.prototypes = {}  # label -> posiciones dentro de las muestras del usuario
+
+    @property
+    def count(self):
+        return len(self.labels)
+
+    def exists(self):
+        """Indica si hay datos guardados (en el formato nuevo o el anterior)"""
+        return os.path.exists(self.index_file) or os.path.exists(self.legacy_file)
+
+    def load_index(self):
+        """Lee el índice de etiquetas y usuarios; migra el pickle si hace falta"""
+        if not os.path.exists(self.index_file):
+            if os.path.exists(self.legacy_file):
+                self.migrate_legacy()
+            else:
+                self.labels = []
+                self.usernames = {}
+                self.prototypes = {}
+                return False
+
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        self.labels = list(index.get('labels', []))
+        self.usernames = {int(label): name for label, name in index.get('usernames', {}).items()}
+        self.prototypes = {int(label): list(offsets) for label, offsets in index.get('prototypes', {}).items()}
+        return True
+
+    def samples(self):
+        """Devuelve todas las muestras como memmap de solo lectura (N×100×100)"""
+        if self.count == 0:
+            return np.empty((0,) + SAMPLE_SHAPE, dtype=np.uint8)
+        return np.memmap(self.samples_file, dtype=np.uint8, mode='r',
+                         shape=(self.count,) + SAMPLE_SHAPE)
+
+    def sample_list(self):
+        """Lista de vistas 100×100 sobre el memmap, lista para cv2.face.train"""
+        return list(self.samples())
+
+    def labels_array(self):
+        return np.array(self.labels, dtype=np.int32)
+
+    def user_sample_count(self, label):
+        return self.labels.count(label)
+
+    def user_slice(self, label):
+        """Rango de muestras de un usuario (se guardan siempre contiguas)"""
+        positions = [i for i, value in enumerate(self.labels) if value == label]
+        if not positions:
+            return slice(0, 0)
+        return slice(positions[0], positions[-1] + 1)
+
+    def training_indices(self):
+        """Posiciones de las muestras con las que se entrena el modelo.
+
+        Para los usuarios con prototipos solo se toman esos; para el resto,
+        todas sus muestras.
+        """
+        indices = []
+        position = 0
+        while position < self.count:
+            label = self.labels[position]
+            end = position
+            while end < self.count and self.labels[end] == label:
+                end += 1
+            offsets = self.prototypes.get(label)
+            if offsets is None:
+                indices.extend(range(position, end))
+            else:
+                indices.extend(position + offset for offset in offsets if position + offset < end)
+            position = end
+        return np.array(indices, dtype=np.int64)
+
+    def training_set(self):
+        """(muestras, etiquetas) para entrenar el modelo, respetando los prototipos"""
+        indices = self.training_indices()
+        if len(indices) == self.count:
+            return self.samples(), self.labels_array()
+        return self.samples()[indices], self.labels_array()[indices]
+
+    def set_prototypes(self, label, offsets):
+        """Marca los prototipos de un usuario (posiciones relativas a sus muestras)"""
+        self.apply_prototypes({label: offsets})
+
+    def apply_prototypes(self, selection, keep_raw=True):
+        """Aplica los prototipos de varios usuarios (label -> posiciones relativas) de una vez.
+
+        Con keep_raw se marcan en el índice; si no, se descartan las demás
+        muestras de esos usuarios. En ambos casos el índice (y el arreglo)
+        se reescriben una sola vez, no una por usuario.
+        """
+        self.load_index()
+        if keep_raw:
+            for label, offsets in selection.items():
+                self.prototypes[label] = sorted(int(offset) for offset in offsets)
+            self._write_index()
+            return
+
+        keep = np.ones(self.count, dtype=bool)
+        for label, offsets in selection.items():
+            user = self.user_slice(label)
+            keep[user] = False
+            keep[[user.start + int(offset) for offset in offsets]] = True
+            self.prototypes.pop(label, None)
+        self._keep_samples(keep)
+
+    def clear_prototypes(self):
+        self.load_index()
+        self.prototypes = {}
+        self._write_index()
+
+    def compact_user(self, label, offsets):
+        """Conserva solo las muestras indicadas de un usuario (descarta las demás)"""
+        self.apply_prototypes({label: offsets}, keep_raw=False)
+
+    def next_label(self):
+        # max + 1 en lugar de len(): tras eliminar usuarios len() repetiría etiquetas
+        return max(self.usernames, default=-1) + 1
+
+    def append_user(self, username, faces):
+        """Agrega las muestras de un nuevo usuario al final del arreglo"""
+        self.load_index()
+        label = self.next_label()
+        batch = np.ascontiguousarray(np.asarray(faces, dtype=np.uint8).reshape((-1,) + SAMPLE_SHAPE))
+
+        # Solo se escriben las muestras nuevas; se descarta cualquier resto
+        # de una escritura interrumpida más allá de lo que indica el índice
+        mode = 'r+b' if os.path.exists(self.samples_file) else 'wb'
+        with open(self.samples_file, mode) as f:
+            f.seek(self.count * SAMPLE_SIZE)
+            f.truncate()
+            f.write(batch.tobytes())
+
+        self.labels.extend([label] * len(batch))
+        self.usernames[label] = username
+        self._write_index()
+        return label
+
+    def remove_user(self, label):
+        """Elimina las muestras de un usuario compactando el arreglo"""
+        self.load_index()
+        keep = np.array([value != label for value in self.labels], dtype=bool)
+        self.usernames.pop(label, None)
+        self.prototypes.pop(label, None)
+        self._keep_samples(keep)
+
+    def _keep_samples(self, keep):
+        """Reescribe el arreglo conservando solo las filas marcadas en keep"""
+        samples = self.samples()
+        tmp_file = self.samples_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            for start in range(0, len(samples), 1024):
+                chunk = samples[start:start + 1024][keep[start:start + 1024]]
+                f.write(np.ascontiguousarray(chunk).tobytes())
+        # Liberar el memmap antes de reemplazar el archivo (necesario en Windows)
+        del samples
+        os.replace(tmp_file, self.samples_file)
+
+        self.labels = [value for value, kept in zip(self.labels, keep) if kept]
+        self._write_index()
+
+    def migrate_legacy(self):
+        """Convierte faces_data.pkl al almacén contiguo (el pickle no se borra)"""
+        with open(self.legacy_file, 'rb') as f:
+            data = pickle.load(f)
+
+        faces = data.get('faces', [])
+        batch = np.ascontiguousarray(np.asarray(faces, dtype=np.uint8).reshape((-1,) + SAMPLE_SHAPE))
+        with open(self.samples_file, 'wb') as f:
+            f.write(batch.tobytes())
+
+        self.labels = [int(label) for label in data.get('labels', [])]
+        self.usernames = {int(label): name for label, name in data.get('usernames', {}).items()}
+        self.prototypes = {}
+        self._write_index()
+        print(f"✅ Datos migrados de {self.legacy_file} a {self.samples_file} ({len(batch)} muestras)")
+
+    def _write_index(self):
+        index = {
+            'version': INDEX_VERSION,
+            'sample_shape': list(SAMPLE_SHAPE),
+            'count': self.count,
+            'labels': self.labels,
+            'usernames': {str(label): name for label, name in self.usernames.items()},
+            'prototypes': {str(label): offsets for label, offsets in self.prototypes.items()},
+        }
+        tmp_file = self.index_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+
+class UserRegistry:
+    """Mapa residente label -> username cargado una sola vez desde disco.
+
+    El registro se mantiene válido comparando el mtime y el tamaño del
+    índice del almacén: solo se vuelve a leer cuando el archivo cambió.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or FaceStore()
+        self.usernames = {}
+        self._stamp = None
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.store.index_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self):
+        """Recarga el mapa si el índice cambió desde la última lectura"""
+        stamp = self._file_stamp()
+        if stamp == self._stamp and stamp is not None:
+            return False
+
+        self.store.load_index()
+        self.update(self.store.usernames)
+        return True
+
+    def update(self, usernames):
+        """Fija el mapa a partir de datos ya leídos del índice"""
+        self.usernames = dict(usernames)
+        self._stamp = self._file_stamp()
+
+    def get(self, label, default="Desconocido"):
+        """Búsqueda O(1) del username asociado a un label"""
+        return self.usernames.get(label, default)
+
+    def __len__(self):
+        return len(self.usernames)
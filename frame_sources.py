@@ -0,0 +1,233 @@
+"""
+Fuentes de frames para el pipeline de reconocimiento facial
+Factory I/O Controller System
+
+Todas las fuentes exponen la misma interfaz que cv2.VideoCapture
+(isOpened / read / release), de modo que CaptureWorker y
+FaceRecognitionThread funcionan igual con una cámara, un video, una
+carpeta de imágenes o frames sintéticos. Las fuentes que no son en vivo
+(live = False) se reproducen sin perder frames y terminan al agotarse,
+lo que permite medir el pipeline en servidores sin cámara.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+from face_storage import FaceStore
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class FrameSource:
+    """Interfaz común de las fuentes de frames"""
+
+    live = False    # True: los frames se descartan si el análisis no alcanza
+    mirror = True   # Aplicar efecto espejo como con la cámara
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    """Cámara en vivo identificada por su índice"""
+
+    live = True
+
+    def __init__(self, index=0):
+        self.index = index
+        self.capture = cv2.VideoCapture(index)
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def read(self):
+        return self.capture.read()
+
+    def set(self, prop, value):
+        return self.capture.set(prop, value)
+
+    def get(self, prop):
+        return self.capture.get(prop)
+
+    def release(self):
+        self.capture.release()
+
+
+class VideoFileSource(FrameSource):
+    """Archivo de video grabado desde un kiosco"""
+
+    def __init__(self, path, loop=False):
+        self.path = path
+        self.loop = loop
+        self.capture = cv2.VideoCapture(path)
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def read(self):
+        ret, frame = self.capture.read()
+        if not ret and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.capture.read()
+        return ret, frame
+
+    def release(self):
+        self.capture.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Carpeta de imágenes reproducidas en orden alfabético"""
+
+    def __init__(self, path, loop=False):
+        self.path = path
+        self.loop = loop
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.position = 0
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def read(self):
+        if self.position >= len(self.files):
+            if not self.loop or not self.files:
+                return False, None
+            self.position = 0
+        frame = cv2.imread(self.files[self.position])
+        self.position += 1
+        return frame is not None, frame
+
+
+def warp_face(face, angle, scale, tx, ty):
+    """Gira y escala una muestra alrededor de su centro y la desplaza (tx, ty) píxeles"""
+    h, w = face.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, scale)
+    matrix[:, 2] += (tx, ty)
+    return cv2.warpAffine(face, matrix, (w, h), borderMode=cv2.BORDER_REFLECT)
+
+
+def jitter_face(face, rng, strength=1.0):
+    """Variación aleatoria de una muestra: desplazamiento, giro, brillo y ruido"""
+    angle = rng.uniform(-8, 8) * strength
+    scale = 1.0 + rng.uniform(-0.06, 0.06) * strength
+    tx, ty = rng.uniform(-4, 4, size=2) * strength
+    out = warp_face(face, angle, scale, tx, ty)
+    out = out.astype(np.float32) * rng.uniform(0.85, 1.15) + rng.normal(0, 4 * strength, out.shape)
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+class SyntheticSource(FrameSource):
+    """Frames generados con caras de muestras guardadas en posiciones conocidas.
+
+    Los frames se agrupan en escenas de scene_length frames; en cada escena
+    aparecen faces_per_frame identidades que se desplazan poco a poco, como
+    una persona frente al kiosco. last_boxes y last_labels guardan la verdad
+    de referencia del último frame leído. n_frames = None genera sin fin.
+    """
+
+    mirror = False
+
+    def __init__(self, n_frames=300, size=(640, 480), faces_per_frame=1, face_sizes=(160, 260),
+                 samples=None, labels=None, scene_length=30, seed=0):
+        if samples is None:
+            store = FaceStore()
+            store.load_index()
+            samples, labels = np.array(store.samples()), store.labels_array()
+        if labels is None:
+            labels = np.zeros(len(samples), dtype=np.int32)
+        if len(samples) == 0:
+            raise ValueError("No hay muestras para generar frames sintéticos")
+
+        self.samples = samples
+        self.labels = np.asarray(labels)
+        self.n_frames = n_frames
+        self.size = size
+        self.faces_per_frame = faces_per_frame
+        self.face_sizes = face_sizes
+        self.scene_length = scene_length
+        self.rng = np.random.default_rng(seed)
+        self.position = 0
+        self.scene = []
+        self.last_boxes = np.empty((0, 4), dtype=np.int32)
+        self.last_labels = np.empty(0, dtype=np.int32)
+
+        width, height = size
+        noise = self.rng.normal(0, 30, (max(1, height // 8), max(1, width // 8))).astype(np.float32)
+        background = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC) + 120
+        self.background = np.clip(background, 0, 255).astype(np.uint8)
+
+    def _new_scene(self):
+        width, height = self.size
+        identities = np.unique(self.labels)
+        self.scene = []
+        for _ in range(self.faces_per_frame):
+            for _ in range(20):
+                side = int(self.rng.integers(self.face_sizes[0], self.face_sizes[1] + 1))
+                x = int(self.rng.integers(0, max(1, width - side)))
+                y = int(self.rng.integers(0, max(1, height - side)))
+                if all(x + side <= sx or sx + ss <= x or y + side <= sy or sy + ss <= y
+                       for sx, sy, ss, _, _ in self.scene):
+                    break
+            else:
+                continue
+            label = int(self.rng.choice(identities))
+            drift = self.rng.uniform(-2, 2, size=2)
+            self.scene.append((x, y, side, label, drift))
+
+    def read(self):
+        if self.n_frames is not None and self.position >= self.n_frames:
+            return False, None
+        if self.position % self.scene_length == 0:
+            self._new_scene()
+
+        width, height = self.size
+        step = self.position % self.scene_length
+        frame = self.background.copy()
+        boxes, labels = [], []
+        for x, y, side, label, drift in self.scene:
+            x = int(np.clip(x + drift[0] * step, 0, width - side))
+            y = int(np.clip(y + drift[1] * step, 0, height - side))
+            candidates = np.flatnonzero(self.labels == label)
+            face = jitter_face(self.samples[self.rng.choice(candidates)], self.rng, strength=0.5)
+            frame[y:y + side, x:x + side] = cv2.resize(face, (side, side), interpolation=cv2.INTER_LINEAR)
+            boxes.append((x, y, side, side))
+            labels.append(label)
+
+        self.position += 1
+        self.last_boxes = np.array(boxes, dtype=np.int32).reshape(-1, 4)
+        self.last_labels = np.array(labels, dtype=np.int32)
+        return True, cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+
+def open_frame_source(spec=0):
+    """Crea una fuente a partir de una especificación.
+
+    - entero o "0", "1"...: cámara en vivo
+    - "synthetic" o "synthetic:N": N frames sintéticos (300 por defecto)
+    - carpeta: imágenes en orden alfabético
+    - cualquier otro archivo: video
+    - función sin argumentos: se llama para crear la fuente (en el hilo que la abre)
+    Si spec ya es una fuente (o un cv2.VideoCapture) se devuelve tal cual.
+    """
+    if callable(spec):
+        return spec()
+    if not isinstance(spec, (int, str)):
+        return spec
+    if isinstance(spec, int) or spec.isdigit():
+        return CameraSource(int(spec))
+    if spec.startswith("synthetic"):
+        _, _, count = spec.partition(":")
+        return SyntheticSource(n_frames=int(count) if count else 300)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec)
+    return VideoFileSource(spec)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Ejecución sin interfaz del pipeline de reconocimiento facial
+Factory I/O Controller System
+
+Reproduce una fuente de frames (video, carpeta de imágenes o frames
+sintéticos) a máxima velocidad a través de FaceRecognitionThread, en modo
+registro o autenticación, y reporta throughput, decisiones y latencias por
+etapa. Permite medir y comparar rendimiento en servidores sin cámara.
+
+Ejemplos:
+    python headless_runner.py --modo register --usuario bench --fuente synthetic:120 --datos /tmp/bench
+    python headless_runner.py --modo authenticate --fuente synthetic:600 --datos /tmp/bench
+    python headless_runner.py --modo authenticate --fuente grabaciones/kiosco1.mp4 --json resultado.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from PyQt5.QtCore import QCoreApplication
+
+from face_detectors import DETECTOR_NAMES, HAAR_CASCADE_FILE, detector_availability
+from frame_sources import open_frame_source
+
+
+def run_session(login, args, source, cascade_file, pool=None):
+    """Ejecuta un FaceRecognitionThread en el hilo actual hasta que termine"""
+    thread = login.FaceRecognitionThread(args.modo, args.usuario, source=source, engine=args.motor)
+    thread.release_source = False
+    thread.face_detector = login.load_detector(args.detector, cascade_file or login.CASCADE_FILE,
+                                               threads=args.hilos_detector, workers=args.hilos_deteccion)
+    thread.detection_scale = args.escala
+    thread.motion_gate.threshold = args.umbral_movimiento
+    thread.prototypes_per_user = args.prototipos
+    thread.descriptor_dtype = args.descriptor
+    if args.regla == "consecutiva":
+        thread.auth_decision = login.ConsecutiveRule()
+    thread.multi_face = not args.una_cara
+    thread.recognition_pool = pool
+
+    results = []
+    thread.authentication_result.connect(lambda ok, message: results.append((ok, message)))
+
+    started = time.perf_counter()
+    thread.run()  # Sin start(): se ejecuta sincrónicamente y a máxima velocidad
+    elapsed = time.perf_counter() - started
+
+    return {
+        'results': results,
+        'elapsed_s': round(elapsed, 3),
+        'frames': thread.frames_processed,
+        'pipeline': thread.get_pipeline_stats(),
+        'metrics': thread.metrics.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modo", choices=["authenticate", "register"], default="authenticate")
+    parser.add_argument("--usuario", help="nombre del usuario a registrar (modo register)")
+    parser.add_argument("--fuente", default="synthetic:300",
+                        help="video, carpeta de imágenes o synthetic[:N]")
+    parser.add_argument("--datos", help="carpeta de trabajo con faces_samples.dat / face_model.xml")
+    parser.add_argument("--cascada", help="ruta a la cascada Haar (por defecto la del repositorio)")
+    parser.add_argument("--detector", choices=DETECTOR_NAMES, default="haar",
+                        help="detector de caras (ver face_detectors.py)")
+    parser.add_argument("--hilos-detector", type=int, default=1, help="hilos de OpenCV del detector dnn")
+    parser.add_argument("--hilos-deteccion", type=int, default=1,
+                        help="hilos entre los que se reparte la pirámide de la cascada (1 = sin dividir)")
+    parser.add_argument("--motor", choices=["opencv", "numpy"], default="numpy",
+                        help="motor de autenticación")
+    parser.add_argument("--escala", type=float, default=1.0, help="escala de detección")
+    parser.add_argument("--umbral-movimiento", type=float, default=0.0,
+                        help="umbral de la compuerta de movimiento (0 = analizar todo)")
+    parser.add_argument("--prototipos", type=int, default=0,
+                        help="en registro, prototipos por usuario para el modelo (0 = todas las muestras)")
+    parser.add_argument("--descriptor", choices=["uint8", "float16", "float32"], default="uint8",
+                        help="tipo de los histogramas en face_model.bin")
+    parser.add_argument("--regla", choices=["evidencia", "consecutiva"], default="evidencia",
+                        help="decisión de autenticación: evidencia acumulada o 3 predicciones seguidas")
+    parser.add_argument("--una-cara", action="store_true",
+                        help="autenticar solo frames con una única cara (sin modo de varias caras)")
+    parser.add_argument("--procesos", type=int, default=0,
+                        help="en autenticación, procesos de reconocimiento con memoria compartida (0 = en el hilo)")
+    parser.add_argument("--repetir", action="store_true",
+                        help="en autenticación, seguir con la fuente después de cada decisión")
+    parser.add_argument("--json", help="guardar el reporte en este archivo")
+    args = parser.parse_args()
+
+    if args.modo == "register" and not args.usuario:
+        parser.error("--usuario es obligatorio en modo register")
+
+    cascade_file = os.path.abspath(args.cascada) if args.cascada else None
+    json_file = os.path.abspath(args.json) if args.json else None
+
+    # Medir Haar con el nombre de otro detector falsearía el reporte
+    missing = detector_availability(cascade_file or HAAR_CASCADE_FILE)[args.detector]
+    if missing:
+        print(f"❌ Detector '{args.detector}' no disponible, faltan: {', '.join(missing)}")
+        sys.exit(1)
+
+    # La fuente se abre antes de cambiar de carpeta: los frames sintéticos
+    # usan las muestras guardadas en la carpeta del proyecto
+    source = open_frame_source(args.fuente)
+    if not source.isOpened():
+        print(f"❌ No se pudo abrir la fuente: {args.fuente}")
+        sys.exit(1)
+
+    if args.datos:
+        os.makedirs(args.datos, exist_ok=True)
+        os.chdir(args.datos)
+
+    app = QCoreApplication(sys.argv)
+    import login
+
+    pool = None
+    if args.procesos > 0 and args.modo == "authenticate":
+        pool = login.RecognitionPool(args.procesos, cascade_file=cascade_file or login.CASCADE_FILE,
+                                     detector=args.detector, detector_threads=args.hilos_detector,
+                                     detection_workers=args.hilos_deteccion,
+                                     engine=args.motor, detection_scale=args.escala)
+        pool.start()
+
+    sessions = []
+    started = time.perf_counter()
+    while True:
+        session = run_session(login, args, source, cascade_file, pool)
+        sessions.append(session)
+        decided = any(ok for ok, _ in session['results'])
+        if not (args.repetir and decided and args.modo == "authenticate"):
+            break
+    elapsed = time.perf_counter() - started
+    source.release()
+    if pool is not None:
+        print(f"🧵 Procesos de reconocimiento: {pool.get_stats()}")
+        pool.close()
+
+    frames = sum(session['frames'] for session in sessions)
+    decisions = [result for session in sessions for result in session['results']]
+    report = {
+        'mode': args.modo,
+        'source': args.fuente,
+        'frames': frames,
+        'elapsed_s': round(elapsed, 3),
+        'throughput_fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        'decisions': [{'success': ok, 'message': message} for ok, message in decisions],
+        'time_to_decision_s': [session['metrics']['events_s'].get('decision') for session in sessions
+                               if 'decision' in session['metrics']['events_s']],
+        'sessions': sessions,
+    }
+
+    print()
+    print(f"📊 Frames analizados: {frames} en {elapsed:.2f} s ({report['throughput_fps']:.1f} FPS)")
+    print(f"🔐 Decisiones: {len(decisions)}")
+    for ok, message in decisions:
+        print(f"   - {'✅' if ok else '❌'} {message}")
+    for stage, data in sessions[-1]['metrics']['stages'].items():
+        print(f"   ⏱️ {stage}: p50 {data['p50_ms']:.2f} ms / p95 {data['p95_ms']:.2f} ms")
+
+    if json_file:
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Reporte guardado en {json_file}")
+
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,198 +1,612 @@
 import sys
+import copy
 import cv2
 import numpy as np
-import pickle
 import os
+import threading
+import time
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QHBoxLayout, QPushButton, QLabel, QLineEdit, 
                             QFrame, QMessageBox, QProgressBar, QTabWidget,
                             QGridLayout, QFileDialog, QListWidget, QListWidgetItem)
 from PyQt5.QtCore import QTimer, QThread, pyqtSignal, Qt
-from PyQt5.QtGui import QFont, QPixmap, QIcon, QImage
+from PyQt5.QtGui import QFont, QPixmap, QIcon, QImage, QPainter, QPen, QColor
 from PyQt5.QtCore import QSettings
+from face_storage import FaceStore, UserRegistry
+from face_detectors import HAAR_CASCADE_FILE, detector_image, load_detector, resolve_detector
+from face_matcher import IVFIndex, LBPHMatcher, read_recognizer, save_recognizer, select_prototypes
+from frame_sources import open_frame_source
+from model_cache import MODEL_CACHE
+from recognition_pool import RecognitionPool
+from face_pipeline import (CameraService, CaptureWorker, ConsecutiveRule, EnrollmentGate, EvidenceAccumulator,
+                           FaceTracker, FaceTracks, FrameRingBuffer, MotionGate, PipelineMetrics, preprocess_face)
+
+# Indicaciones en pantalla cuando la compuerta de registro rechaza una cara
+ENROLLMENT_HINTS = {
+    'blur': "Imagen movida, quedate quieto",
+    'exposure': "Iluminacion insuficiente",
+    'similar': "Gira un poco la cabeza",
+}
+
+# Índice ANN del motor NumPy (ver face_matcher.IVFIndex)
+ANN_INDEX_FILE = "face_ann.npz"
+
+# Copia binaria del modelo que carga el motor NumPy en milisegundos;
+# face_model.xml se sigue escribiendo para el motor OpenCV
+MODEL_BINARY_FILE = "face_model.bin"
+
+# Cascada Haar de detección incluida en el repositorio; se parsea una vez
+# por proceso (ver model_cache.py). Otros detectores en face_detectors.py
+CASCADE_FILE = HAAR_CASCADE_FILE
+
+# Formato nativo para los frames BGR de OpenCV (Qt >= 5.14); evita la copia a RGB
+DISPLAY_FORMAT = getattr(QImage, 'Format_BGR888', QImage.Format_RGB888)
+
+class OverlayLayer:
+    """Anotaciones (rectángulos y textos) en coordenadas del frame.
+
+    Se guardan como una lista de elementos y se dibujan con QPainter sobre
+    la imagen ya escalada al tamaño de la interfaz, en lugar de pintarlas
+    con cv2 sobre el frame de resolución completa. Los colores son BGR
+    como en cv2.
+    """
+    
+    def __init__(self):
+        self.items = []
+        
+    def rectangle(self, pt1, pt2, color, thickness=2):
+        self.items.append(('rect', pt1, pt2, color, thickness))
+        
+    def text(self, text, org, font_scale, color, thickness=2):
+        self.items.append(('text', text, org, font_scale, color, thickness))
+        
+    def paint(self, image, scale):
+        """Dibuja la capa sobre un QImage escalado por 'scale' respecto al frame"""
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        font = QFont("Arial")
+        for item in self.items:
+            b, g, r = item[3] if item[0] == 'rect' else item[4]
+            if item[0] == 'rect':
+                _, (x1, y1), (x2, y2), _, thickness = item
+                painter.setPen(QPen(QColor(r, g, b), thickness))
+                painter.drawRect(int(x1 * scale), int(y1 * scale),
+                                 int((x2 - x1) * scale), int((y2 - y1) * scale))
+            else:
+                _, text, (x, y), font_scale, _, _ = item
+                # Tamaño equivalente a FONT_HERSHEY_SIMPLEX (~30 px por unidad de escala)
+                font.setPixelSize(max(10, int(30 * font_scale * scale)))
+                painter.setFont(font)
+                painter.setPen(QColor(r, g, b))
+                painter.drawText(int(x * scale), int(y * scale), text)
+        painter.end()
+        
+    def draw_cv2(self, frame):
+        """Dibuja la capa directamente sobre el frame (para consumidores de frame_ready)"""
+        for item in self.items:
+            if item[0] == 'rect':
+                _, pt1, pt2, color, thickness = item
+                cv2.rectangle(frame, pt1, pt2, color, thickness)
+            else:
+                _, text, org, font_scale, color, thickness = item
+                cv2.putText(frame, text, org, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
+
+def render_display_image(frame, overlay, display_size=None):
+    """Escala el frame a display_size (ancho, alto) y dibuja la capa de anotaciones"""
+    height, width = frame.shape[:2]
+    scale = 1.0
+    if display_size:
+        scale = min(display_size[0] / width, display_size[1] / height)
+    target_w, target_h = max(1, int(width * scale)), max(1, int(height * scale))
+    
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+    small = cv2.resize(frame, (target_w, target_h), interpolation=interpolation)
+    if DISPLAY_FORMAT == QImage.Format_RGB888:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    
+    # Escribir directamente en el búfer del QImage (propiedad de Qt)
+    image = QImage(target_w, target_h, DISPLAY_FORMAT)
+    buffer = image.bits()
+    buffer.setsize(image.byteCount())
+    pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(target_h, image.bytesPerLine())
+    pixels[:, :target_w * 3] = small.reshape(target_h, target_w * 3)
+    
+    overlay.paint(image, scale)
+    return image
+
+class PreviewThread(QThread):
+    """Vista previa suscrita al FrameBus de la cámara compartida.
+
+    Muestra cada frame nuevo de la cámara a su propio ritmo, sin esperar al
+    reconocimiento: dibuja encima la última capa de anotaciones publicada
+    por FaceRecognitionThread (overlay), que puede ser de un frame
+    anterior. Si la interfaz no alcanza a mostrar las imágenes se descartan,
+    y la cámara nunca espera a ninguno de los dos consumidores.
+    """
+    image_ready = pyqtSignal(QImage)
+    
+    def __init__(self, camera_service, mode="authenticate"):
+        super().__init__()
+        self.camera_service = camera_service
+        self.mode = mode
+        self.running = False
+        self.display_size = None
+        self.overlay = None  # Última OverlayLayer del reconocimiento
+        self.subscription = None
+        self.max_pending_display = 2
+        self.frames_pending_display = 0
+        self.frames_displayed = 0
+        self.display_dropped = 0
+        
+    def run(self):
+        self.running = True
+        self.subscription = self.camera_service.attach()
+        if self.subscription is None:
+            return  # El reconocimiento informa el error de la cámara
+        
+        while self.running:
+            item = self.subscription.get_latest(timeout=0.5)
+            if item is None:
+                if self.subscription.closed:
+                    break
+                continue
+            if self.frames_pending_display >= self.max_pending_display:
+                self.display_dropped += 1
+                continue
+            self.frames_pending_display += 1
+            self.frames_displayed += 1
+            self.image_ready.emit(render_display_image(item[2], self.overlay or OverlayLayer(), self.display_size))
+            
+        self.camera_service.detach(self.subscription)
+        
+    def frame_displayed(self):
+        """La interfaz confirma que terminó de mostrar un frame emitido"""
+        self.frames_pending_display = max(0, self.frames_pending_display - 1)
+        
+    def stop(self):
+        self.running = False
+        self.quit()
+        self.wait()
+        
+    def get_stats(self):
+        return {
+            'preview_frames': self.frames_displayed,
+            'preview_skipped': self.subscription.dropped if self.subscription else 0,
+            'display_queue_depth': self.frames_pending_display,
+            'display_dropped': self.display_dropped,
+        }
 
 class FaceRecognitionThread(QThread):
     authentication_result = pyqtSignal(bool, str)
-    frame_ready = pyqtSignal(np.ndarray)
+    frame_ready = pyqtSignal(np.ndarray)  # Frame completo anotado (solo si hay receptores)
+    image_ready = pyqtSignal(QImage)      # Imagen ya escalada para la interfaz
+    ready = pyqtSignal()                  # Cámara abierta y modelo cargado
     
-    def __init__(self, mode="authenticate", username=None):
+    def __init__(self, mode="authenticate", username=None, source=0, engine="numpy"):
         super().__init__()
         self.mode = mode  # "authenticate", "register", "capture"
         self.username = username
         self.running = False
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        
+        # Fuente de frames: índice de cámara, video, carpeta de imágenes,
+        # "synthetic" o un objeto FrameSource (ver frame_sources.py)
+        self.source = source
+        self.release_source = True
+        # Detector (ver face_detectors.py) y modelo salen de la caché del proceso:
+        # reiniciar la cámara no vuelve a parsear los archivos mientras no cambien
+        self.face_detector = load_detector('haar', CASCADE_FILE)
         self.face_recognizer = cv2.face.LBPHFaceRecognizer_create()
-        self.faces_data_file = "faces_data.pkl"
+        self.face_store = FaceStore()
         self.model_file = "face_model.xml"
+        self.model_binary_file = MODEL_BINARY_FILE
+        # Tipo de los histogramas en face_model.bin: uint8 (conteos por celda,
+        # exacto y 4 veces más pequeño), float16 o float32
+        self.descriptor_dtype = "uint8"
+        self.user_registry = UserRegistry(self.face_store)
+        
+        # Motor de autenticación: "opencv" (LBPHFaceRecognizer.predict) o
+        # "numpy" (LBPHMatcher: mismas distancias, búsqueda vectorizada)
+        self.recognition_engine = engine
+        self.matcher = None
+        
+        # Índice ANN del motor NumPy (se reconstruye en rebuild_model):
+        # listas visitadas por consulta, 0 = búsqueda exacta
+        self.ann_index_file = ANN_INDEX_FILE
+        self.ann_nprobe = 16
         self.capture_count = 0
-        self.max_captures = 30
+        self.max_captures = 15
         self.model_loaded = False
         
+        # Compuerta de registro: solo se guardan caras nítidas, bien
+        # expuestas y distintas de las ya capturadas. Si tras
+        # max_register_candidates caras no se llega a max_captures, se
+        # guardan las aceptadas siempre que sean al menos min_captures
+        self.enrollment_gate = EnrollmentGate()
+        
+        # Decisión de autenticación: evidencia acumulada entre frames
+        # (EvidenceAccumulator) o la regla de 3 predicciones seguidas < 80
+        self.auth_decision = EvidenceAccumulator()
+        # Varias caras: todas las del frame se reconocen en un solo lote y
+        # cada una acumula su propia evidencia (FaceTracks); False = solo
+        # se autentica cuando hay exactamente una cara
+        self.multi_face = True
+        self.face_tracks = FaceTracks(self.auth_decision)
+        self.min_captures = 5
+        self.max_register_candidates = 150
+        
+        # Compactación por prototipos: el modelo usa solo k medoides por
+        # usuario (0 = todas las muestras); keep_raw_samples conserva las
+        # muestras originales en el almacén para auditoría
+        self.prototypes_per_user = 0
+        self.keep_raw_samples = True
+        
+        # Pipeline desacoplado: la captura corre en su propio hilo y el
+        # análisis siempre toma el frame más reciente
+        self.frame_buffer_size = 2
+        self.replay_fps = 30.0  # FPS nominales de videos y carpetas de imágenes
+        self.max_pending_display = 2
+        self.frame_buffer = None
+        self.capture_worker = None
+        # La captura de la cámara compartida cuenta todos sus frames: la
+        # sesión reporta solo los capturados entre attach y detach
+        self.captured_at_start = 0
+        self.captured_at_end = None
+        # Cámara compartida de LoginWindow (ver face_pipeline.CameraService);
+        # sin ella cada sesión abre y cierra su propia fuente
+        self.camera_service = None
+        # Con una PreviewThread suscrita a la misma cámara este hilo solo
+        # analiza y le publica sus anotaciones; sin ella también dibuja
+        self.preview = None
+        # Procesos de reconocimiento de LoginWindow (ver recognition_pool.py);
+        # con ellos la autenticación no detecta ni predice en este proceso
+        self.recognition_pool = None
+        self.pool_faces = np.empty((0, 4), dtype=np.int32)
+        self.pool_seq = -1
+        self.frames_processed = 0
+        self.frames_pending_display = 0
+        self.display_dropped = 0
+        self.last_frame_age = 0.0
+        
+        # Tamaño (ancho, alto) del QLabel de destino; la imagen se escala aquí
+        # para que el hilo de la interfaz solo tenga que mostrarla
+        self.display_size = None
+        
+        # Escala de detección: la cascada corre sobre una imagen reducida
+        # (1.0 = resolución completa) y las cajas se mapean de vuelta
+        self.detection_scale = 1.0
+        
+        # Seguimiento entre detecciones: ventana local durante N frames
+        self.face_tracker = FaceTracker(redetect_interval=10)
+        
+        # Compuerta de movimiento: en escenas estáticas no se detecta ni
+        # se predice, pero la vista previa se sigue actualizando
+        self.motion_gate = MotionGate(threshold=3.0, recheck_interval=1.0)
+        
+        # Latencias por etapa (p50/p95/p99) y tiempo hasta la decisión,
+        # medido desde que se crea el hilo (el clic en la interfaz)
+        self.metrics = PipelineMetrics()
+        self.metrics_file = "face_metrics.json"
+        
         # Configuración mejorada del reconocedor
         self.face_recognizer.setThreshold(100.0)  # Aumentar el umbral para ser menos restrictivo
         
-        # Cargar modelo si existe y estamos en modo authenticate
-        if mode == "authenticate":
+        # El modelo se carga en run(), en paralelo con la apertura de la
+        # cámara, para no bloquear la interfaz al pulsar "Iniciar"
+        self.model_loader = None
+        
+    def start_model_loader(self):
+        """Carga el modelo (modo authenticate) en un hilo auxiliar"""
+        if self.mode != "authenticate" or self.model_loaded:
+            return
+        
+        def load():
             self.load_model()
+            self.metrics.mark_event('model_ready')
+            
+        self.model_loader = threading.Thread(target=load, name="model-loader", daemon=True)
+        self.model_loader.start()
+        
+    def model_loading(self):
+        return self.model_loader is not None and self.model_loader.is_alive()
         
     def run(self):
         self.running = True
-        cap = cv2.VideoCapture(0)
-        
-        if not cap.isOpened():
-            self.authentication_result.emit(False, "No se pudo acceder a la cámara")
-            return
+        self.start_model_loader()
+        if self.camera_service is not None:
+            # La cámara ya suele estar abierta: solo se conecta esta sesión
+            cap = None
+            self.frame_buffer = self.camera_service.attach(self.metrics)
+            self.metrics.mark_event('camera_open')
+            if self.frame_buffer is None:
+                self.authentication_result.emit(False, "No se pudo acceder a la cámara")
+                return
+            self.capture_worker = self.camera_service.worker
+            self.captured_at_start = self.capture_worker.frames_captured
+            live_source = self.capture_worker.live
+        else:
+            cap = open_frame_source(self.source)
+            self.metrics.mark_event('camera_open')
+            
+            if not cap.isOpened():
+                self.authentication_result.emit(False, "No se pudo acceder a la cámara")
+                return
+                
+            # Productor: lee la cámara sin esperar al análisis
+            self.frame_buffer = FrameRingBuffer(self.frame_buffer_size)
+            self.capture_worker = CaptureWorker(cap, self.frame_buffer, metrics=self.metrics)
+            self.capture_worker.start()
+            
+            # Con fuentes grabadas se analizan todos los frames, en orden
+            live_source = getattr(cap, 'live', True)
+        
+        # Con la cámara, la vista previa arranca aunque el modelo siga
+        # cargando; "ready" se emite cuando ambas cosas terminaron. Las
+        # fuentes grabadas esperan al modelo para analizar todos sus frames
+        # y dar el mismo resultado en cada ejecución
+        if not live_source and self.model_loader is not None:
+            self.model_loader.join()
+        ready_emitted = False
             
         captured_faces = []
-        auth_attempts = 0
-        max_auth_attempts = 10  # Múltiples intentos de autenticación
+        self.enrollment_gate.reset()
+        self.auth_decision.reset()
+        # La regla puede haberse cambiado tras crear el hilo (configure_face_thread)
+        self.face_tracks = FaceTracks(self.auth_decision)
+        # Resultados del pool de sesiones anteriores se ignoran; si los procesos
+        # murieron, se vuelve a analizar en este hilo
+        pooled = (self.mode == "authenticate" and self.recognition_pool is not None
+                  and self.recognition_pool.is_running())
+        if pooled:
+            self.pool_seq = self.recognition_pool.next_seq - 1
+            self.pool_faces = np.empty((0, 4), dtype=np.int32)
         
-        while self.running:
-            ret, frame = cap.read()
-            if not ret:
-                continue
+        try:
+            while self.running:
+                if live_source:
+                    item = self.frame_buffer.get_latest(timeout=0.5)
+                else:
+                    item = self.frame_buffer.get_next(timeout=0.5)
+                if item is None:
+                    if self.frame_buffer.closed:
+                        break  # La fuente se agotó
+                    continue
                 
-            # Voltear horizontalmente para efecto espejo
-            frame = cv2.flip(frame, 1)
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                _, captured_at, frame = item
+                self.last_frame_age = time.monotonic() - captured_at
+                # Las fuentes grabadas se analizan más rápido que en tiempo real:
+                # su tiempo es el del frame dentro de la grabación
+                frame_time = captured_at if live_source else self.frames_processed / self.replay_fps
+                self.frames_processed += 1
+                self.metrics.mark_event('first_frame')
+                if not ready_emitted and not self.model_loading():
+                    ready_emitted = True
+                    self.metrics.mark_event('ready')
+                    self.ready.emit()
+                overlay = OverlayLayer()
             
-            # Mejorar la detección de rostros
-            faces = self.face_cascade.detectMultiScale(
-                gray, 
-                scaleFactor=1.1,  # Más sensible
-                minNeighbors=4,   # Menos restrictivo
-                minSize=(80, 80)  # Tamaño mínimo de cara
-            )
+                if self.mode == "authenticate" and self.model_loading():
+                    # Cámara sin modelo todavía: solo vista previa, y la carga no
+                    # compite con la detección por la CPU
+                    overlay.text("Cargando modelo...", (10, 30), 0.8, (255, 255, 0), 2)
+                    faces = ()
+                elif pooled:
+                    faces = self.analyze_in_pool(frame, frame_time, overlay, wait=not live_source)
+                    if faces is None:
+                        pooled = False  # El pool falló: el resto de la sesión se analiza en este hilo
+                        faces = ()
+                elif self.motion_gate.should_analyze(frame):
+                    started = time.perf_counter()
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    started = self.metrics.record('grayscale', started)
+                
+                    # Mejorar la detección de rostros
+                    faces = self.face_tracker.detect(
+                        self.face_detector,
+                        detector_image(self.face_detector, frame, gray),
+                        detection_scale=self.detection_scale,
+                        scale_factor=1.1,  # Más sensible
+                        min_neighbors=4,   # Menos restrictivo
+                        min_size=(80, 80)  # Tamaño mínimo de cara (en resolución completa)
+                    )
+                    self.metrics.record('detect', started)
+                    if len(faces) > 0:
+                        self.motion_gate.mark_activity()
+                else:
+                    # Escena estática: solo se actualiza la vista previa
+                    faces = ()
             
-            for (x, y, w, h) in faces:
-                # Dibujar rectángulo alrededor de la cara
-                color = (0, 255, 0) if self.mode == "authenticate" else (255, 0, 0)
-                cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+                if self.mode == "authenticate" and self.multi_face and len(faces) > 0 and not pooled:
+                    if self.authenticate_faces(gray, faces, frame_time, overlay):
+                        self.running = False
+            
+                for (x, y, w, h) in faces:
+                    # Dibujar rectángulo alrededor de la cara
+                    color = (0, 255, 0) if self.mode == "authenticate" else (255, 0, 0)
+                    overlay.rectangle((x, y), (x+w, y+h), color, 2)
                 
-                if self.mode == "register" and len(faces) == 1:
-                    # Capturar cara para registro con preprocesamiento
-                    face_roi = gray[y:y+h, x:x+w]
-                    face_roi = self.preprocess_face(face_roi)
-                    captured_faces.append(face_roi)
-                    self.capture_count += 1
+                    if self.mode == "register" and len(faces) == 1:
+                        # Capturar cara para registro con preprocesamiento
+                        started = time.perf_counter()
+                        raw_roi = gray[y:y+h, x:x+w]
+                        face_roi = self.preprocess_face(raw_roi)
+                        self.metrics.record('preprocess', started)
+                        accepted, reason = self.enrollment_gate.consider(raw_roi, face_roi)
+                        if accepted:
+                            captured_faces.append(face_roi)
+                            self.capture_count += 1
                     
-                    # Mostrar progreso
-                    cv2.putText(frame, f"Capturando: {self.capture_count}/{self.max_captures}", 
-                              (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                        # Mostrar progreso
+                        overlay.text(f"Capturando: {self.capture_count}/{self.max_captures}", 
+                                     (10, 30), 1, (0, 255, 0), 2)
+                        if reason:
+                            overlay.text(ENROLLMENT_HINTS[reason], (10, 60), 0.7, (0, 255, 255), 2)
                     
-                    if self.capture_count >= self.max_captures:
-                        self.save_face_data(captured_faces)
-                        self.running = False
-                        break
+                        if self.capture_count >= self.max_captures:
+                            self.save_face_data(captured_faces)
+                            self.running = False
+                            break
+                        
+                        if self.enrollment_gate.candidates >= self.max_register_candidates:
+                            if self.capture_count >= self.min_captures:
+                                self.save_face_data(captured_faces)
+                            else:
+                                self.authentication_result.emit(
+                                    False, "No se obtuvieron suficientes capturas de calidad; mejora la iluminación")
+                            self.running = False
+                            break
                         
-                elif self.mode == "authenticate" and len(faces) == 1:
-                    # Autenticar cara solo si el modelo está entrenado
-                    if self.model_loaded and os.path.exists(self.model_file):
-                        face_roi = gray[y:y+h, x:x+w]
-                        face_roi = self.preprocess_face(face_roi)
+                    elif self.mode == "authenticate" and len(faces) == 1 and not self.multi_face and not pooled:
+                        # Autenticar cara solo si el modelo está entrenado
+                        if self.model_loaded:
+                            started = time.perf_counter()
+                            face_roi = gray[y:y+h, x:x+w]
+                            face_roi = self.preprocess_face(face_roi)
+                            started = self.metrics.record('preprocess', started)
                         
-                        try:
-                            # Realizar predicción
-                            label, confidence = self.face_recognizer.predict(face_roi)
+                            try:
+                                # Realizar predicción
+                                label, confidence = self.predict_face(face_roi)
+                                self.metrics.record('predict', started)
+                                self.metrics.mark_event('first_prediction')
                             
-                            # Debug info
-                            print(f"Predicción - Label: {label}, Confianza: {confidence}")
+                                # Debug info
+                                print(f"Predicción - Label: {label}, Confianza: {confidence}")
                             
-                            # Umbral de confianza ajustado (menor valor = mayor confianza)
-                            # LBPH típicamente da valores entre 0-100, donde 0 es match perfecto
-                            if confidence < 80:  # Umbral más permisivo
-                                username = self.get_username_by_label(label)
-                                if username != "Desconocido":
-                                    cv2.putText(frame, f"Bienvenido {username} ({confidence:.1f})", 
-                                              (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-                                    auth_attempts += 1
-                                    
-                                    # Requiere múltiples detecciones consecutivas para mayor seguridad
-                                    if auth_attempts >= 3:
+                                # La decisión acumula evidencia entre frames (menor
+                                # distancia = mayor confianza) con el tiempo de captura
+                                decision, label, progress = self.auth_decision.observe(label, confidence, frame_time)
+                                if decision == 'reject':
+                                    overlay.text(f"No reconocido ({confidence:.1f})", (x, y-10), 
+                                                 0.9, (0, 0, 255), 2)
+                                else:
+                                    username = self.get_username_by_label(label)
+                                    if username == "Desconocido":
+                                        overlay.text("Usuario no encontrado", (x, y-10), 
+                                                     0.9, (255, 255, 0), 2)
+                                        self.auth_decision.reset()
+                                    elif decision == 'accept':
+                                        overlay.text(f"Bienvenido {username} ({confidence:.1f})", 
+                                                     (x, y-10), 0.9, (0, 255, 0), 2)
+                                        self.metrics.mark_event('decision')
                                         self.authentication_result.emit(True, username)
                                         self.running = False
                                         break
-                                else:
-                                    cv2.putText(frame, "Usuario no encontrado", (x, y-10), 
-                                              cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 0), 2)
-                            else:
-                                cv2.putText(frame, f"No reconocido ({confidence:.1f})", (x, y-10), 
-                                          cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
-                                auth_attempts = 0  # Reset counter
-                        except Exception as e:
-                            cv2.putText(frame, "Error reconocimiento", (x, y-10), 
-                                      cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 0, 0), 2)
-                            print(f"Error en predicción: {str(e)}")
-                    else:
-                        cv2.putText(frame, "Sin usuarios registrados", (x, y-10), 
-                                  cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-            else:
-                # No se detectó cara, reset counter
-                auth_attempts = 0
+                                    else:
+                                        overlay.text(f"Verificando {username} {progress:.0%}", 
+                                                     (x, y-10), 0.9, (0, 255, 255), 2)
+                            except Exception as e:
+                                overlay.text("Error reconocimiento", (x, y-10), 
+                                             0.9, (255, 0, 0), 2)
+                                print(f"Error en predicción: {str(e)}")
+                        else:
+                            overlay.text("Sin usuarios registrados", (x, y-10), 
+                                         0.7, (255, 255, 0), 2)
             
-            # Agregar instrucciones en pantalla
-            if self.mode == "authenticate":
-                cv2.putText(frame, "Posicionate frente a la camara para autenticarte", 
-                          (10, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            elif self.mode == "register":
-                cv2.putText(frame, "Mantente frente a la camara para registro", 
-                          (10, frame.shape[0] - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                          
-            self.frame_ready.emit(frame)
-            self.msleep(30)  # Reducir delay para mejor respuesta
+                if len(faces) == 0 and isinstance(self.auth_decision, ConsecutiveRule):
+                    # No se detectó cara, reset counter (la evidencia acumulada se olvida con el tiempo)
+                    self.auth_decision.reset()
+                    self.face_tracks.reset()
             
-        cap.release()
+                # Agregar instrucciones en pantalla
+                if self.mode == "authenticate":
+                    overlay.text("Posicionate frente a la camara para autenticarte", 
+                                 (10, frame.shape[0] - 20), 0.6, (255, 255, 255), 2)
+                elif self.mode == "register":
+                    overlay.text("Mantente frente a la camara para registro", 
+                                 (10, frame.shape[0] - 20), 0.6, (255, 255, 255), 2)
+                          
+                # Si la interfaz no alcanza a mostrar los frames, se descartan
+                # en lugar de acumularlos en la cola de eventos de Qt
+                if self.preview is not None:
+                    self.preview.overlay = overlay
+                elif self.receivers(self.image_ready) == 0:
+                    pass  # Sin interfaz conectada (ejecución headless)
+                elif self.frames_pending_display < self.max_pending_display:
+                    self.frames_pending_display += 1
+                    started = time.perf_counter()
+                    image = render_display_image(frame, overlay, self.display_size)
+                    started = self.metrics.record('overlay', started)
+                    self.image_ready.emit(image)
+                    self.metrics.record('emit', started)
+                else:
+                    self.display_dropped += 1
+                
+                if self.receivers(self.frame_ready) > 0:
+                    if not frame.flags.writeable:
+                        frame = frame.copy()  # Vista de solo lectura del FrameBus
+                    overlay.draw_cv2(frame)
+                    self.frame_ready.emit(frame)
+                
+                self.metrics.frame_done()
+        finally:
+            # También si el análisis falla: la cámara compartida debe poder liberarse
+            if self.camera_service is not None:
+                self.captured_at_end = self.capture_worker.frames_captured
+                self.camera_service.detach(self.frame_buffer)
+            else:
+                self.capture_worker.stop()
+                if self.release_source:
+                    cap.release()
+        print(f"📊 Pipeline: {self.get_pipeline_stats()}")
+        self.dump_metrics()
+    
+    def dump_metrics(self):
+        """Guarda las métricas de la sesión en formato JSON (face_metrics.json)"""
+        try:
+            self.metrics.dump_json(self.metrics_file, mode=self.mode, pipeline=self.get_pipeline_stats())
+        except Exception as e:
+            print(f"⚠️ No se pudieron guardar las métricas: {str(e)}")
+    
+    def frame_displayed(self):
+        """La interfaz confirma que terminó de mostrar un frame emitido"""
+        self.frames_pending_display = max(0, self.frames_pending_display - 1)
+    
+    def get_pipeline_stats(self):
+        """Profundidad de colas y contadores de frames por etapa"""
+        display = self.preview.get_stats() if self.preview is not None else {
+            'display_queue_depth': self.frames_pending_display,
+            'display_dropped': self.display_dropped,
+        }
+        captured = 0
+        if self.capture_worker is not None:
+            end = self.captured_at_end if self.captured_at_end is not None else self.capture_worker.frames_captured
+            captured = end - self.captured_at_start
+        return {
+            'captured': captured,
+            'capture_queue_depth': self.frame_buffer.depth if self.frame_buffer else 0,
+            'capture_dropped': self.frame_buffer.dropped if self.frame_buffer else 0,
+            'processed': self.frames_processed,
+            **display,
+            'last_frame_age_ms': round(self.last_frame_age * 1000, 1),
+            **self.face_tracker.get_stats(),
+            **self.motion_gate.get_stats(),
+            **self.enrollment_gate.get_stats(),
+        }
     
     def preprocess_face(self, face):
         """Preprocesa la imagen de la cara para mejorar el reconocimiento"""
-        # Redimensionar a tamaño estándar
-        face = cv2.resize(face, (100, 100))
-        
-        # Aplicar ecualización de histograma para mejorar el contraste
-        face = cv2.equalizeHist(face)
-        
-        # Aplicar filtro gaussiano para reducir ruido
-        face = cv2.GaussianBlur(face, (5, 5), 0)
-        
-        return face
+        return preprocess_face(face)
         
     def save_face_data(self, faces):
         try:
-            # Cargar datos existentes
-            if os.path.exists(self.faces_data_file):
-                with open(self.faces_data_file, 'rb') as f:
-                    data = pickle.load(f)
-                    all_faces = data['faces']
-                    all_labels = data['labels']
-                    usernames = data['usernames']
-            else:
-                all_faces = []
-                all_labels = []
-                usernames = {}
-            
-            # Agregar nuevas caras
-            new_label = len(usernames)
-            usernames[new_label] = self.username
-            
-            for face in faces:
-                all_faces.append(face)
-                all_labels.append(new_label)
-            
-            # Guardar datos actualizados
-            data = {
-                'faces': all_faces,
-                'labels': all_labels,
-                'usernames': usernames
-            }
-            
-            with open(self.faces_data_file, 'wb') as f:
-                pickle.dump(data, f)
+            # Agregar nuevas caras al final del almacén (solo se escriben las nuevas)
+            new_label = self.face_store.append_user(self.username, faces)
             
             print(f"✅ Datos guardados: {len(faces)} caras para usuario {self.username}")
             
-            # Entrenar modelo
-            self.train_model(all_faces, all_labels)
+            model_faces = faces
+            if self.prototypes_per_user > 0:
+                offsets = select_prototypes(faces, self.prototypes_per_user)
+                if self.keep_raw_samples:
+                    self.face_store.set_prototypes(new_label, offsets)
+                else:
+                    self.face_store.compact_user(new_label, offsets)
+                model_faces = [faces[i] for i in offsets]
+                print(f"🧩 {len(model_faces)} prototipos de {len(faces)} muestras")
+            
+            # Incorporar solo las caras nuevas al modelo existente
+            self.update_model(model_faces, new_label)
             self.authentication_result.emit(True, f"Usuario {self.username} registrado exitosamente")
             
         except Exception as e:
@@ -211,28 +625,265 @@ class FaceRecognitionThread(QThread):
             print(f"🔄 Entrenando modelo con {len(faces)} caras...")
             
             # Entrenar el modelo
-            self.face_recognizer.train(faces, labels_array)
+            self.face_recognizer.train(list(faces), labels_array)
             
-            # Guardar el modelo
-            self.face_recognizer.save(self.model_file)
+            # Guardar el modelo y publicarlo para los próximos hilos
+            save_recognizer(self.face_recognizer, self.model_file)
+            MODEL_CACHE.put('lbph', self.model_file, self.face_recognizer)
+            self.save_binary_model()
             
             print("✅ Modelo entrenado y guardado exitosamente")
             
         except Exception as e:
             print(f"❌ Error entrenando modelo: {str(e)}")
     
+    def update_model(self, faces, label):
+        """Agrega las caras de un usuario nuevo al modelo sin re-entrenarlo completo.
+
+        LBPH guarda un histograma por muestra, así que update() solo calcula
+        los histogramas nuevos. Si no hay modelo o no coincide con el almacén
+        se hace un entrenamiento completo. Con el motor NumPy solo se
+        actualiza face_model.bin; face_model.xml se regenera al cargar el
+        motor OpenCV (ver load_model).
+        """
+        if self.recognition_engine == "numpy":
+            self.update_binary_model(faces, label)
+            return
+        
+        try:
+            previous_count = len(self.face_store.training_indices()) - len(faces)
+            
+            if previous_count > 0 and os.path.exists(self.model_file):
+                if not self.model_loaded:
+                    self.face_recognizer.read(self.model_file)
+                    
+                if len(self.face_recognizer.getLabels()) == previous_count:
+                    print(f"🔄 Actualizando modelo con {len(faces)} caras nuevas...")
+                    labels_array = np.full(len(faces), label, dtype=np.int32)
+                    self.face_recognizer.update(list(faces), labels_array)
+                    save_recognizer(self.face_recognizer, self.model_file)
+                    MODEL_CACHE.put('lbph', self.model_file, self.face_recognizer)
+                    self.save_binary_model()
+                    print("✅ Modelo actualizado y guardado exitosamente")
+                    return
+                    
+                print("⚠️ El modelo no coincide con los datos guardados, re-entrenando")
+                
+        except Exception as e:
+            print(f"⚠️ Error actualizando modelo, re-entrenando: {str(e)}")
+            
+        self.train_model(*self.face_store.training_set())
+    
+    def update_binary_model(self, faces, label):
+        """Agrega las caras nuevas a face_model.bin sin leer ni escribir face_model.xml"""
+        training_labels = self.face_store.labels_array()[self.face_store.training_indices()]
+        previous_labels = training_labels[:len(training_labels) - len(faces)]
+        try:
+            if len(previous_labels) > 0 and os.path.exists(self.model_binary_file):
+                # Copia superficial: update() reemplaza los arreglos, no modifica los de la caché
+                matcher = copy.copy(MODEL_CACHE.get('matcher', self.model_binary_file, LBPHMatcher.load))
+                if matcher.dtype == self.descriptor_dtype and np.array_equal(matcher.labels, previous_labels):
+                    print(f"🔄 Actualizando modelo con {len(faces)} caras nuevas...")
+                    matcher.set_index(None)
+                    matcher.update(list(faces), np.full(len(faces), label, dtype=np.int32))
+                    MODEL_CACHE.invalidate(self.model_binary_file)
+                    matcher.save(self.model_binary_file)
+                    MODEL_CACHE.put('matcher', self.model_binary_file, copy.copy(matcher))
+                    print("✅ Modelo actualizado y guardado exitosamente")
+                    return
+                
+                print("⚠️ El modelo binario no coincide con los datos guardados, regenerando")
+                
+        except Exception as e:
+            print(f"⚠️ Error actualizando modelo binario, regenerando: {str(e)}")
+            
+        # Regenera face_model.bin desde las muestras (ya no coincide con el almacén)
+        self.load_binary_model()
+    
+    def save_binary_model(self):
+        """Escribe face_model.bin con los histogramas del reconocedor actual"""
+        try:
+            matcher = LBPHMatcher.from_recognizer(self.face_recognizer, dtype=self.descriptor_dtype)
+            # La caché no debe retener el archivo mapeado que se va a reemplazar
+            MODEL_CACHE.invalidate(self.model_binary_file)
+            matcher.save(self.model_binary_file)
+            MODEL_CACHE.put('matcher', self.model_binary_file, matcher)
+        except Exception as e:
+            print(f"⚠️ Error guardando modelo binario: {str(e)}")
+    
+    def load_binary_model(self):
+        """Abre face_model.bin si corresponde al almacén; si no, lo regenera desde las muestras"""
+        training_labels = self.face_store.labels_array()[self.face_store.training_indices()]
+        if os.path.exists(self.model_binary_file):
+            try:
+                # Copia superficial: el índice ANN se fija por hilo, los arreglos se comparten
+                matcher = copy.copy(MODEL_CACHE.get('matcher', self.model_binary_file, LBPHMatcher.load))
+                if matcher.dtype != self.descriptor_dtype:
+                    print(f"⚠️ El modelo binario usa {matcher.dtype} en vez de {self.descriptor_dtype}, regenerando")
+                elif np.array_equal(matcher.labels, training_labels):
+                    return matcher
+                else:
+                    print("⚠️ El modelo binario no coincide con los datos guardados, regenerando")
+            except Exception as e:
+                print(f"⚠️ Error leyendo modelo binario, regenerando: {str(e)}")
+        
+        matcher = LBPHMatcher.from_store(self.face_store, dtype=self.descriptor_dtype)
+        try:
+            MODEL_CACHE.invalidate(self.model_binary_file)
+            matcher.save(self.model_binary_file)
+            MODEL_CACHE.put('matcher', self.model_binary_file, copy.copy(matcher))
+        except Exception as e:
+            print(f"⚠️ Error guardando modelo binario: {str(e)}")
+        return matcher
+    
+    def load_ann_index(self):
+        """Activa el índice ANN si existe y corresponde a las muestras guardadas"""
+        if self.ann_nprobe <= 0 or not os.path.exists(self.ann_index_file):
+            return
+        try:
+            index = copy.copy(MODEL_CACHE.get('ann', self.ann_index_file, IVFIndex.load))
+            if index.matches(self.matcher):
+                index.nprobe = self.ann_nprobe
+                self.matcher.set_index(index)
+                print(f"✅ Índice ANN cargado ({len(index.centroids)} listas, nprobe {index.nprobe})")
+            else:
+                print("⚠️ El índice ANN no coincide con los datos guardados, búsqueda exacta")
+        except Exception as e:
+            print(f"⚠️ Error cargando índice ANN: {str(e)}")
+    
+    def set_ann_nprobe(self, nprobe):
+        """Ajusta el equilibrio recall/latencia del índice ANN (0 = búsqueda exacta)"""
+        self.ann_nprobe = nprobe
+        if self.matcher is None:
+            return
+        if nprobe <= 0:
+            self.matcher.set_index(None)
+        elif self.matcher.index is not None:
+            self.matcher.index.nprobe = nprobe
+        else:
+            self.load_ann_index()
+    
+    def predict_face(self, face):
+        """Etiqueta y confianza (distancia chi-cuadrado) de una cara preprocesada"""
+        if self.matcher is not None:
+            return self.matcher.predict(face)
+        return self.face_recognizer.predict(face)
+    
+    def predict_faces(self, faces):
+        """(etiqueta, confianza) de cada cara de un lote B×100×100.
+
+        El motor NumPy calcula los histogramas del lote de una vez y hace una
+        sola búsqueda; OpenCV no tiene predicción por lotes y va cara por cara.
+        """
+        if self.matcher is None:
+            return [self.face_recognizer.predict(face) for face in faces]
+        labels, distances = self.matcher.search(faces, k=1)
+        if labels.shape[1] == 0:
+            return [(-1, float('inf'))] * len(faces)
+        return [(int(label), float(distance)) if label >= 0 else (-1, float('inf'))
+                for label, distance in zip(labels[:, 0], distances[:, 0])]
+    
+    def authenticate_faces(self, gray, faces, frame_time, overlay):
+        """Autentica todas las caras del frame; devuelve True si alguna fue aceptada.
+
+        Cada cara conserva su evidencia entre frames (self.face_tracks) y
+        entra la primera que alcanza la cota de aceptación.
+        """
+        if not self.model_loaded:
+            for (x, y, w, h) in faces:
+                overlay.text("Sin usuarios registrados", (x, y-10), 0.7, (255, 255, 0), 2)
+            return False
+        
+        try:
+            started = time.perf_counter()
+            batch = np.array([self.preprocess_face(gray[y:y+h, x:x+w]) for (x, y, w, h) in faces])
+            started = self.metrics.record('preprocess', started)
+            predictions = self.predict_faces(batch)
+            self.metrics.record('predict', started)
+            self.metrics.mark_event('first_prediction')
+        except Exception as e:
+            for (x, y, w, h) in faces:
+                overlay.text("Error reconocimiento", (x, y-10), 0.9, (255, 0, 0), 2)
+            print(f"Error en predicción: {str(e)}")
+            return False
+        
+        return self.apply_predictions(faces, predictions, frame_time, overlay)
+    
+    def apply_predictions(self, faces, predictions, frame_time, overlay):
+        """Suma las predicciones a la evidencia de cada cara; True si alguna fue aceptada"""
+        decisions = self.face_tracks.assign(faces, frame_time)
+        for (x, y, w, h), (label, confidence), rule in zip(faces, predictions, decisions):
+            print(f"Predicción - Label: {label}, Confianza: {confidence}")
+            decision, label, progress = rule.observe(label, confidence, frame_time)
+            if decision == 'reject':
+                overlay.text(f"No reconocido ({confidence:.1f})", (x, y-10), 0.9, (0, 0, 255), 2)
+                continue
+            username = self.get_username_by_label(label)
+            if username == "Desconocido":
+                overlay.text("Usuario no encontrado", (x, y-10), 0.9, (255, 255, 0), 2)
+                rule.reset()
+            elif decision == 'accept':
+                overlay.text(f"Bienvenido {username} ({confidence:.1f})", (x, y-10), 0.9, (0, 255, 0), 2)
+                self.metrics.mark_event('decision')
+                self.authentication_result.emit(True, username)
+                return True
+            else:
+                overlay.text(f"Verificando {username} {progress:.0%}", (x, y-10), 0.9, (0, 255, 255), 2)
+        return False
+    
+    def analyze_in_pool(self, frame, frame_time, overlay, wait=False):
+        """Envía el frame al pool de reconocimiento y aplica los resultados que ya llegaron.
+
+        No espera al frame actual (wait=False): las cajas que se devuelven y
+        dibujan son las del último resultado, normalmente del frame anterior.
+        Con fuentes grabadas (wait=True) se espera cada resultado para
+        analizar todos los frames en orden. Devuelve None si el pool no
+        pudo recibir el frame.
+        """
+        if self.motion_gate.should_analyze(frame):
+            try:
+                seq = self.recognition_pool.submit(frame, frame_time)
+            except Exception as e:
+                print(f"⚠️ Pool de reconocimiento no disponible, se analiza en este hilo: {str(e)}")
+                return None
+            if seq is not None and wait:
+                self.apply_pool_result(self.recognition_pool.get_result(timeout=5.0), overlay)
+        while True:
+            result = self.recognition_pool.get_result(timeout=0)
+            if result is None:
+                break
+            self.apply_pool_result(result, overlay)
+        return self.pool_faces
+    
+    def apply_pool_result(self, result, overlay):
+        if result is None or result.seq <= self.pool_seq or not self.running:
+            return  # De una sesión anterior, más viejo que el último aplicado o ya decidido
+        self.pool_seq = result.seq
+        self.metrics.add('remote', result.latency)
+        self.pool_faces = result.boxes
+        if len(result.boxes) == 0:
+            return
+        self.motion_gate.mark_activity()
+        if result.predictions is None or not self.model_loaded:
+            for (x, y, w, h) in result.boxes:
+                overlay.text("Sin usuarios registrados", (x, y-10), 0.7, (255, 255, 0), 2)
+            return
+        self.metrics.mark_event('first_prediction')
+        if not self.multi_face and len(result.boxes) != 1:
+            return
+        if self.apply_predictions(result.boxes, result.predictions, result.timestamp, overlay):
+            self.running = False
+    
     def get_username_by_label(self, label):
         try:
-            if os.path.exists(self.faces_data_file):
-                with open(self.faces_data_file, 'rb') as f:
-                    data = pickle.load(f)
-                    username = data['usernames'].get(label, "Desconocido")
-                    print(f"Label {label} corresponde a usuario: {username}")
-                    return username
+            # Solo se relee el archivo si cambió su mtime desde load_model
+            self.user_registry.refresh()
+            username = self.user_registry.get(label, "Desconocido")
+            print(f"Label {label} corresponde a usuario: {username}")
+            return username
         except Exception as e:
             print(f"Error obteniendo username: {str(e)}")
             return "Desconocido"
-        return "Desconocido"
     
     def stop(self):
         self.running = False
@@ -242,23 +893,37 @@ class FaceRecognitionThread(QThread):
     def load_model(self):
         """Carga el modelo de reconocimiento facial si existe"""
         try:
-            if os.path.exists(self.model_file) and os.path.exists(self.faces_data_file):
-                # Verificar que el archivo de datos tenga contenido
-                with open(self.faces_data_file, 'rb') as f:
-                    data = pickle.load(f)
-                    faces = data.get('faces', [])
-                    labels = data.get('labels', [])
-                    usernames = data.get('usernames', {})
-                    
-                    if faces and labels:
-                        # Cargar el modelo existente
-                        self.face_recognizer.read(self.model_file)
-                        self.model_loaded = True
-                        print(f"✅ Modelo cargado con {len(usernames)} usuarios")
-                        print(f"   Usuarios: {list(usernames.values())}")
-                        return True
+            # El motor NumPy calcula los histogramas desde las muestras guardadas
+            needs_model_file = self.recognition_engine != "numpy"
+            if self.face_store.exists():
+                # Verificar que el almacén tenga contenido (solo se lee el índice)
+                self.face_store.load_index()
+                usernames = self.face_store.usernames
+                
+                if self.face_store.count > 0:
+                    if needs_model_file:
+                        # Modelo compartido (solo se usa para predict)
+                        recognizer = None
+                        if os.path.exists(self.model_file):
+                            recognizer = MODEL_CACHE.get('lbph', self.model_file, read_recognizer)
+                        expected = len(self.face_store.training_indices())
+                        if recognizer is not None and len(recognizer.getLabels()) == expected:
+                            self.face_recognizer = recognizer
+                        else:
+                            # Los registros con el motor NumPy solo actualizan face_model.bin
+                            print("⚠️ face_model.xml no coincide con los datos guardados, re-entrenando")
+                            self.face_recognizer = cv2.face.LBPHFaceRecognizer_create()
+                            self.train_model(*self.face_store.training_set())
                     else:
-                        print("⚠️ Archivo de datos vacío")
+                        self.matcher = self.load_binary_model()
+                        self.load_ann_index()
+                    self.user_registry.update(usernames)
+                    self.model_loaded = True
+                    print(f"✅ Modelo cargado con {len(usernames)} usuarios")
+                    print(f"   Usuarios: {list(usernames.values())}")
+                    return True
+                else:
+                    print("⚠️ Archivo de datos vacío")
             else:
                 print("⚠️ No hay modelo o datos guardados")
             
@@ -284,7 +949,47 @@ class LoginWindow(QMainWindow):
         self.setFixedSize(1000, 700)
         
         self.face_thread = None
+        self.preview_thread = None
+        self.face_store = FaceStore()
         self.camera_active = False
+        
+        # Cámara persistente: autenticación y registro la comparten y se
+        # libera tras camera_idle_timeout segundos sin uso
+        self.camera_service = CameraService(
+            source=0,
+            idle_timeout=self.settings.value('camera_idle_timeout', 30.0, type=float),
+            width=self.settings.value('camera_width', 0, type=int),
+            height=self.settings.value('camera_height', 0, type=int),
+            fourcc=self.settings.value('camera_fourcc', '', type=str),
+            buffer_size=self.settings.value('camera_buffer_size', 1, type=int),
+        )
+        
+        # Detector configurado o Haar si le faltan archivos; hilo y procesos
+        # usan el mismo y el estado del sistema muestra el cambio
+        self.detector_warning = ""
+        requested_detector = self.settings.value('face_detector', 'haar', type=str)
+        self.face_detector_name, missing = resolve_detector(requested_detector, CASCADE_FILE)
+        if missing:
+            self.detector_warning = f"⚠️ Detector '{requested_detector}' no disponible, se usa Haar"
+        
+        # Reconocimiento fuera del proceso de la interfaz (0 = en el hilo de
+        # la cámara); los procesos arrancan ya para no demorar "Iniciar"
+        self.recognition_pool = None
+        processes = self.settings.value('recognition_processes', 0, type=int)
+        if processes > 0:
+            self.recognition_pool = RecognitionPool(
+                processes,
+                cascade_file=CASCADE_FILE,
+                detector=self.face_detector_name,
+                detector_threads=self.settings.value('detector_threads', 1, type=int),
+                detection_workers=self.settings.value('detection_workers', 1, type=int),
+                engine=self.settings.value('recognition_engine', 'numpy', type=str),
+                model_binary_file=MODEL_BINARY_FILE,
+                ann_index_file=ANN_INDEX_FILE,
+                ann_nprobe=self.settings.value('ann_nprobe', 16, type=int),
+                detection_scale=self.settings.value('detection_scale', 1.0, type=float),
+            )
+            self.recognition_pool.start()
         self.external_launcher = None  # Para launcher externo
         
         self.init_ui()
@@ -708,12 +1413,27 @@ class LoginWindow(QMainWindow):
         self.start_camera_process("register", username)
         
     def start_camera_process(self, mode, username=None):
-        if self.face_thread and self.face_thread.isRunning():
-            self.face_thread.stop()
+        self.stop_camera_threads()
             
-        self.face_thread = FaceRecognitionThread(mode, username)
+        engine = self.settings.value('recognition_engine', 'numpy', type=str)
+        self.face_thread = FaceRecognitionThread(mode, username, engine=engine)
+        self.face_thread.camera_service = self.camera_service
+        self.face_thread.recognition_pool = self.recognition_pool
+        self.configure_face_thread(self.face_thread)
+        
+        # Vista previa y reconocimiento son dos suscriptores de la cámara:
+        # la vista previa va al ritmo de la cámara aunque el análisis sea lento
+        self.preview_thread = PreviewThread(self.camera_service, mode)
+        self.face_thread.preview = self.preview_thread
+        display_label = self.camera_label_for_mode(mode)
+        self.preview_thread.display_size = (display_label.contentsRect().width(),
+                                            display_label.contentsRect().height())
         self.face_thread.authentication_result.connect(self.on_authentication_result)
-        self.face_thread.frame_ready.connect(self.update_camera_display)
+        self.preview_thread.image_ready.connect(self.update_camera_display)
+        self.face_thread.ready.connect(self.on_face_thread_ready)
+        self.face_thread.finished.connect(self.preview_thread.stop)
+        display_label.setText("⏳ Iniciando cámara...")
+        self.preview_thread.start()
         self.face_thread.start()
         
         self.camera_active = True
@@ -723,9 +1443,49 @@ class LoginWindow(QMainWindow):
             self.progress_bar.setVisible(True)
             self.progress_bar.setValue(0)
             
-    def stop_camera(self):
-        if self.face_thread:
+    def on_face_thread_ready(self):
+        """La cámara está abierta y el modelo cargado"""
+        sender = self.sender()
+        if isinstance(sender, FaceRecognitionThread):
+            events = sender.metrics.events
+            print(f"✅ Cámara lista en {events.get('camera_open', 0):.2f} s, "
+                  f"listo para reconocer en {events.get('ready', 0):.2f} s")
+            
+    def configure_face_thread(self, thread):
+        """Aplica la configuración de rendimiento guardada para este kiosco"""
+        thread.face_detector = load_detector(self.face_detector_name, CASCADE_FILE,
+                                             threads=self.settings.value('detector_threads', 1, type=int),
+                                             workers=self.settings.value('detection_workers', 1, type=int))
+        thread.detection_scale = self.settings.value('detection_scale', 1.0, type=float)
+        thread.face_tracker.redetect_interval = self.settings.value('tracking_interval', 10, type=int)
+        thread.motion_gate.threshold = self.settings.value('motion_threshold', 3.0, type=float)
+        thread.motion_gate.recheck_interval = self.settings.value('motion_recheck_interval', 1.0, type=float)
+        thread.max_captures = self.settings.value('enrollment_samples', 15, type=int)
+        thread.enrollment_gate.min_distance = self.settings.value('enrollment_min_distance', 0.6, type=float)
+        thread.set_ann_nprobe(self.settings.value('ann_nprobe', 16, type=int))
+        thread.prototypes_per_user = self.settings.value('prototypes_per_user', 0, type=int)
+        thread.keep_raw_samples = self.settings.value('keep_raw_samples', True, type=bool)
+        thread.descriptor_dtype = self.settings.value('descriptor_dtype', 'uint8', type=str)
+        thread.multi_face = self.settings.value('auth_multi_face', True, type=bool)
+        if self.settings.value('auth_decision_rule', 'evidence', type=str) == 'consecutive':
+            thread.auth_decision = ConsecutiveRule()
+        else:
+            threshold = self.settings.value('auth_evidence_threshold', 80.0, type=float)
+            width = self.settings.value('auth_evidence_width', 20.0, type=float)
+            thread.auth_decision = EvidenceAccumulator(
+                curve=((threshold - width, threshold, threshold + width), (3.0, 0.0, -3.0)),
+                false_accept=self.settings.value('auth_false_accept', 1e-3, type=float),
+                false_reject=self.settings.value('auth_false_reject', 1e-2, type=float),
+            )
+            
+    def stop_camera_threads(self):
+        if self.face_thread and self.face_thread.isRunning():
             self.face_thread.stop()
+        if self.preview_thread:
+            self.preview_thread.stop()
+        
+    def stop_camera(self):
+        self.stop_camera_threads()
             
         self.camera_active = False
         self.update_camera_controls()
@@ -744,36 +1504,27 @@ class LoginWindow(QMainWindow):
         self.btn_start_register.setEnabled(not self.camera_active)
         self.btn_cancel_register.setEnabled(self.camera_active)
         
-    def update_camera_display(self, frame):
-        try:
-            # Convertir frame de BGR a RGB
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_image.shape
-            bytes_per_line = ch * w
-            
-            # Crear QImage desde array numpy
-            qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            
-            # Convertir QImage a QPixmap
-            pixmap = QPixmap.fromImage(qt_image)
+    def camera_label_for_mode(self, mode):
+        return self.register_camera_label if mode == "register" else self.camera_label
+        
+    def update_camera_display(self, image):
+        sender = self.sender()
+        if isinstance(sender, (FaceRecognitionThread, PreviewThread)):
+            sender.frame_displayed()
+        elif sender is None:
+            sender = self.face_thread
             
-            # Escalar imagen según el modo
+        try:
+            # La imagen ya viene escalada y anotada desde el hilo de reconocimiento
             if hasattr(self.face_thread, 'mode'):
-                if self.face_thread.mode == "authenticate":
-                    scaled_pixmap = pixmap.scaled(
-                        self.camera_label.size(), 
-                        Qt.KeepAspectRatio, 
-                        Qt.SmoothTransformation
-                    )
-                    self.camera_label.setPixmap(scaled_pixmap)
-                elif self.face_thread.mode == "register":
-                    scaled_pixmap = pixmap.scaled(
-                        self.register_camera_label.size(), 
-                        Qt.KeepAspectRatio, 
-                        Qt.SmoothTransformation
-                    )
-                    self.register_camera_label.setPixmap(scaled_pixmap)
-                    
+                label = self.camera_label_for_mode(self.face_thread.mode)
+                label.setPixmap(QPixmap.fromImage(image))
+                
+                # Si el QLabel cambió de tamaño, las próximas imágenes se ajustan
+                if sender is not None:
+                    sender.display_size = (label.contentsRect().width(), label.contentsRect().height())
+                
+                if self.face_thread.mode == "register":
                     # Actualizar progress bar
                     if hasattr(self.face_thread, 'capture_count'):
                         progress = (self.face_thread.capture_count / self.face_thread.max_captures) * 100
@@ -833,24 +1584,20 @@ class LoginWindow(QMainWindow):
 
     def user_exists(self, username):
         try:
-            if os.path.exists("faces_data.pkl"):
-                with open("faces_data.pkl", 'rb') as f:
-                    data = pickle.load(f)
-                    usernames = data.get('usernames', {})
-                    return username in usernames.values()
+            if self.face_store.load_index():
+                return username in self.face_store.usernames.values()
         except:
             pass
         return False
     
     def check_users_exist(self):
-        """Verifica si hay usuarios registrados en el sistema"""
+        """Verifica si hay usuarios registrados con el modelo del motor activo"""
         try:
-            if os.path.exists("faces_data.pkl") and os.path.exists("face_model.xml"):
-                with open("faces_data.pkl", 'rb') as f:
-                    data = pickle.load(f)
-                    usernames = data.get('usernames', {})
-                    faces = data.get('faces', [])
-                    return len(usernames) > 0 and len(faces) > 0
+            # Con el motor NumPy los registros solo escriben face_model.bin
+            engine = self.settings.value('recognition_engine', 'numpy', type=str)
+            model_file = "face_model.xml" if engine == "opencv" else MODEL_BINARY_FILE
+            if os.path.exists(model_file) and self.face_store.load_index():
+                return len(self.face_store.usernames) > 0 and self.face_store.count > 0
         except:
             pass
         return False
@@ -859,32 +1606,31 @@ class LoginWindow(QMainWindow):
         """Actualiza el estado del sistema en la interfaz"""
         if self.check_users_exist():
             try:
-                with open("faces_data.pkl", 'rb') as f:
-                    data = pickle.load(f)
-                    num_users = len(data.get('usernames', {}))
-                    self.status_text.setText(f"✅ Sistema listo\n{num_users} usuario(s) registrado(s)")
-                    self.status_text.setStyleSheet("color: #27ae60; font-weight: bold;")
+                num_users = len(self.face_store.usernames)
+                self.status_text.setText(f"✅ Sistema listo\n{num_users} usuario(s) registrado(s)")
+                self.status_text.setStyleSheet("color: #27ae60; font-weight: bold;")
             except:
                 self.status_text.setText("✅ Sistema listo para autenticación")
                 self.status_text.setStyleSheet("color: #27ae60; font-weight: bold;")
         else:
             self.status_text.setText("⚠️ Sin usuarios registrados\nVe a 'Registro'")
             self.status_text.setStyleSheet("color: #f39c12; font-weight: bold;")
+        if self.detector_warning:
+            self.status_text.setText(f"{self.status_text.text()}\n{self.detector_warning}")
+            self.status_text.setStyleSheet("color: #f39c12; font-weight: bold;")
     
     def load_users_list(self):
         self.users_list.clear()
         try:
-            if os.path.exists("faces_data.pkl"):
-                with open("faces_data.pkl", 'rb') as f:
-                    data = pickle.load(f)
-                    usernames = data.get('usernames', {})
+            if self.face_store.load_index():
+                usernames = self.face_store.usernames
+                
+                for label, username in usernames.items():
+                    item = QListWidgetItem(f"👤 {username} (ID: {label})")
+                    self.users_list.addItem(item)
                     
-                    for label, username in usernames.items():
-                        item = QListWidgetItem(f"👤 {username} (ID: {label})")
-                        self.users_list.addItem(item)
-                        
-                    if not usernames:
-                        self.users_list.addItem(QListWidgetItem("No hay usuarios registrados"))
+                if not usernames:
+                    self.users_list.addItem(QListWidgetItem("No hay usuarios registrados"))
             else:
                 self.users_list.addItem(QListWidgetItem("No hay datos de usuarios"))
         except Exception as e:
@@ -917,48 +1663,30 @@ class LoginWindow(QMainWindow):
     
     def remove_user_data(self, user_id):
         try:
-            if os.path.exists("faces_data.pkl"):
-                with open("faces_data.pkl", 'rb') as f:
-                    data = pickle.load(f)
-                
-                # Remover datos del usuario específico
-                faces = data.get('faces', [])
-                labels = data.get('labels', [])
-                usernames = data.get('usernames', {})
-                
-                # Filtrar datos
-                new_faces = []
-                new_labels = []
-                for i, label in enumerate(labels):
-                    if label != user_id:
-                        new_faces.append(faces[i])
-                        new_labels.append(label)
-                
-                # Remover username
-                if user_id in usernames:
-                    del usernames[user_id]
-                
-                # Guardar datos actualizados
-                updated_data = {
-                    'faces': new_faces,
-                    'labels': new_labels,
-                    'usernames': usernames
-                }
-                
-                with open("faces_data.pkl", 'wb') as f:
-                    pickle.dump(updated_data, f)
+            if self.face_store.exists():
+                # Remover muestras y username del usuario (compacta el arreglo)
+                self.face_store.remove_user(user_id)
                 
                 # Re-entrenar modelo si hay datos
-                if new_faces:
+                errors = []
+                if self.face_store.count > 0:
                     recognizer = cv2.face.LBPHFaceRecognizer_create()
-                    recognizer.train(new_faces, np.array(new_labels))
-                    recognizer.save("face_model.xml")
+                    faces, labels = self.face_store.training_set()
+                    recognizer.train(list(faces), labels)
+                    errors = self.save_models(recognizer)
                 else:
                     # Si no hay usuarios, eliminar modelo
-                    if os.path.exists("face_model.xml"):
-                        os.remove("face_model.xml")
+                    for model_file in ("face_model.xml", MODEL_BINARY_FILE):
+                        MODEL_CACHE.invalidate(model_file)
+                        if os.path.exists(model_file):
+                            os.remove(model_file)
+                self.rebuild_ann_index()
                 
-                QMessageBox.information(self, "Éxito", "Usuario eliminado correctamente")
+                if errors:
+                    QMessageBox.warning(self, "Error", "Usuario eliminado, pero no se pudo guardar el modelo:\n"
+                                        + "\n".join(errors))
+                else:
+                    QMessageBox.information(self, "Éxito", "Usuario eliminado correctamente")
                 
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error eliminando usuario: {str(e)}")
@@ -973,12 +1701,18 @@ class LoginWindow(QMainWindow):
                 import shutil
                 
                 # Copiar archivos de datos
-                if os.path.exists("faces_data.pkl"):
-                    shutil.copy2("faces_data.pkl", f"{backup_dir}/faces_data_backup_{timestamp}.pkl")
+                if os.path.exists(self.face_store.samples_file):
+                    shutil.copy2(self.face_store.samples_file, f"{backup_dir}/faces_samples_backup_{timestamp}.dat")
+                
+                if os.path.exists(self.face_store.index_file):
+                    shutil.copy2(self.face_store.index_file, f"{backup_dir}/faces_index_backup_{timestamp}.json")
                 
                 if os.path.exists("face_model.xml"):
                     shutil.copy2("face_model.xml", f"{backup_dir}/face_model_backup_{timestamp}.xml")
                 
+                if os.path.exists(MODEL_BINARY_FILE):
+                    shutil.copy2(MODEL_BINARY_FILE, f"{backup_dir}/face_model_backup_{timestamp}.bin")
+                
                 QMessageBox.information(self, "Éxito", f"Respaldo creado en:\n{backup_dir}")
                 
         except Exception as e:
@@ -987,7 +1721,7 @@ class LoginWindow(QMainWindow):
     def rebuild_model(self):
         """Reconstruir el modelo desde los datos guardados"""
         try:
-            if not os.path.exists("faces_data.pkl"):
+            if not self.face_store.exists():
                 QMessageBox.warning(self, "Error", "No hay datos de usuarios guardados")
                 return
                 
@@ -997,31 +1731,97 @@ class LoginWindow(QMainWindow):
                                        QMessageBox.Yes | QMessageBox.No)
             
             if reply == QMessageBox.Yes:
-                with open("faces_data.pkl", 'rb') as f:
-                    data = pickle.load(f)
-                    faces = data.get('faces', [])
-                    labels = data.get('labels', [])
+                self.face_store.load_index()
+                    
+                if self.face_store.count > 0:
+                    # Recalcular los prototipos según la configuración actual
+                    self.rebuild_prototypes()
                     
-                if faces and labels:
                     # Crear nuevo reconocedor
                     recognizer = cv2.face.LBPHFaceRecognizer_create()
                     recognizer.setThreshold(100.0)
                     
-                    # Entrenar con todos los datos
-                    recognizer.train(faces, np.array(labels))
+                    # Entrenar con todas las muestras (o solo los prototipos)
+                    faces, labels = self.face_store.training_set()
+                    recognizer.train(list(faces), labels)
+                    
+                    # Guardar modelo (XML de OpenCV y copia binaria)
+                    errors = self.save_models(recognizer)
                     
-                    # Guardar modelo
-                    recognizer.save("face_model.xml")
+                    # Reconstruir el índice ANN con todas las muestras
+                    self.rebuild_ann_index()
                     
-                    QMessageBox.information(self, "Éxito", 
-                                          "Modelo reconstruido exitosamente.\n\n"
-                                          "Prueba la autenticación nuevamente.")
+                    if errors:
+                        QMessageBox.warning(self, "Error", "No se pudo guardar el modelo reconstruido:\n"
+                                            + "\n".join(errors))
+                    else:
+                        QMessageBox.information(self, "Éxito", 
+                                              "Modelo reconstruido exitosamente.\n\n"
+                                              "Prueba la autenticación nuevamente.")
                 else:
                     QMessageBox.warning(self, "Error", "No hay datos suficientes para entrenar")
                     
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error reconstruyendo modelo: {str(e)}")
     
+    def save_models(self, recognizer):
+        """Escribe face_model.xml y face_model.bin; devuelve los errores (vacío si se guardaron)"""
+        errors = []
+        # Olvidar los modelos en caché antes de reemplazar los archivos
+        for model_file in ("face_model.xml", MODEL_BINARY_FILE):
+            MODEL_CACHE.invalidate(model_file)
+        try:
+            save_recognizer(recognizer, "face_model.xml")
+        except Exception as e:
+            print(f"❌ Error guardando face_model.xml: {str(e)}")
+            errors.append(f"face_model.xml: {str(e)}")
+        try:
+            LBPHMatcher.from_recognizer(recognizer, dtype=self.descriptor_dtype()).save(MODEL_BINARY_FILE)
+        except Exception as e:
+            print(f"❌ Error guardando {MODEL_BINARY_FILE}: {str(e)}")
+            errors.append(f"{MODEL_BINARY_FILE}: {str(e)}")
+        return errors
+    
+    def descriptor_dtype(self):
+        """Tipo de almacenamiento de los histogramas de face_model.bin"""
+        return self.settings.value('descriptor_dtype', 'uint8', type=str)
+    
+    def rebuild_prototypes(self):
+        """Recalcula los k prototipos de cada usuario (prototypes_per_user = 0 los quita)"""
+        k = self.settings.value('prototypes_per_user', 0, type=int)
+        keep_raw = self.settings.value('keep_raw_samples', True, type=bool)
+        if k <= 0:
+            if self.face_store.prototypes:
+                self.face_store.clear_prototypes()
+            return
+        
+        # Se eligen todos los prototipos y el almacén se reescribe una sola vez
+        samples = self.face_store.samples()
+        selection = {}
+        for label in sorted(set(self.face_store.labels)):
+            user = self.face_store.user_slice(label)
+            offsets = select_prototypes(samples[user], k)
+            if keep_raw or len(offsets) < user.stop - user.start:
+                selection[label] = offsets
+        del samples  # Liberar el memmap antes de reescribir el arreglo
+        if selection:
+            self.face_store.apply_prototypes(selection, keep_raw)
+        print(f"🧩 Prototipos: {len(self.face_store.training_indices())} de {self.face_store.count} muestras")
+    
+    def rebuild_ann_index(self):
+        """Reconstruye el índice ANN (face_ann.npz) del motor de búsqueda NumPy"""
+        try:
+            matcher = LBPHMatcher.from_store(self.face_store)
+            if len(matcher) == 0:
+                if os.path.exists(ANN_INDEX_FILE):
+                    os.remove(ANN_INDEX_FILE)
+                return
+            index = IVFIndex().build(matcher)
+            index.save(ANN_INDEX_FILE)
+            print(f"✅ Índice ANN reconstruido: {len(matcher)} muestras en {len(index.centroids)} listas")
+        except Exception as e:
+            print(f"⚠️ Error reconstruyendo índice ANN: {str(e)}")
+    
     def show_debug_info(self):
         """Muestra información de debug del sistema"""
         debug_info = "🔧 Información de Debug\n" + "="*30 + "\n\n"
@@ -1029,24 +1829,40 @@ class LoginWindow(QMainWindow):
         try:
             # Verificar archivos
             debug_info += "📁 Archivos del sistema:\n"
-            debug_info += f"- faces_data.pkl: {'✅ Existe' if os.path.exists('faces_data.pkl') else '❌ No existe'}\n"
-            debug_info += f"- face_model.xml: {'✅ Existe' if os.path.exists('face_model.xml') else '❌ No existe'}\n\n"
+            debug_info += f"- {self.face_store.samples_file}: {'✅ Existe' if os.path.exists(self.face_store.samples_file) else '❌ No existe'}\n"
+            debug_info += f"- {self.face_store.index_file}: {'✅ Existe' if os.path.exists(self.face_store.index_file) else '❌ No existe'}\n"
+            debug_info += f"- face_model.xml: {'✅ Existe' if os.path.exists('face_model.xml') else '❌ No existe'}\n"
+            debug_info += f"- {MODEL_BINARY_FILE}: {'✅ Existe' if os.path.exists(MODEL_BINARY_FILE) else '❌ No existe'}\n\n"
             
             # Información de datos
-            if os.path.exists("faces_data.pkl"):
-                with open("faces_data.pkl", 'rb') as f:
-                    data = pickle.load(f)
-                    usernames = data.get('usernames', {})
-                    faces = data.get('faces', [])
-                    labels = data.get('labels', [])
-                    
-                    debug_info += "👥 Usuarios registrados:\n"
-                    for label, username in usernames.items():
-                        face_count = labels.count(label)
-                        debug_info += f"   - {username} (ID: {label}) - {face_count} muestras\n"
+            if self.face_store.load_index():
+                usernames = self.face_store.usernames
+                labels = self.face_store.labels
+                
+                debug_info += "👥 Usuarios registrados:\n"
+                for label, username in usernames.items():
+                    face_count = labels.count(label)
+                    debug_info += f"   - {username} (ID: {label}) - {face_count} muestras\n"
+                
+                debug_info += f"\n📊 Total de caras: {self.face_store.count}\n"
+                debug_info += f"📊 Caras en el modelo (prototipos): {len(self.face_store.training_indices())}\n"
+                debug_info += f"📊 Total de etiquetas: {len(labels)}\n"
+            
+            # Estadísticas del pipeline de cámara activo
+            if self.face_thread and self.face_thread.isRunning():
+                debug_info += "\n🎥 Pipeline de cámara:\n"
+                for key, value in self.face_thread.get_pipeline_stats().items():
+                    debug_info += f"   - {key}: {value}\n"
                     
-                    debug_info += f"\n📊 Total de caras: {len(faces)}\n"
-                    debug_info += f"📊 Total de etiquetas: {len(labels)}\n"
+                debug_info += "\n⏱️ Latencias por etapa:\n"
+                for line in self.face_thread.metrics.format_report().splitlines():
+                    debug_info += f"   - {line}\n"
+            elif os.path.exists("face_metrics.json"):
+                debug_info += "\n⏱️ Última sesión: ver face_metrics.json\n"
+            
+            debug_info += f"\n📷 Cámara compartida: {self.camera_service.get_stats()}\n"
+            if self.recognition_pool is not None:
+                debug_info += f"🧵 Procesos de reconocimiento: {self.recognition_pool.get_stats()}\n"
             
             # Mostrar en un diálogo
             msg = QMessageBox()
@@ -1060,8 +1876,10 @@ class LoginWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Maneja el evento de cierre de la ventana"""
-        if self.face_thread:
-            self.face_thread.stop()
+        self.stop_camera_threads()
+        self.camera_service.close()
+        if self.recognition_pool is not None:
+            self.recognition_pool.close()
         
         # Emitir señal de cierre
         self.login_closed.emit()
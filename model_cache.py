@@ -0,0 +1,109 @@
+"""
+Caché de modelos compartida por todo el proceso
+Factory I/O Controller System
+
+Cada FaceRecognitionThread necesita la cascada Haar (~1 MB de XML que
+parsear) y, en autenticación, el modelo LBPH (face_model.xml o
+face_model.bin). Los objetos ya cargados se guardan aquí, indexados por
+tipo y ruta absoluta, junto con el mtime, el tamaño y el inodo del archivo:
+mientras el archivo no cambie, reiniciar la cámara no vuelve a leer nada.
+
+Al re-entrenar, los modelos se escriben con os.replace (archivo nuevo), así
+que la siguiente consulta detecta el cambio y carga la versión nueva; quien
+ya tenía la anterior la sigue usando sin ver un modelo a medio escribir.
+El hilo que acaba de entrenar puede publicar su objeto con put() para que
+nadie tenga que volver a leerlo.
+
+Los objetos compartidos se deben usar solo para consultar (predict,
+detectMultiScale); quien necesite modificarlos debe trabajar con una copia.
+"""
+
+import os
+import threading
+
+
+def file_stamp(path):
+    """Identifica la versión de un archivo: (mtime, tamaño, inodo), o None si no existe"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+class ModelCache:
+    """Objetos cargados desde archivo, reutilizados mientras el archivo no cambie"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # (tipo, ruta) -> (versión del archivo, objeto)
+        self._loading = {}  # (tipo, ruta) -> candado de carga
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, kind, path):
+        return (kind, os.path.abspath(path))
+
+    def get(self, kind, path, loader):
+        """Devuelve loader(path), cargándolo solo si el archivo cambió desde la última vez.
+
+        Si el archivo no existe no se guarda nada y se llama siempre al
+        cargador. Dos hilos que piden lo mismo a la vez esperan una sola carga.
+        """
+        key = self._key(kind, path)
+        stamp = file_stamp(path)
+        if stamp is None:
+            return loader(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        with loading:
+            # Otro hilo pudo terminar la misma carga mientras se esperaba
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == stamp:
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+
+            value = loader(path)
+            # Si el archivo cambió durante la lectura, no se guarda una versión mezclada
+            if file_stamp(path) == stamp:
+                with self._lock:
+                    self._entries[key] = (stamp, value)
+            return value
+
+    def put(self, kind, path, value):
+        """Publica un objeto recién guardado en path (p. ej. tras entrenar)"""
+        stamp = file_stamp(path)
+        if stamp is None:
+            return
+        with self._lock:
+            self._entries[self._key(kind, path)] = (stamp, value)
+
+    def invalidate(self, path=None):
+        """Olvida las entradas de un archivo (de cualquier tipo) o todas"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            path = os.path.abspath(path)
+            for key in [key for key in self._entries if key[1] == path]:
+                del self._entries[key]
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Caché única del proceso: la comparten todos los FaceRecognitionThread
+MODEL_CACHE = ModelCache()
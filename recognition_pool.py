@@ -0,0 +1,299 @@
+"""
+Reconocimiento facial en procesos separados
+Factory I/O Controller System
+
+FaceRecognitionThread detecta y predice dentro del proceso de la interfaz,
+donde compite con Qt y el worker Modbus por el GIL y los núcleos. Con un
+RecognitionPool ese trabajo lo hacen uno o más procesos:
+
+- los frames se copian a ranuras de un bloque multiprocessing.shared_memory;
+  por las colas solo viajan el número de ranura y metadatos, nunca píxeles
+- cada proceso detecta las caras, reconoce todas en un lote y devuelve solo
+  las cajas y (etiqueta, distancia) de cada una
+- la ranura queda libre cuando llega su resultado; si no hay ranuras libres
+  el frame se descarta (siempre interesa el más reciente)
+- las ranuras se dimensionan con el primer frame; si llega uno más grande
+  (otra cámara u otra resolución) el bloque se vuelve a crear y cada proceso
+  se conecta al nuevo con la siguiente tarea
+
+Los procesos no guardan estado entre frames (sin FaceTracker), porque con
+varios procesos frames consecutivos caen en procesos distintos. Detector y
+modelo se cargan con la caché de cada proceso (model_cache.MODEL_CACHE),
+así que se recargan solos cuando el modelo cambia en disco; face_model.bin
+se abre con memmap y sus páginas se comparten entre procesos (salvo en
+Windows, donde cada proceso lo lee a memoria). Como en el hilo, un modelo
+que no corresponde al almacén de muestras no se usa: se pasa al binario o
+a uno calculado desde las muestras.
+"""
+
+import collections
+import copy
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from face_detectors import HAAR_CASCADE_FILE, detector_image, load_detector
+from face_matcher import IVFIndex, LBPHMatcher, read_recognizer
+from face_pipeline import detect_faces, preprocess_face
+from face_storage import FaceStore
+from model_cache import MODEL_CACHE
+
+# Resultado de un frame: cajas N×4 y (etiqueta, distancia) por caja; predictions
+# es None si el proceso no tiene modelo. latency se mide en el proceso principal
+PoolResult = collections.namedtuple('PoolResult', 'seq timestamp boxes predictions latency busy worker')
+
+DEFAULT_CONFIG = {
+    'detector': 'haar',
+    'detector_threads': 1,
+    'detection_workers': 1,
+    'cascade_file': HAAR_CASCADE_FILE,
+    'engine': 'numpy',
+    'model_file': 'face_model.xml',
+    'model_binary_file': 'face_model.bin',
+    'ann_index_file': 'face_ann.npz',
+    'face_samples_file': 'faces_samples.dat',
+    'face_index_file': 'faces_index.json',
+    'ann_nprobe': 16,
+    'detection_scale': 1.0,
+    'scale_factor': 1.1,
+    'min_neighbors': 4,
+    'min_size': (80, 80),
+}
+
+
+def load_training_labels(config):
+    """Etiquetas de las muestras con que el modelo debe estar entrenado según el almacén"""
+    store = FaceStore(config['face_samples_file'], config['face_index_file'])
+    if not store.load_index():
+        return np.empty(0, dtype=np.int32)
+    return store.labels_array()[store.training_indices()]
+
+
+def load_matcher(config, expected_labels):
+    """face_model.bin si corresponde al almacén; si no, un modelo calculado desde las muestras.
+
+    Igual que FaceRecognitionThread.load_binary_model, pero sin escribir el
+    archivo (lo regenera el hilo): el modelo en memoria se guarda en la
+    caché asociado al índice del almacén.
+    """
+    if os.path.exists(config['model_binary_file']):
+        matcher = MODEL_CACHE.get('matcher', config['model_binary_file'], LBPHMatcher.load)
+        if np.array_equal(matcher.labels, expected_labels):
+            return matcher
+    store = FaceStore(config['face_samples_file'], config['face_index_file'])
+    return MODEL_CACHE.get('store_matcher', config['face_index_file'], lambda path: LBPHMatcher.from_store(store))
+
+
+def load_predictor(config):
+    """Función lote → [(etiqueta, distancia)] con el modelo actual del disco"""
+    expected_labels = MODEL_CACHE.get('training_labels', config['face_index_file'],
+                                      lambda path: load_training_labels(config))
+    if config['engine'] == 'opencv' and os.path.exists(config['model_file']):
+        recognizer = MODEL_CACHE.get('lbph', config['model_file'], read_recognizer)
+        # Mismo criterio que FaceRecognitionThread.load_model para re-entrenar el XML
+        if len(recognizer.getLabels()) == len(expected_labels):
+            return lambda batch: [recognizer.predict(face) for face in batch]
+    # Con el XML ausente o desactualizado (registros con el motor NumPy) el
+    # modelo binario da las mismas distancias mientras el hilo lo re-entrena
+    matcher = load_matcher(config, expected_labels)
+    if config['ann_nprobe'] > 0 and os.path.exists(config['ann_index_file']):
+        index = copy.copy(MODEL_CACHE.get('ann', config['ann_index_file'], IVFIndex.load))
+        if index.matches(matcher):
+            index.nprobe = config['ann_nprobe']
+            matcher = copy.copy(matcher)
+            matcher.set_index(index)
+
+    def predict(batch):
+        labels, distances = matcher.search(batch, k=1)
+        if labels.shape[1] == 0:
+            return [(-1, float('inf'))] * len(batch)
+        return [(int(label), float(distance)) if label >= 0 else (-1, float('inf'))
+                for label, distance in zip(labels[:, 0], distances[:, 0])]
+    return predict
+
+
+def worker_main(tasks, results, config):
+    """Proceso de reconocimiento: lee frames de la memoria compartida hasta recibir None"""
+    shm = None
+    detector = load_detector(config['detector'], config['cascade_file'], threads=config['detector_threads'],
+                             workers=config['detection_workers'])
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            shm_name, slot_bytes, slot, seq, shape = task
+            started = time.perf_counter()
+            # Siempre se responde, aunque falle, para que la ranura vuelva a quedar libre
+            boxes, predictions = np.empty((0, 4), dtype=np.int32), []
+            try:
+                if shm is None or shm.name != shm_name:
+                    # El bloque se recreó para frames más grandes
+                    if shm is not None:
+                        shm.close()
+                    shm = shared_memory.SharedMemory(name=shm_name)
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                try:
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    boxes = detect_faces(detector, detector_image(detector, frame, gray),
+                                         detection_scale=config['detection_scale'],
+                                         scale_factor=config['scale_factor'],
+                                         min_neighbors=config['min_neighbors'], min_size=config['min_size'])
+                finally:
+                    del frame  # La vista no debe sobrevivir a shm.close()
+            except Exception as e:
+                print(f"❌ Error detectando caras en el proceso de reconocimiento: {str(e)}")
+            if len(boxes):
+                try:
+                    predict = load_predictor(config)
+                    batch = np.array([preprocess_face(gray[y:y+h, x:x+w]) for (x, y, w, h) in boxes])
+                    predictions = predict(batch)
+                except Exception as e:
+                    print(f"⚠️ Proceso de reconocimiento sin modelo: {str(e)}")
+                    predictions = None
+            results.put((slot, seq, boxes, predictions, time.perf_counter() - started, os.getpid()))
+    finally:
+        if shm is not None:
+            shm.close()
+
+
+class RecognitionPool:
+    """Procesos de detección y reconocimiento alimentados por memoria compartida.
+
+    Uso desde un único hilo consumidor: submit() copia el frame a una
+    ranura libre y devuelve enseguida; get_result() entrega los resultados
+    a medida que llegan (no necesariamente en orden con varios procesos).
+    Los procesos se crean con 'spawn' para no heredar los hilos de Qt; la
+    primera vez tardan en importar OpenCV, por eso conviene llamar a
+    start() al crear la ventana y no al pulsar "Iniciar".
+    """
+
+    def __init__(self, processes=1, slots=None, max_frame_shape=None, **config):
+        self.processes = max(1, processes)
+        # Una ranura por proceso: un frame más esperando en la cola solo suma latencia
+        self.slots = slots or self.processes
+        # Sin max_frame_shape las ranuras se crean con el tamaño del primer frame
+        self.slot_bytes = int(np.prod(max_frame_shape)) if max_frame_shape else 0
+        self.config = dict(DEFAULT_CONFIG, **config)
+        for key in ('cascade_file', 'model_file', 'model_binary_file', 'ann_index_file', 'face_samples_file',
+                    'face_index_file'):
+            self.config[key] = os.path.abspath(self.config[key])
+        self._lock = threading.Lock()
+        self.shm = None
+        self.workers = []
+        self.free_slots = collections.deque()
+        self.submitted_at = {}  # seq -> (ranura, instante de envío, marca de tiempo del frame)
+        self.next_seq = 0
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+
+    def is_running(self):
+        return bool(self.workers) and all(worker.is_alive() for worker in self.workers)
+
+    def start(self):
+        with self._lock:
+            if self.workers:
+                return
+            context = multiprocessing.get_context('spawn')
+            if self.slot_bytes:
+                self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+            self.tasks = context.Queue()
+            self.results = context.Queue()
+            self.free_slots = collections.deque(range(self.slots))
+            self.submitted_at = {}
+            self.workers = [context.Process(target=worker_main, daemon=True,
+                                            args=(self.tasks, self.results, self.config))
+                            for _ in range(self.processes)]
+            for worker in self.workers:
+                worker.start()
+            print(f"🧵 Reconocimiento en {self.processes} proceso(s), {self.slots} ranuras compartidas")
+
+    def submit(self, frame, timestamp=None):
+        """Envía un frame BGR uint8; devuelve su número de secuencia o None si se descartó"""
+        if not self.workers:
+            self.start()
+        with self._lock:
+            if frame.nbytes > self.slot_bytes or self.shm is None:
+                if self.submitted_at:
+                    # Hay procesos leyendo el bloque actual: se recrea cuando terminen
+                    self.dropped += 1
+                    return None
+                self._resize(frame.nbytes)
+            if not self.free_slots:
+                self.dropped += 1
+                return None
+            slot = self.free_slots.popleft()
+            seq = self.next_seq
+            self.next_seq += 1
+            shm, slot_bytes = self.shm, self.slot_bytes
+        target = np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+        np.copyto(target, frame)
+        del target
+        with self._lock:
+            self.submitted_at[seq] = (slot, time.perf_counter(), timestamp)
+            self.submitted += 1
+        self.tasks.put((shm.name, slot_bytes, slot, seq, frame.shape))
+        return seq
+
+    def _resize(self, frame_bytes):
+        """Recrea el bloque compartido con ranuras de frame_bytes (con el lock tomado y sin frames pendientes)"""
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+        self.slot_bytes = max(self.slot_bytes, frame_bytes)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        print(f"🧵 Ranuras compartidas de {self.slot_bytes / 1e6:.1f} MB")
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self.submitted_at)
+
+    def get_result(self, timeout=None):
+        """Siguiente resultado (PoolResult) o None si no llega ninguno en 'timeout' segundos"""
+        if not self.workers:
+            return None
+        try:
+            slot, seq, boxes, predictions, busy, worker = self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        with self._lock:
+            _, sent, timestamp = self.submitted_at.pop(seq)
+            self.free_slots.append(slot)
+            self.completed += 1
+        return PoolResult(seq, timestamp, boxes, predictions, time.perf_counter() - sent, busy, worker)
+
+    def close(self):
+        with self._lock:
+            workers, self.workers = self.workers, []
+        if not workers:
+            return
+        for _ in workers:
+            self.tasks.put(None)
+        for worker in workers:
+            worker.join(timeout=2.0)
+            if worker.is_alive():
+                worker.terminate()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'processes': len(self.workers),
+                'slots': self.slots,
+                'slot_bytes': self.slot_bytes,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'dropped': self.dropped,
+                'pending': len(self.submitted_at),
+            }